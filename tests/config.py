@@ -7,11 +7,24 @@ class Config:
     # Application URLs
     BASE_URL = "http://localhost:3000"
     API_BASE_URL = "https://toptop-backend-api.azurewebsites.net/"
+    STUB_BACKEND_PORT = 8765  # pytest --stub-backend: backend giả in-memory
+    STUB_BACKEND_LATENCY = 0.05  # Độ trễ giả lập mỗi request (giây)
+    CASSETTE_PORT = 8775  # pytest --cassette record|replay: proxy cassette (worker thứ i dùng port + i)
+    CASSETTE_MATCH_ON = ("method", "path", "body")  # Tiêu chí khớp request khi replay
+    CASSETTE_SHARED_PATHS = ("/api/v1/auth/login", "/api/v1/users/me")  # Lưu vào cassette chung _shared.json
+    CASSETTE_REDACT_KEY = os.environ.get("CASSETTE_REDACT_KEY", "toptop-cassette")  # Key HMAC che password/secret
+    CASSETTE_TOKEN_TTL = 3600  # Replay: JWT trong response được đặt exp = now + 1 giờ
     
     # Timeouts (seconds)
-    IMPLICIT_WAIT = 10
+    IMPLICIT_WAIT = 0  # Tắt implicit wait: find_element dùng budget explicit của wait policy (pytest --implicit-wait để bật lại)
+    WAIT_BUDGET = 20  # Giây tối đa một lời gọi page object được đợi (find_element + explicit wait; @wait_policy.budget để đặt riêng)
+    PROBE_TIMEOUT = 2  # Timeout khi dò element trong try/except (element thiếu thì trả lời sau 2s)
+    IMPLICIT_STALL_THRESHOLD = 0.5  # Lệnh find chờ lâu hơn 0.5s được ghi vào log stall của wait policy
     EXPLICIT_WAIT = 20
+    SETTLE_QUIET_MS = 500  # Assert phủ định: trang coi là ổn định khi DOM không đổi 500ms và không còn request
+    SETTLE_GRACE_MS = 500  # ... hoặc nút submit enable lại mà URL không đổi trong 500ms (app chuyển trang sau 100ms)
     PAGE_LOAD_TIMEOUT = 30
+    AUTH_SNAPSHOT_REVALIDATE = 300  # Hỏi lại backend token còn hợp lệ sau mỗi 5 phút
     
     # đki
     TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -32,6 +45,13 @@ class Config:
     TEST_PASSWORD_2 = "ngocanh"
     TEST_FULLNAME_2 = "Nguyễn Thị Ngọc Ánh 4"
     
+    # Account pool cho chế độ chạy song song: mỗi worker (pytest -n N) được cấp một account riêng.
+    # Có thể khai báo thêm account trong tests/test_data/accounts.json: [{"email": ..., "password": ...}]
+    TEST_ACCOUNTS = [
+        {"email": TEST_EMAIL_2, "password": TEST_PASSWORD_2, "username": TEST_USERNAME_2},
+    ]
+    TEST_ACCOUNTS_FILE = os.path.abspath("tests/test_data/accounts.json")
+    
     TEST_VIDEO_TITLE="Khi deadline là thứ Bảy, nhưng hôm nay là Thứ Sáu."
     TEST_VIDEO_DESCRIPTION="Xin vũ trụ hãy độ con qua tuần này. #deadline #vanphong #xuhuong #comedy"
     
@@ -57,10 +77,49 @@ class Config:
     BROWSER = "chrome"  # chrome, firefox, edge
     HEADLESS = False  # Set to True for CI/CD
     WINDOW_SIZE = "1920,1080"
+    BROWSER_PROFILES = ("default", "fast")  # Các profile driver_factory hỗ trợ (pytest --browser-profile, run_tests.py --profile)
+    BROWSER_PROFILE = "default"  # default: Chrome desktop; fast: headless=new, WINDOW_SIZE, không throttle/extension/sync
+    FAST_PROFILE_BLOCK_IMAGES = False  # Profile fast: chặn ảnh (screenshot sẽ thiếu ảnh)
+    DRIVER_POOL_SIZE = 1  # Số browser giữ sẵn để tái sử dụng giữa các test
+    DRIVER_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "toptop-tests")  # chromedriver đã pin
     
     # Test results
     SCREENSHOT_DIR = os.path.abspath("tests/screenshots")
+    SCREENSHOT_STORE_DIR = os.path.join(SCREENSHOT_DIR, "store")  # blobs/<sha[:2]>/<sha>.png + runs/<run>.json
+    SCREENSHOT_RECOMPRESS = True  # Nén lại PNG (lossless, zlib level 9) trước khi lưu blob
+    SCREENSHOT_WRITER_THREADS = 2  # Số thread nền giải mã / nén / ghi screenshot
+    SCREENSHOT_POLICY = "always"  # always | on-failure | on-failure-last-step
+    SCREENSHOT_ELEMENT_CROP = False  # Chỉ chụp SCREENSHOT_ELEMENT của page object (action bar, form upload...)
+    SCREENSHOT_RETENTION_DAYS = 14  # Xóa manifest cũ hơn 14 ngày ...
+    SCREENSHOT_KEEP_RUNS = 20  # ... hoặc ngoài 20 lần chạy gần nhất; blob không còn được tham chiếu bị xóa
+    VISUAL_BASELINE_DIR = os.path.abspath("tests/visual_baselines")  # pytest --visual-diff: baseline <name>.png đã duyệt
+    VISUAL_MASK_SELECTORS = ("video",)  # Vùng bỏ qua khi so sánh (khung video đang phát)
+    VISUAL_PIXEL_TOLERANCE = 16  # Chênh lệch tối đa mỗi kênh màu vẫn coi là giống
+    VISUAL_DIFF_THRESHOLD = 0.005  # Khác baseline khi > 0.5% pixel (ngoài mask) thay đổi
+    VISUAL_PHASH_DISTANCE = 0  # --visual-phash: pHash lệch <= số bit này thì coi là giống, bỏ qua so pixel
+    VISUAL_DIFF_WORKERS = None  # Số process so sánh (None = số CPU)
+    CASSETTE_DIR = os.path.abspath("tests/cassettes")
     REPORT_DIR = os.path.abspath("tests/reports")
+    REPORT_SCREENSHOT_DIR = os.path.join("assets", "screenshots")  # Report external: ảnh + thumbnail, tương đối với file report
+    REPORT_THUMBNAIL_WIDTH = 320
+    REPORT_THUMBNAIL_WORKERS = None  # Số process sinh thumbnail (None = số CPU)
+    VISUAL_DIFF_DIR = os.path.join(REPORT_DIR, "visual_diff")  # Ảnh diff + results.json
+    RESULTS_LOG_PATH = os.path.join(REPORT_DIR, "results.jsonl")  # Một dòng JSON mỗi test, ghi ngay khi test xong
+    LIVE_REPORT_PATH = os.path.join(REPORT_DIR, "live.html")  # pytest --live-report / run_tests.py live-report
+    RUN_HISTORY_DB = os.path.join(REPORT_DIR, "run_history.sqlite3")  # Lịch sử outcome / thời gian theo run (run_tests.py history)
+    WEB_VITALS = True  # Đo Navigation Timing / FCP / LCP / CLS / long task mỗi lần navigation (tắt: --no-web-vitals)
+    WEB_VITALS_REPORT_PATH = os.path.join(REPORT_DIR, "web_vitals.json")  # p50/p95 theo route + số liệu từng navigation
+    CHROME_TRACE = "auto"  # auto: test có marker chrome_trace / vượt time budget ở lần chạy trước | all | off
+    CHROME_TRACE_DIR = os.path.join(REPORT_DIR, "traces")  # <test>_<timestamp>.json.gz (Chrome DevTools / Perfetto)
+    CHROME_TRACE_CATEGORIES = "devtools.timeline,disabled-by-default-devtools.timeline,v8.execute,blink.user_timing,loading"
+    CHROME_TRACE_TOP = 5  # Số long task / script tốn nhiều nhất trong tóm tắt
+    TEST_TIME_BUDGET = 60  # Giây cho phase call của mỗi test (marker time_budget để đặt riêng)
+    LOCATOR_REGISTRY_PATH = os.path.join(REPORT_DIR, "locator_registry.json")  # Strategy thắng + hit/miss (nạp lại ở lần chạy sau)
+    WAIT_POLICY_REPORT_PATH = os.path.join(REPORT_DIR, "wait_policy.json")  # Stall theo lời gọi page object
+    PHASE_REPORT_PATH = os.path.join(REPORT_DIR, "phase_timings.json")
+    PHASE_BASELINE_PATH = os.path.abspath("tests/benchmarks/phase_baseline.json")
+    PHASE_REGRESSION_THRESHOLD = 0.2  # Chậm hơn baseline 20% ...
+    PHASE_REGRESSION_MIN_SECONDS = 0.5  # ... và hơn 0.5s thì đánh dấu regression
     
     @classmethod
     def ensure_directories(cls):
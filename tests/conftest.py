@@ -1,7 +1,475 @@
 import pytest
-from pathlib import Path
-import glob
 import os
+from tests.config import Config
+from tests.utils.driver_factory import DriverPool, BROWSER_PROFILES, add_new_document_script, get_browser_memory_mb
+from tests.utils import chromedriver_cache
+from tests.utils.auth_session import AuthSessionStore
+from tests.utils import account_pool
+from tests.utils.wait_recorder import WaitRecorderPlugin
+from tests.utils.stub_backend import StubBackend
+from tests.utils.cassette import CassetteProxy
+from tests.utils import browser_stats
+from tests.utils.browser_stats import BrowserStatsPlugin
+from tests.utils import screenshot_store
+from tests.utils.report_assets import ReportAssets
+from tests.utils import phase_timer
+from tests.utils.visual_diff import VisualDiffPlugin
+from tests.utils.results_log import ResultsLogPlugin
+from tests.utils import run_history
+from tests.utils import web_vitals
+from tests.utils.web_vitals import WebVitalsPlugin
+from tests.utils.chrome_trace import ChromeTracePlugin
+from tests.utils.locator_registry import LocatorRegistryPlugin
+from tests.utils import wait_policy
+from tests.utils.wait_policy import WaitPolicyPlugin
+import time
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--browser-profile",
+        choices=BROWSER_PROFILES,
+        default=None,
+        help="Browser profile cho cả lần chạy (mặc định Config.BROWSER_PROFILE); fast = headless tối ưu tốc độ",
+    )
+    parser.addoption(
+        "--no-driver-pool",
+        action="store_true",
+        default=False,
+        help="Khởi động browser mới cho mỗi test (tắt pool, dùng để so sánh thời gian)",
+    )
+    parser.addoption(
+        "--phase-baseline",
+        default=None,
+        help="File baseline thời gian từng phase để so sánh (mặc định Config.PHASE_BASELINE_PATH)",
+    )
+    parser.addoption(
+        "--phase-save-baseline",
+        action="store_true",
+        default=False,
+        help="Lưu kết quả đo phase của lần chạy này làm baseline",
+    )
+    parser.addoption(
+        "--phase-threshold",
+        type=float,
+        default=None,
+        help="Ngưỡng chậm hơn baseline (tỉ lệ, vd. 0.2 = 20%%) để đánh dấu regression",
+    )
+    parser.addoption(
+        "--phase-gate",
+        action="store_true",
+        default=False,
+        help="Session fail nếu có test bị regression so với baseline",
+    )
+    parser.addoption(
+        "--results-log",
+        default=None,
+        help="File JSONL ghi kết quả từng test ngay khi xong (mặc định Config.RESULTS_LOG_PATH)",
+    )
+    parser.addoption(
+        "--live-report",
+        action="store_true",
+        default=False,
+        help="Dựng lại báo cáo live (Config.LIVE_REPORT_PATH) sau mỗi test từ results log",
+    )
+    parser.addoption(
+        "--no-history",
+        action="store_true",
+        default=False,
+        help="Không ghi lần chạy này vào lịch sử SQLite (Config.RUN_HISTORY_DB)",
+    )
+    parser.addoption(
+        "--screenshot-policy",
+        choices=screenshot_store.POLICIES,
+        default=None,
+        help="Khi nào lưu screenshot: always, on-failure, on-failure-last-step (mặc định Config.SCREENSHOT_POLICY)",
+    )
+    parser.addoption(
+        "--screenshot-crop",
+        action="store_true",
+        default=False,
+        help="Chỉ chụp phần tử chính của trang (SCREENSHOT_ELEMENT của page object) thay vì cả trang",
+    )
+    parser.addoption(
+        "--visual-diff",
+        action="store_true",
+        default=False,
+        help="So sánh screenshot với baseline trong Config.VISUAL_BASELINE_DIR cuối session (cần numpy + Pillow)",
+    )
+    parser.addoption(
+        "--visual-approve",
+        action="store_true",
+        default=False,
+        help="Lưu screenshot mới / khác baseline của lần chạy này làm baseline (bật --visual-diff)",
+    )
+    parser.addoption(
+        "--visual-phash",
+        action="store_true",
+        default=False,
+        help="Lọc trước bằng perceptual hash: pHash giống thì bỏ qua so pixel (nhanh hơn, có thể bỏ sót thay đổi nhỏ)",
+    )
+    parser.addoption(
+        "--no-web-vitals",
+        action="store_true",
+        default=False,
+        help="Không đo Navigation Timing / FCP / LCP / CLS / long task của các trang (Config.WEB_VITALS)",
+    )
+    parser.addoption(
+        "--chrome-trace",
+        choices=("off", "auto", "all"),
+        default=None,
+        help="Chrome trace: auto = test có marker chrome_trace hoặc vượt time budget ở lần chạy trước, "
+             "all = mọi test, off = tắt (mặc định Config.CHROME_TRACE)",
+    )
+    parser.addoption(
+        "--implicit-wait",
+        type=float,
+        default=None,
+        help="Bật lại implicit wait (giây) thay cho budget explicit của wait policy, để so sánh / tìm stall "
+             "(mặc định Config.IMPLICIT_WAIT)",
+    )
+    parser.addoption(
+        "--stub-backend",
+        action="store_true",
+        default=False,
+        help="Chạy với backend giả in-memory thay cho Config.API_BASE_URL",
+    )
+    parser.addoption(
+        "--stub-latency",
+        type=float,
+        default=None,
+        help="Độ trễ giả lập (giây) cho mỗi request tới stub backend (mặc định Config.STUB_BACKEND_LATENCY)",
+    )
+    parser.addoption(
+        "--cassette",
+        choices=("record", "replay"),
+        default=None,
+        help="record: ghi traffic backend vào cassette của từng test; replay: trả response từ cassette",
+    )
+    parser.addoption(
+        "--cassette-match",
+        default=None,
+        help="Tiêu chí khớp request khi replay, vd. method,path (mặc định Config.CASSETTE_MATCH_ON)",
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("--stub-backend") and config.getoption("--cassette"):
+        raise pytest.UsageError("--stub-backend và --cassette không dùng cùng lúc")
+    match_on = config.getoption("--cassette-match")
+    if match_on and not set(match_on.split(",")) <= {"method", "path", "body"}:
+        raise pytest.UsageError("--cassette-match chỉ nhận method, path, body")
+    config.addinivalue_line(
+        "markers",
+        "fresh_driver: test dùng browser riêng, quit sau khi xong (không trả về pool)",
+    )
+    config.addinivalue_line(
+        "markers",
+        "browser_profile(name): chạy test với browser profile riêng (default, fast)",
+    )
+    config.addinivalue_line(
+        "markers",
+        "chrome_trace: chạy test với browser riêng bật Chrome tracing, lưu trace + tóm tắt vào báo cáo",
+    )
+    config.addinivalue_line(
+        "markers",
+        "time_budget(seconds): thời gian tối đa của test (mặc định Config.TEST_TIME_BUDGET); vượt thì lần chạy sau được trace",
+    )
+    config.addinivalue_line(
+        "markers",
+        "shared_backend_state: không reset dữ liệu stub backend trước test (test dùng trạng thái của test trước)",
+    )
+    screenshot_store.policy = config.getoption("--screenshot-policy") or Config.SCREENSHOT_POLICY
+    if hasattr(config, "workerinput"):
+        # Config.TIMESTAMP khác nhau giữa các worker: dùng id lần chạy của process chính
+        screenshot_store.run_group = config.workerinput.get("screenshot_run_group", screenshot_store.run_group)
+    if config.getoption("--screenshot-crop"):
+        Config.SCREENSHOT_ELEMENT_CROP = True
+    config.pluginmanager.register(phase_timer.PhaseTimingPlugin(config), "phase_timing")
+    implicit_wait = config.getoption("--implicit-wait")
+    wait_policy.implicit_wait = Config.IMPLICIT_WAIT if implicit_wait is None else implicit_wait
+    config.pluginmanager.register(WaitPolicyPlugin(config), "wait_policy")
+    config.pluginmanager.register(WaitRecorderPlugin(config), "wait_recorder")
+    config.pluginmanager.register(BrowserStatsPlugin(config), "browser_stats")
+    config.pluginmanager.register(ResultsLogPlugin(
+        config,
+        path=config.getoption("--results-log"),
+        live_report=Config.LIVE_REPORT_PATH if config.getoption("--live-report") else None,
+    ), "results_log")
+    config.pluginmanager.register(LocatorRegistryPlugin(config), "locator_registry")
+    if Config.WEB_VITALS and not config.getoption("--no-web-vitals"):
+        config.pluginmanager.register(WebVitalsPlugin(config), "web_vitals")
+    trace_mode = config.getoption("--chrome-trace") or Config.CHROME_TRACE
+    if trace_mode != "off":
+        config._chrome_trace = ChromeTracePlugin(config, mode=trace_mode)
+        config.pluginmanager.register(config._chrome_trace, "chrome_trace")
+    if config.getoption("--visual-diff") or config.getoption("--visual-approve"):
+        try:
+            import numpy  # noqa: F401
+            import PIL  # noqa: F401
+        except ImportError:
+            raise pytest.UsageError("--visual-diff cần numpy và Pillow (pip install -r tests/requirements.txt)")
+        config.pluginmanager.register(VisualDiffPlugin(config), "visual_diff")
+    # Screenshot trong báo cáo: external (thumbnail + ảnh gốc cạnh report) hoặc nhúng khi --self-contained-html
+    if getattr(config.option, "htmlpath", None):
+        config._report_assets = ReportAssets(
+            config.option.htmlpath, self_contained=config.getoption("self_contained_html")
+        )
+
+    # Chạy song song: process điều phối giữ stub suốt cả lần chạy, các worker dùng chung
+    is_xdist_controller = getattr(config.option, "numprocesses", None) and not hasattr(config, "workerinput")
+    if config.getoption("--stub-backend") and is_xdist_controller:
+        config._shared_stub_backend = StubBackend(latency=config.getoption("--stub-latency")).start()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """xdist: mọi worker ghi manifest screenshot dưới cùng một lần chạy"""
+    node.workerinput["screenshot_run_group"] = screenshot_store.run_group
+
+
+def pytest_unconfigure(config):
+    shared_stub = getattr(config, "_shared_stub_backend", None)
+    if shared_stub is not None:
+        shared_stub.stop()
+
+
+@pytest.fixture(scope="session")
+def driver_pools(request):
+    """Pool browser dùng chung cho cả session, mỗi browser profile một pool"""
+    pools = {}
+    yield pools
+    for pool in pools.values():
+        pool.close()
+
+
+def get_browser_profile(request):
+    """Profile của test: marker browser_profile > --browser-profile > Config.BROWSER_PROFILE"""
+    marker = request.node.get_closest_marker("browser_profile")
+    if marker is not None:
+        return marker.args[0]
+    return request.config.getoption("--browser-profile") or Config.BROWSER_PROFILE
+
+
+@pytest.fixture(scope="session")
+def stub_backend(request):
+    """Backend giả (--stub-backend); None khi chạy với backend thật"""
+    if not request.config.getoption("--stub-backend"):
+        yield None
+        return
+    stub = StubBackend(latency=request.config.getoption("--stub-latency")).start()
+    request.config._stub_backend = stub
+    upstream = Config.API_BASE_URL
+    # Các request từ Python (vd. AuthSessionStore kiểm tra token) cũng đi tới stub
+    Config.API_BASE_URL = stub.url
+    yield stub
+    Config.API_BASE_URL = upstream
+    stub.stop()
+
+
+@pytest.fixture(autouse=True)
+def stub_backend_state(request, stub_backend):
+    """Reset dữ liệu stub của account test trước mỗi test"""
+    if stub_backend is not None and request.node.get_closest_marker("shared_backend_state") is None:
+        stub_backend.reset(email=account_pool.lease_account()["email"])
+
+
+@pytest.fixture(scope="session")
+def cassette_proxy(request):
+    """Proxy record/replay (--cassette); mỗi worker xdist một proxy riêng"""
+    mode = request.config.getoption("--cassette")
+    if mode is None:
+        yield None
+        return
+    match_on = request.config.getoption("--cassette-match")
+    proxy = CassetteProxy(
+        mode,
+        match_on=match_on.split(",") if match_on else None,
+        port=Config.CASSETTE_PORT + account_pool.get_worker_index(),
+    ).start()
+    request.config._cassette_proxy = proxy
+    upstream = Config.API_BASE_URL
+    Config.API_BASE_URL = proxy.url
+    yield proxy
+    Config.API_BASE_URL = upstream
+    proxy.stop()
+
+
+@pytest.fixture(autouse=True)
+def cassette(request, cassette_proxy):
+    """Mỗi test một cassette; request không khớp khi replay được kiểm tra ở pytest_runtest_call"""
+    if cassette_proxy is None:
+        yield None
+        return
+    cassette_proxy.use_cassette(request.node.nodeid)
+    yield cassette_proxy
+    cassette_proxy.eject()
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_call(item):
+    """Replay mà có request không khớp cassette thì test fail (trong phase call, không phải lỗi teardown)"""
+    proxy = getattr(item.config, "_cassette_proxy", None)
+    misses = proxy.take_misses() if proxy is not None else []
+    if misses:
+        pytest.fail(
+            "Request không có trong cassette:\n"
+            + "\n".join(f"  {m['method']} {m['path']} {m['body'][:200]}" for m in misses)
+        )
+
+
+@pytest.fixture(scope="function")
+def driver(request, driver_pools, stub_backend, cassette_proxy):
+    """Mượn browser từ pool của profile; test có marker fresh_driver dùng browser riêng"""
+    profile = get_browser_profile(request)
+    if profile not in driver_pools:
+        driver_pools[profile] = DriverPool(profile=profile)
+    driver_pool = driver_pools[profile]
+    chrome_trace = getattr(request.config, "_chrome_trace", None)
+    # Test được trace dùng browser riêng bật tracing, không trả về pool
+    trace = chrome_trace is not None and chrome_trace.wants_trace(request.node)
+    use_fresh = (
+        trace
+        or request.config.getoption("--no-driver-pool")
+        or request.node.get_closest_marker("fresh_driver") is not None
+    )
+    # Thay đổi stats của pool / chromedriver trong test này được gửi về process chính (browser_stats)
+    pool_before, chromedriver_before = dict(driver_pool.stats), dict(chromedriver_cache.stats)
+    start = time.perf_counter()
+    with phase_timer.phase("driver_startup"):
+        driver = driver_pool.create(trace=trace) if use_fresh else driver_pool.acquire()
+    phase_timer.instrument_driver(driver)
+    wait_policy.instrument_driver(driver)
+    for backend in (stub_backend, cassette_proxy):
+        if backend is not None:
+            # Gỡ tự động khi browser được reset (reset_driver)
+            add_new_document_script(driver, backend.redirect_script())
+    web_vitals.install(driver)
+    # Để chụp được lúc fixture khác fail trong setup (vd. login của logged_in_driver), khi funcargs chưa có driver
+    request.node._driver = driver
+    yield driver
+    # Số liệu của trang cuối cùng, trước khi browser bị reset
+    web_vitals.collect(driver)
+    memory_mb, memory_source = get_browser_memory_mb(driver)
+    duration = time.perf_counter() - start
+    with phase_timer.phase("driver_reset"):
+        if use_fresh:
+            driver_pool.discard(driver)
+        else:
+            driver_pool.release(driver)
+    browser_stats.record(
+        profile, request.node.nodeid, duration, memory_mb, memory_source,
+        pool=browser_stats.stats_delta(pool_before, driver_pool.stats),
+        chromedriver=browser_stats.stats_delta(chromedriver_before, chromedriver_cache.stats),
+    )
+
+
+def pytest_runtest_setup(item):
+    """Gắn các screenshot được ghi nhận với test đang chạy"""
+    screenshot_store.start_test(item.nodeid)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """
+    Ghi nốt screenshot / thumbnail đang chờ; process chính (sau khi mọi worker đã ghi xong)
+    áp dụng retention cho store và ghi lần chạy vào lịch sử SQLite.
+    """
+    screenshot_store.flush()
+    # Mỗi process (kể cả worker xdist) ghi manifest screenshot của mình một lần
+    screenshot_store.write_manifest()
+    report_assets = getattr(session.config, "_report_assets", None)
+    if report_assets is not None:
+        report_assets.close()
+    if hasattr(session.config, "workerinput"):
+        return
+    session.config._screenshot_prune = screenshot_store.prune()
+    results_log = session.config.getoption("--results-log") or Config.RESULTS_LOG_PATH
+    if not session.config.getoption("--no-history") and os.path.exists(results_log):
+        session.config._run_history_id = run_history.record_run(results_log, exitstatus=int(exitstatus))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_setupnodes(config, specs):
+    """Chạy song song: dừng ngay nếu không đủ account cho mỗi worker"""
+    try:
+        account_pool.check_capacity(len(specs))
+    except RuntimeError as e:
+        pytest.exit(str(e), returncode=pytest.ExitCode.USAGE_ERROR)
+
+
+@pytest.fixture(scope="session")
+def test_account():
+    """Account test dành riêng cho worker hiện tại"""
+    return account_pool.lease_account()
+
+
+@pytest.fixture(scope="session")
+def auth_sessions(request):
+    """Auth snapshot dùng chung: mỗi account chỉ login qua UI một lần mỗi lần chạy"""
+    store = AuthSessionStore()
+    request.config._auth_sessions = store
+    return store
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """In thống kê auth / stub / cassette / lịch sử / screenshot cuối session"""
+    auth_sessions = getattr(config, "_auth_sessions", None)
+    if auth_sessions is not None:
+        terminalreporter.section("auth sessions")
+        for line in auth_sessions.summary_lines():
+            terminalreporter.write_line(line)
+
+    stub = getattr(config, "_stub_backend", None)
+    if stub is not None:
+        terminalreporter.section("stub backend")
+        for line in stub.summary_lines():
+            terminalreporter.write_line(line)
+
+    proxy = getattr(config, "_cassette_proxy", None)
+    if proxy is not None:
+        terminalreporter.section("cassettes")
+        for line in proxy.summary_lines():
+            terminalreporter.write_line(line)
+
+    run_id = getattr(config, "_run_history_id", None)
+    if run_id is not None:
+        terminalreporter.section("run history")
+        flaky = run_history.flaky_tests()
+        terminalreporter.write_line(f"run #{run_id} recorded in {Config.RUN_HISTORY_DB}")
+        for item in flaky:
+            terminalreporter.write_line(f"🔁 flaky: {item['test']} ({item['flips']} flips in {item['runs']} runs)")
+        terminalreporter.write_line("python tests/run_tests.py history   # flaky / slowest / slower since commit")
+
+    screenshot_lines = screenshot_store.summary_lines()
+    removed_runs, removed_blobs = getattr(config, "_screenshot_prune", (0, 0))
+    if removed_runs or removed_blobs:
+        screenshot_lines.append(f"pruned {removed_runs} run manifests, {removed_blobs} unreferenced blobs")
+    if screenshot_lines:
+        terminalreporter.section("screenshots")
+        for line in screenshot_lines:
+            terminalreporter.write_line(line)
+
+    report_assets = getattr(config, "_report_assets", None)
+    if report_assets is not None and report_assets.stats["images"]:
+        terminalreporter.section("html report screenshots")
+        for line in report_assets.summary_lines():
+            terminalreporter.write_line(line)
+
+
+def capture_failure_screenshot(item):
+    """Chụp cả trang của browser mà test đang dùng, tên <test>_failure"""
+    driver = getattr(item, "_driver", None) or next(
+        (value for value in item.funcargs.values() if hasattr(value, "get_screenshot_as_base64")), None
+    )
+    if driver is None:
+        return
+    try:
+        with phase_timer.phase("screenshot"):
+            capture = driver.get_screenshot_as_base64()
+        screenshot_store.submit(capture, f"{item.name}_failure")
+    except Exception as e:
+        print(f"⚠️  Could not capture failure screenshot: {e}")
+
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
@@ -9,29 +477,29 @@ def pytest_runtest_makereport(item, call):
     outcome = yield
     report = outcome.get_result()
     
-    # Chỉ xử lý khi test kết thúc (call phase)
-    if report.when == 'call':
+    # Chỉ xử lý khi test kết thúc (call phase) hoặc fail ngay trong setup (vd. login của logged_in_driver)
+    if report.when == 'call' or (report.when == 'setup' and report.failed):
         extras = getattr(report, 'extras', [])
-        
-        # Tìm screenshot của test này (theo pattern tên test)
-        test_name = item.name
-        screenshot_dir = Path(__file__).parent / "screenshots"
-        
-        if screenshot_dir.exists():
-            # Tìm tất cả screenshot có tên chứa test name
-            pattern = f"{test_name}_*.png"
-            screenshots = glob.glob(str(screenshot_dir / pattern))
-            
-            # Nếu không tìm thấy, thử pattern không có timestamp
-            if not screenshots:
-                pattern = f"{test_name}.png"
-                screenshots = glob.glob(str(screenshot_dir / pattern))
-            
-            # Attach tất cả screenshots vào report
-            for screenshot_path in screenshots:
-                if os.path.exists(screenshot_path):
-                    # Chuyển đường dẫn thành relative để HTML report hiển thị đúng
-                    rel_path = os.path.relpath(screenshot_path, start=Path(__file__).parent)
-                    extras.append(pytest.html.extras.image(rel_path))
+        # Policy on-failure*: test fail thì ghi bước cuối và chụp trạng thái lúc fail (browser chưa bị trả về pool)
+        if screenshot_store.finish_test(report.failed):
+            capture_failure_screenshot(item)
+        # Đợi thread nền ghi xong screenshot của test trước khi attach
+        screenshot_store.flush()
+
+        # Chỉ attach screenshot mà test này chụp trong lần chạy hiện tại (registry theo node id)
+        report_assets = getattr(item.config, "_report_assets", None)
+        if report_assets is not None:
+            for screenshot_path in screenshot_store.screenshots_for(item.nodeid):
+                extras.append(report_assets.extra_for(screenshot_path))
         
         report.extras = extras
+
+    # Gửi screenshot của test (kèm mask) về process chính cho visual diff / results log (hoạt động cả với xdist)
+    if report.when == 'teardown':
+        screenshot_store.flush()
+        entries = [
+            {"name": e["name"], "blob": e["blob"], "path": e["path"], "masks": e.get("masks", [])}
+            for e in screenshot_store.entries_for(item.nodeid)
+        ]
+        if entries:
+            report.user_properties.append(("screenshots", entries))
@@ -1,23 +1,321 @@
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.webelement import WebElement
+from tests.config import Config
+from tests.utils import wait_recorder
+from tests.utils import phase_timer
+from tests.utils import screenshot_store
+from tests.utils import visual_diff
+from tests.utils import web_vitals
+from tests.utils import locator_registry
+from tests.utils import wait_policy
+from tests.utils.wait_policy import ExplicitWait
+from tests.utils.driver_factory import add_new_document_script
 import time
 
+# Hàm JS tìm element theo (By, value) của Selenium, dùng chung cho các script trong page object
+FIND_ALL_JS = """
+function findAll(by, value, root) {
+    root = root || document;
+    if (by === 'xpath') {
+        var snap = document.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var found = [];
+        for (var i = 0; i < snap.snapshotLength; i++) found.push(snap.snapshotItem(i));
+        return found;
+    }
+    var css = by === 'id' ? '#' + CSS.escape(value)
+        : by === 'name' ? '[name="' + value + '"]'
+        : by === 'class name' ? '.' + CSS.escape(value)
+        : value;
+    return Array.prototype.slice.call(root.querySelectorAll(css));
+}
+"""
+
+# Trạng thái element trong một lần gọi: [element, visible, enabled, in_viewport] hoặc null
+ELEMENT_STATE_JS = FIND_ALL_JS + """
+var el = arguments[0] || findAll(arguments[1], arguments[2])[0];
+if (!el || !el.isConnected) return null;
+var style = window.getComputedStyle(el);
+var rect = el.getBoundingClientRect();
+var visible = style.display !== 'none' && style.visibility !== 'hidden' && rect.width > 0 && rect.height > 0;
+var inViewport = rect.bottom > 0 && rect.top < window.innerHeight && rect.right > 0 && rect.left < window.innerWidth;
+return [el, visible, !el.disabled, inViewport];
+"""
+
+# Dữ liệu của mọi element khớp locator trong một lần gọi; element trả về dưới dạng WebElement để thao tác tiếp
+SNAPSHOT_JS = FIND_ALL_JS + """
+return findAll(arguments[0], arguments[1], arguments[2]).map(function (el, index) {
+    var style = window.getComputedStyle(el);
+    var rect = el.getBoundingClientRect();
+    var visible = style.display !== 'none' && style.visibility !== 'hidden' && rect.width > 0 && rect.height > 0;
+    return {
+        element: el, index: index, tag: el.tagName.toLowerCase(),
+        text: visible ? el.innerText.trim() : '',
+        classes: Array.prototype.slice.call(el.classList),
+        aria_label: el.getAttribute('aria-label'),
+        visible: visible, enabled: !el.disabled,
+        in_viewport: rect.bottom > 0 && rect.top < window.innerHeight && rect.right > 0 && rect.left < window.innerWidth
+    };
+});
+"""
+
+# Đánh giá mọi strategy của một element logic trong một lần gọi: [winner, các index khớp, [[element, text]...]]
+# state: present | visible | visible_text (hiển thị và có text)
+LOCATE_JS = FIND_ALL_JS + """
+var strategies = arguments[0], order = arguments[1], state = arguments[2];
+function keep(el) {
+    if (state === 'present') return true;
+    var style = window.getComputedStyle(el);
+    var rect = el.getBoundingClientRect();
+    var visible = style.display !== 'none' && style.visibility !== 'hidden' && rect.width > 0 && rect.height > 0;
+    return visible && (state === 'visible' || el.innerText.trim() !== '');
+}
+var winner = -1, matched = [], found = [];
+order.forEach(function (index) {
+    var elements = [];
+    try { elements = findAll(strategies[index][0], strategies[index][1]).filter(keep); } catch (e) {}
+    if (!elements.length) return;
+    matched.push(index);
+    if (winner < 0) {
+        winner = index;
+        found = elements.map(function (el) { return [el, el.innerText.trim()]; });
+    }
+});
+return [winner, matched, found];
+"""
+
+# Điền nhiều field trong một lần gọi: set value bằng native setter (React không thấy thay đổi nếu gán
+# el.value trực tiếp) rồi bắn input/change như khi gõ, focus/blur thật để chạy validation onBlur.
+# Thiếu field nào thì không điền gì và trả về các locator bị thiếu.
+FILL_FORM_JS = FIND_ALL_JS + """
+var fields = arguments[0], elements = [], missing = [];
+fields.forEach(function (field) {
+    var el = findAll(field[0][0], field[0][1])[0];
+    if (el) elements.push(el); else missing.push(field[0]);
+});
+if (missing.length) return missing;
+fields.forEach(function (field, i) {
+    var el = elements[i];
+    var proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype
+        : el instanceof HTMLSelectElement ? HTMLSelectElement.prototype
+        : HTMLInputElement.prototype;
+    el.focus();
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, field[1]);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.blur();
+});
+return [];
+"""
+
+# Đợi tới khi "điều mong đợi" xảy ra (URL chứa một trong urlParts hoặc element target xuất hiện) hoặc trang đạt
+# trạng thái cuối chứng tỏ nó sẽ không xảy ra. Chỉ dùng observer (MutationObserver, popstate, sự kiện của
+# NETWORK_TRACKER_JS) và timer một lần, không polling. Trả về [state, detail]:
+#   found         - URL / element mong đợi đã có
+#   invalid       - form của nút submit không hợp lệ (validation HTML5 chặn submit, sẽ không có request)
+#   error         - element lỗi hiển thị và có text
+#   request_failed- request (sau mốc since của network tracker) trả về status >= 400 hoặc lỗi mạng
+#   reenabled     - nút submit bị disable rồi enable lại, và URL không đổi trong graceMs sau đó
+#   settled       - DOM không đổi trong quietMs và không còn request đang chạy
+#   timeout       - hết timeoutMs
+SETTLE_JS = FIND_ALL_JS + """
+var urlParts = arguments[0], target = arguments[1], errors = arguments[2], submit = arguments[3],
+    since = arguments[4], quietMs = arguments[5], graceMs = arguments[6], timeoutMs = arguments[7],
+    done = arguments[arguments.length - 1];
+var finished = false, timers = [], observer = null, quietTimer = null, graceTimer = null, wasDisabled = false;
+
+function first(locator) {
+    try { return findAll(locator[0], locator[1])[0] || null; } catch (e) { return null; }
+}
+function visibleText(el) {
+    var style = window.getComputedStyle(el), rect = el.getBoundingClientRect();
+    return style.display !== 'none' && style.visibility !== 'hidden' && rect.width > 0 && rect.height > 0
+        && el.innerText.trim() !== '';
+}
+function finish(state, detail) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    timers.concat([quietTimer, graceTimer]).forEach(clearTimeout);
+    window.removeEventListener('popstate', check);
+    window.removeEventListener('__netTrackerFinished', check);
+    done([state, detail === undefined ? null : detail]);
+}
+function found() {
+    var href = location.href;
+    if (urlParts.some(function (part) { return href.indexOf(part) !== -1; })) return href;
+    if (target && first(target)) return target[1];
+    return null;
+}
+function failedRequest() {
+    var t = window.__netTracker;
+    if (!t || since === null) return null;
+    for (var i = 0; i < t.done.length; i++) {
+        var r = t.done[i];
+        if (r.seq > since && (r.status >= 400 || r.status === 0)) return r.method + ' ' + r.path + ' ' + r.status;
+    }
+    return null;
+}
+function inflight() {
+    return window.__netTracker ? window.__netTracker.inflight : 0;
+}
+function check() {
+    if (finished) return;
+    var hit = found();
+    if (hit) return finish('found', hit);
+    for (var i = 0; i < errors.length; i++) {
+        var els = [];
+        try { els = findAll(errors[i][0], errors[i][1]); } catch (e) {}
+        var shown = els.filter(visibleText)[0];
+        if (shown) return finish('error', shown.innerText.trim());
+    }
+    var failed = failedRequest();
+    if (failed) return finish('request_failed', failed);
+    var button = submit && first(submit);
+    if (button && button.disabled) {
+        wasDisabled = true;
+        clearTimeout(graceTimer);
+        graceTimer = null;
+    } else if (button && wasDisabled && !graceTimer) {
+        // App có thể enable lại nút ngay trước khi chuyển trang: chờ thêm graceMs
+        graceTimer = setTimeout(function () { if (!found()) finish('reenabled'); else check(); }, graceMs);
+    }
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(function () {
+        if (finished) return;
+        if (inflight() > 0 || (button && button.disabled)) return;
+        if (!found()) finish('settled'); else check();
+    }, quietMs);
+}
+
+var button = submit && first(submit);
+if (!found() && button && button.form && !button.form.noValidate && !button.form.checkValidity()) {
+    finish('invalid', button.form.querySelector(':invalid') ? button.form.querySelector(':invalid').name || null : null);
+} else {
+    observer = new MutationObserver(check);
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, characterData: true, attributes: true,
+        attributeFilter: ['class', 'disabled', 'hidden', 'style']
+    });
+    window.addEventListener('popstate', check);
+    window.addEventListener('__netTrackerFinished', check);
+    timers.push(setTimeout(function () { finish('timeout'); }, timeoutMs));
+    check();
+}
+"""
+
+# Đợi DOM ngừng thay đổi trong quietMs (bỏ qua thay đổi style như progress bar của video)
+DOM_STABLE_JS = """
+var quietMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+var start = Date.now(), last = Date.now();
+var observer = new MutationObserver(function () { last = Date.now(); });
+observer.observe(document.documentElement, {
+    childList: true, subtree: true, characterData: true,
+    attributes: true, attributeFilter: ['class', 'disabled', 'hidden', 'value', 'aria-pressed', 'aria-expanded']
+});
+var timer = setInterval(function () {
+    var now = Date.now();
+    if (now - last >= quietMs || now - start >= timeoutMs) {
+        clearInterval(timer);
+        observer.disconnect();
+        done(now - last >= quietMs);
+    }
+}, 50);
+"""
+
+# Đếm request fetch/XHR đang chạy của app (axios dùng XHR); inject một lần cho mỗi document
+NETWORK_TRACKER_JS = """
+(function () {
+    if (window.__netTracker) return;
+    var tracker = window.__netTracker = {inflight: 0, lastActivity: Date.now(), seq: 0, done: []};
+    function started() {
+        tracker.inflight++;
+        tracker.lastActivity = Date.now();
+    }
+    function finished(method, url, status) {
+        tracker.inflight = Math.max(0, tracker.inflight - 1);
+        tracker.lastActivity = Date.now();
+        var path;
+        try { path = new URL(url, location.href).pathname; } catch (e) { path = String(url); }
+        tracker.done.push({seq: ++tracker.seq, method: method, path: path, status: status});
+        if (tracker.done.length > 200) tracker.done.shift();
+        // Cho các observer trong trang (SETTLE_JS) biết có request vừa xong mà không cần polling
+        window.dispatchEvent(new Event('__netTrackerFinished'));
+    }
+
+    var open = XMLHttpRequest.prototype.open, send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__netRequest = [String(method).toUpperCase(), String(url)];
+        return open.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.send = function () {
+        var xhr = this, request = xhr.__netRequest || ['GET', ''];
+        started();
+        xhr.addEventListener('loadend', function () { finished(request[0], request[1], xhr.status); });
+        return send.apply(this, arguments);
+    };
+
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function (input, init) {
+            var method = String((init && init.method) || (input && input.method) || 'GET').toUpperCase();
+            var url = typeof input === 'string' ? input : (input && input.url) || String(input);
+            started();
+            return originalFetch.apply(this, arguments).then(function (response) {
+                finished(method, url, response.status);
+                return response;
+            }, function (error) {
+                finished(method, url, 0);
+                throw error;
+            });
+        };
+    }
+})();
+"""
+
+# [số request đang chạy, số ms kể từ lần request bắt đầu/kết thúc gần nhất] hoặc null
+NETWORK_STATE_JS = "var t = window.__netTracker; return t ? [t.inflight, Date.now() - t.lastActivity] : null;"
+
+# Request đã xong đầu tiên sau mốc seq khớp method + path (path chứa chuỗi cần tìm)
+FIND_REQUEST_JS = """
+var t = window.__netTracker, methods = arguments[0], pathPart = arguments[1], since = arguments[2];
+if (!t) return null;
+for (var i = 0; i < t.done.length; i++) {
+    var r = t.done[i];
+    if (r.seq > since && (!methods || methods.indexOf(r.method) !== -1) && r.path.indexOf(pathPart) !== -1) return r;
+}
+return null;
+"""
+
 class BasePage:
+    # Phần tử được chụp thay cho cả trang khi Config.SCREENSHOT_ELEMENT_CROP (page object con khai báo)
+    SCREENSHOT_ELEMENT = None
+
     def __init__(self, driver):
         self.driver = driver
-        self.wait = WebDriverWait(driver, 20)
+        self.wait = ExplicitWait(driver, 20)
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Mỗi lời gọi method public của page object có budget explicit riêng (tests/utils/wait_policy.py)
+        wait_policy.budget_page_methods(cls)
+    
+    def open(self, url):
+        """Mở URL; số liệu tải trang (Web Vitals) của trang đang mở được ghi lại trước khi rời đi"""
+        web_vitals.collect(self.driver)
+        self.driver.get(url)
+        return self
     
     def find_element(self, by, value, timeout=20):
         """Tìm element với wait"""
-        return WebDriverWait(self.driver, timeout).until(
+        return ExplicitWait(self.driver, timeout).until(
             EC.presence_of_element_located((by, value))
         )
     
     def click_element(self, by, value, timeout=20):
         """Click element với wait"""
-        element = WebDriverWait(self.driver, timeout).until(
+        element = ExplicitWait(self.driver, timeout).until(
             EC.element_to_be_clickable((by, value))
         )
         element.click()
@@ -31,43 +329,276 @@ class BasePage:
         element.send_keys(text)
         return element
     
+    def fill_form(self, fields, keystrokes=(), timeout=20):
+        """
+        Điền form {locator: value} bằng một lệnh execute_script (đợi tới khi đủ field, tối đa timeout).
+        Field trong keystrokes vẫn được gõ từng phím bằng send_keys (sau các field khác, theo thứ tự của fields)
+        khi hành vi bàn phím là thứ đang được test (maxlength, xử lý phím...).
+        """
+        scripted = [[list(locator), value] for locator, value in fields.items() if locator not in keystrokes]
+        if scripted:
+            self.wait_until(
+                lambda driver: not driver.execute_script(FILL_FORM_JS, scripted),
+                "form_fields", timeout,
+            )
+        for locator, value in fields.items():
+            if locator in keystrokes:
+                self.input_text(*locator, value)
+        return self
+    
     def wait_for_url_contains(self, url_part, timeout=20):
         """Đợi URL chứa chuỗi nào đó"""
-        return WebDriverWait(self.driver, timeout).until(
+        return ExplicitWait(self.driver, timeout).until(
             EC.url_contains(url_part)
         )
     
     def is_element_present(self, by, value, timeout=5):
-        """Kiểm tra element có tồn tại không"""
+        """
+        Kiểm tra element có tồn tại không (đợi tới timeout: element có thể render sau một request chậm).
+        Assert phủ định ("element không xuất hiện") dùng stays_absent.
+        """
         try:
-            WebDriverWait(self.driver, timeout).until(
+            ExplicitWait(self.driver, timeout).until(
                 EC.presence_of_element_located((by, value))
             )
             return True
         except TimeoutException:
             return False
     
+    def wait_for_outcome(self, url_parts=(), target=None, errors=(), submit=None, since=None, timeout=5):
+        """
+        Đợi điều mong đợi (URL chứa một trong url_parts hoặc element target xuất hiện) hoặc trạng thái cuối
+        chứng tỏ nó sẽ không xảy ra, bằng observer trong trang (SETTLE_JS, không polling).
+        Args:
+            errors: locator của thông báo lỗi (hiển thị + có text = trạng thái cuối)
+            submit: locator nút submit (form không hợp lệ, nút enable lại sau khi submit = trạng thái cuối)
+            since: mốc network_mark() trước khi submit (request lỗi sau mốc = trạng thái cuối)
+        Trả về (state, detail): found, invalid, error, request_failed, reenabled, settled hoặc timeout.
+        """
+        start = time.perf_counter()
+        timeout = wait_policy.cap(timeout)
+        with phase_timer.phase("explicit_wait"):
+            state, detail = self.driver.execute_async_script(
+                SETTLE_JS,
+                list(url_parts),
+                list(target) if target else None,
+                [list(error) for error in errors],
+                list(submit) if submit else None,
+                since,
+                Config.SETTLE_QUIET_MS,
+                Config.SETTLE_GRACE_MS,
+                int(timeout * 1000),
+            )
+        wait_recorder.record(f"outcome_{state}", time.perf_counter() - start, satisfied=state != "timeout")
+        return state, detail
+    
+    def stays_absent(self, url_parts=(), target=None, **terminal):
+        """Assert phủ định nhanh: True nếu trang đạt trạng thái cuối (hoặc hết timeout) mà điều mong đợi không xảy ra"""
+        state, detail = self.wait_for_outcome(url_parts, target, **terminal)
+        if state != "found":
+            print(f"  → Settled as {state}" + (f": {detail}" if detail else ""))
+        return state != "found"
+    
     def scroll_to_element(self, element):
         """Scroll đến element"""
         self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-        time.sleep(0.5)
+        self.wait_for_element_state(element, "in_viewport", timeout=2, required=False, replaces=0.5)
+    
+    # ========== WAIT THEO ĐIỀU KIỆN (thay cho time.sleep cố định) ==========
+    
+    def wait_until(self, condition, name="condition", timeout=None, replaces=None, required=True, poll=0.1):
+        """
+        Đợi condition(driver) trả về giá trị truthy và ghi lại thời gian thực tế.
+        Args:
+            name: tên điều kiện (dùng trong thống kê cuối session)
+            replaces: số giây time.sleep mà wait này thay thế (để tính thời gian tiết kiệm)
+            required: False → hết timeout thì trả về False thay vì raise TimeoutException
+        """
+        start = time.perf_counter()
+        satisfied = False
+        try:
+            result = ExplicitWait(self.driver, timeout or 20, poll_frequency=poll).until(condition)
+            satisfied = True
+            return result
+        except TimeoutException:
+            if required:
+                raise
+            return False
+        finally:
+            wait_recorder.record(name, time.perf_counter() - start, replaces, satisfied)
+    
+    def wait_for_dom_stable(self, quiet_ms=300, timeout=5, replaces=None):
+        """Đợi DOM ngừng thay đổi trong quiet_ms (không raise khi hết timeout)"""
+        start = time.perf_counter()
+        timeout = wait_policy.cap(timeout)
+        with phase_timer.phase("explicit_wait"):
+            satisfied = self.driver.execute_async_script(DOM_STABLE_JS, quiet_ms, int(timeout * 1000))
+        wait_recorder.record("dom_stable", time.perf_counter() - start, replaces, satisfied)
+        return satisfied
+    
+    def get_element_state(self, target):
+        """Trạng thái element trong một lần gọi JS; target là locator (By, value) hoặc WebElement"""
+        if isinstance(target, WebElement):
+            return self.driver.execute_script(ELEMENT_STATE_JS, target, None, None)
+        return self.driver.execute_script(ELEMENT_STATE_JS, None, *target)
+    
+    def snapshot(self, locator, root=None):
+        """
+        Dữ liệu của mọi element khớp locator (trong root nếu có) bằng một lệnh execute_script.
+        Mỗi phần tử là dict: element (WebElement để thao tác), index, tag, text (như WebElement.text),
+        classes, aria_label, visible, enabled, in_viewport. Page object lọc bằng Python
+        thay vì đọc .text / thuộc tính của từng element (mỗi lần đọc là một request WebDriver).
+        """
+        elements = self.driver.execute_script(SNAPSHOT_JS, *locator, root)
+        # Mỗi element ít nhất một lệnh đọc nếu không dùng snapshot
+        phase_timer.count_saved_commands(len(elements))
+        return elements
+    
+    def locate(self, name, state="present", timeout=None):
+        """
+        Tìm element logic khai báo trong locator_registry: mọi strategy được đánh giá trong một lệnh JS,
+        strategy thắng lần trước được ưu tiên. timeout → đợi tới khi có strategy khớp.
+        Trả về list dict {element, text} của strategy thắng (rỗng nếu không strategy nào khớp).
+        """
+        strategies = [list(strategy) for strategy in locator_registry.strategies(name)]
+        order = locator_registry.order(name)
+        
+        def attempt(driver):
+            result = driver.execute_script(LOCATE_JS, strategies, order, state)
+            return result if result[0] >= 0 else False
+        
+        if timeout:
+            result = self.wait_until(attempt, f"locate_{state}", timeout, required=False)
+        else:
+            result = attempt(self.driver)
+        winner, matched, found = result or (-1, [], [])
+        locator_registry.record(name, winner, matched)
+        return [{"element": element, "text": text} for element, text in found]
+    
+    def wait_for_element_state(self, target, state="visible", timeout=10, replaces=None, required=True):
+        """
+        Đợi element đạt trạng thái: present, visible, clickable, in_viewport, invisible, absent.
+        Trả về element (hoặc True với invisible/absent).
+        """
+        checks = {
+            "present": lambda s: s is not None,
+            "visible": lambda s: s is not None and s[1],
+            "clickable": lambda s: s is not None and s[1] and s[2],
+            "in_viewport": lambda s: s is not None and s[3],
+            "invisible": lambda s: s is None or not s[1],
+            "absent": lambda s: s is None,
+        }
+        check = checks[state]
+        
+        def condition(driver):
+            element_state = self.get_element_state(target)
+            if not check(element_state):
+                return False
+            return element_state[0] if element_state is not None else True
+        
+        return self.wait_until(condition, f"element_{state}", timeout, replaces, required)
+    
+    def wait_for_url_change(self, old_url, timeout=10, replaces=None, required=True):
+        """Đợi URL khác old_url"""
+        return self.wait_until(
+            lambda d: d.current_url if d.current_url != old_url else False,
+            "url_change", timeout, replaces, required
+        )
+    
+    def count_elements(self, by, value):
+        """Đếm element bằng JS (không bị implicit wait chặn khi không có element nào)"""
+        return self.driver.execute_script(FIND_ALL_JS + "return findAll(arguments[0], arguments[1]).length;", by, value)
+    
+    def wait_for_count_change(self, locator, old_count, timeout=10, replaces=None, required=True):
+        """Đợi số element khớp locator khác old_count; trả về số mới"""
+        def condition(driver):
+            count = self.count_elements(*locator)
+            # count mới có thể là 0 → bọc trong list để ExplicitWait coi là truthy
+            return [count] if count != old_count else False
+        
+        result = self.wait_until(condition, "count_change", timeout, replaces, required)
+        return result[0] if result else result
+    
+    # ========== NETWORK (request fetch/XHR của app) ==========
+    
+    def install_network_tracker(self):
+        """Inject bộ đếm request vào trang hiện tại và mọi trang mở sau đó (gỡ khi reset browser)"""
+        identifier = getattr(self.driver, "_network_tracker_id", None)
+        if identifier not in getattr(self.driver, "_new_document_scripts", []):
+            self.driver._network_tracker_id = add_new_document_script(self.driver, NETWORK_TRACKER_JS)
+        self.driver.execute_script(NETWORK_TRACKER_JS)
+    
+    def network_mark(self):
+        """Mốc hiện tại của bộ đếm request; gọi trước thao tác rồi truyền vào wait_for_request(since=...)"""
+        self.install_network_tracker()
+        return self.driver.execute_script("return window.__netTracker.seq;")
+    
+    def wait_for_network_idle(self, quiet_ms=500, timeout=10, replaces=None, required=False):
+        """Đợi không còn request nào đang chạy và không có request mới trong quiet_ms"""
+        self.install_network_tracker()
+        
+        def condition(driver):
+            state = driver.execute_script(NETWORK_STATE_JS)
+            if state is None:
+                # Trang mới chưa có tracker (vd. about:blank) → inject lại
+                driver.execute_script(NETWORK_TRACKER_JS)
+                return False
+            return state[0] == 0 and state[1] >= quiet_ms
+        
+        return self.wait_until(condition, "network_idle", timeout, replaces, required)
+    
+    def wait_for_request(self, method, path_part, since=0, timeout=10, replaces=None, required=True):
+        """
+        Đợi request tới endpoint trả về, vd. wait_for_request("POST", "/api/v1/social/likes/", since=mark).
+        Args:
+            method: "POST", tuple các method, hoặc None (mọi method)
+            path_part: chuỗi nằm trong path của request
+            since: mốc lấy từ network_mark() trước thao tác (tránh khớp request cũ)
+        Returns: dict {method, path, status} của request, hoặc False nếu hết timeout và required=False
+        """
+        methods = [method] if isinstance(method, str) else (list(method) if method else None)
+        return self.wait_until(
+            lambda d: d.execute_script(FIND_REQUEST_JS, methods, path_part, since),
+            f"request {'/'.join(methods) if methods else '*'} {path_part}", timeout, replaces, required
+        )
     
     def get_current_url(self):
         """Lấy URL hiện tại"""
         return self.driver.current_url
 
-    def take_screenshot(self, name: str):
-        """Chụp ảnh màn hình vào thư mục screenshots với tên kèm timestamp"""
-        from tests.config import Config
-        import os
-        import datetime
-        # Ensure directories exist
-        Config.ensure_directories()
-        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    def _screenshot_element(self, element=None):
+        """WebElement cần chụp (locator / WebElement / SCREENSHOT_ELEMENT khi bật crop); None = cả trang"""
+        if element is None and Config.SCREENSHOT_ELEMENT_CROP:
+            element = self.SCREENSHOT_ELEMENT
+        if element is None or isinstance(element, WebElement):
+            return element
+        by, value = element
+        if by == By.CSS_SELECTOR:
+            # querySelector: không bị implicit wait khi phần tử không có trên trang
+            return self.driver.execute_script("return document.querySelector(arguments[0]);", value)
+        found = self.driver.find_elements(by, value)
+        return found[0] if found else None
+
+    def take_screenshot(self, name: str, element=None):
+        """
+        Chụp ảnh màn hình theo Config.SCREENSHOT_POLICY; thread nền ghi vào screenshot store.
+        element (locator / WebElement): chỉ chụp phần tử đó, browser crop sẵn nên không encode cả trang.
+        """
         safe_name = name.replace(" ", "_")
-        path = os.path.join(Config.SCREENSHOT_DIR, f"{safe_name}_{ts}.png")
+        if not screenshot_store.wants_capture():
+            return
         try:
-            self.driver.save_screenshot(path)
-            print(f"🖼  Saved screenshot: {path}")
+            with phase_timer.phase("screenshot"):
+                target = self._screenshot_element(element)
+                if target is not None:
+                    capture, masks = target.screenshot_as_base64, None
+                else:
+                    capture = self.driver.get_screenshot_as_base64()
+                    masks = visual_diff.mask_regions(self.driver) if visual_diff.enabled else None
+            screenshot_store.capture_step(capture, safe_name, masks=masks)
+            print(f"🖼  Captured screenshot: {safe_name}{' (element)' if target is not None else ''}")
         except Exception as e:
-            print(f"⚠️  Could not save screenshot '{name}': {e}")
\ No newline at end of file
+            print(f"⚠️  Could not save screenshot '{name}': {e}")
+
+
+wait_policy.budget_page_methods(BasePage)
@@ -8,20 +8,24 @@ class LoginPage(BasePage):
     PASSWORD_INPUT = (By.CSS_SELECTOR, "input[type='password']")
     LOGIN_BUTTON = (By.CSS_SELECTOR, "button[type='submit']")
     ERROR_MESSAGE = (By.CSS_SELECTOR, ".text-red-400")
+    # Lỗi validation dưới từng field (FormInput)
+    FIELD_ERROR = (By.CSS_SELECTOR, "p.text-red-500, p.text-red-400")
     
     def __init__(self, driver):
         super().__init__(driver)
         self.url = f"{Config.BASE_URL}/auth/login"
+        self.submit_mark = None
     
     def navigate(self):
         """Điều hướng đến trang login"""
-        self.driver.get(self.url)
+        self.open(self.url)
         return self
     
     def login(self, email, password):
         """Thực hiện đăng nhập"""
-        self.input_text(*self.EMAIL_INPUT, email)
-        self.input_text(*self.PASSWORD_INPUT, password)
+        self.fill_form({self.EMAIL_INPUT: email, self.PASSWORD_INPUT: password})
+        # Mốc request trước khi submit để is_login_successful nhận ra request login bị lỗi
+        self.submit_mark = self.network_mark()
         self.click_element(*self.LOGIN_BUTTON)
         return self
     
@@ -30,9 +34,11 @@ class LoginPage(BasePage):
         return self.is_element_present(*self.ERROR_MESSAGE)
     
     def is_login_successful(self):
-        """Kiểm tra đăng nhập thành công (chuyển về /home)"""
-        try:
-            self.wait_for_url_contains("/home", timeout=3)
-            return True
-        except:
-            return False
\ No newline at end of file
+        """
+        Kiểm tra đăng nhập thành công (chuyển về /home). Trường hợp thất bại trả lời ngay khi form không hợp lệ,
+        có lỗi validation, request login lỗi hoặc nút đăng nhập enable lại, thay vì đợi hết 3s.
+        """
+        return not self.stays_absent(
+            url_parts=("/home",), errors=(self.FIELD_ERROR,), submit=self.LOGIN_BUTTON,
+            since=self.submit_mark, timeout=3,
+        )
\ No newline at end of file
@@ -1,6 +1,7 @@
 from selenium.webdriver.common.by import By
 from tests.pages.base_page import BasePage
 from tests.config import Config
+from tests.utils import locator_registry
 
 class RegisterPage(BasePage):
     # Locators
@@ -11,23 +12,37 @@ class RegisterPage(BasePage):
     CONFIRM_PASSWORD_INPUT = (By.NAME, "confirmPassword")
     REGISTER_BUTTON = (By.CSS_SELECTOR, "button[type='submit']")
     ERROR_MESSAGE = (By.CSS_SELECTOR, ".text-red-500")  # Fixed: text-red-500 instead of text-red-400
+    # Lỗi validation dưới từng field (FormInput); dấu * của field bắt buộc cũng là .text-red-500 nên cần tag p
+    FIELD_ERROR = (By.CSS_SELECTOR, "p.text-red-500")
+    # Thông báo lỗi: class text-red-500, text chứa từ khóa lỗi, hoặc paragraph màu đỏ
+    ERROR = locator_registry.register(
+        "RegisterPage.error",
+        ERROR_MESSAGE,
+        (By.XPATH, "//*[contains(@class, 'text-red') or contains(text(), 'không được') or contains(text(), 'phải có')]"),
+        (By.CSS_SELECTOR, "p[class*='red']"),
+    )
     
     def __init__(self, driver):
         super().__init__(driver)
         self.url = f"{Config.BASE_URL}/auth/register"
+        self.submit_mark = None
     
     def navigate(self):
         """Điều hướng đến trang register"""
-        self.driver.get(self.url)
+        self.open(self.url)
         return self
     
-    def register(self, email, username, fullname, password):
-        """Thực hiện đăng ký"""
-        self.input_text(*self.EMAIL_INPUT, email)
-        self.input_text(*self.USERNAME_INPUT, username)
-        self.input_text(*self.FULLNAME_INPUT, fullname)
-        self.input_text(*self.PASSWORD_INPUT, password)
-        self.input_text(*self.CONFIRM_PASSWORD_INPUT, password)
+    def register(self, email, username, fullname, password, keystrokes=()):
+        """Thực hiện đăng ký; keystrokes: các field gõ từng phím thay vì điền bằng JS (xem BasePage.fill_form)"""
+        self.fill_form({
+            self.EMAIL_INPUT: email,
+            self.USERNAME_INPUT: username,
+            self.FULLNAME_INPUT: fullname,
+            self.PASSWORD_INPUT: password,
+            self.CONFIRM_PASSWORD_INPUT: password,
+        }, keystrokes=keystrokes)
+        # Mốc request trước khi submit để is_register_successful nhận ra request đăng ký bị lỗi
+        self.submit_mark = self.network_mark()
         self.click_element(*self.REGISTER_BUTTON)
         return self
     
@@ -69,49 +84,27 @@ class RegisterPage(BasePage):
         return self
     
     def is_register_successful(self):
-        """Kiểm tra đăng ký thành công (chuyển về /login hoặc /home)"""
-        try:
-            self.wait_for_url_contains("/home", timeout=3)
-            return True
-        except:
-            try:
-                self.wait_for_url_contains("/login", timeout=2)
-                return True
-            except:
-                return False
+        """
+        Kiểm tra đăng ký thành công (chuyển về /login hoặc /home). Trường hợp thất bại trả lời ngay khi trang
+        đạt trạng thái cuối (form không hợp lệ, lỗi validation, request lỗi, nút enable lại) thay vì đợi 3s + 2s.
+        """
+        return not self.stays_absent(
+            url_parts=("/home", "/login"), errors=(self.FIELD_ERROR,), submit=self.REGISTER_BUTTON,
+            since=self.submit_mark, timeout=5,
+        )
     
     def is_error_displayed(self):
         """Kiểm tra có lỗi hiển thị không"""
-        import time
-        time.sleep(0.5)  # Đợi React render
+        self.wait_for_dom_stable(quiet_ms=200, timeout=2, replaces=0.5)  # Đợi React render
         
         try:
-            # Thử nhiều cách tìm error messages
-            # Cách 1: Tìm theo class text-red-500
-            errors = self.driver.find_elements(By.CSS_SELECTOR, ".text-red-500")
-            
-            # Cách 2: Tìm theo text chứa từ khóa lỗi
-            if not errors:
-                errors = self.driver.find_elements(By.XPATH, "//*[contains(@class, 'text-red') or contains(text(), 'không được') or contains(text(), 'phải có')]")
-            
-            # Cách 3: Tìm các paragraph có màu đỏ
-            if not errors:
-                errors = self.driver.find_elements(By.CSS_SELECTOR, "p[class*='red']")
-            
+            # Mọi strategy tìm lỗi được thử trong một lệnh, chỉ lấy lỗi đang hiển thị và có text
+            errors = self.locate(self.ERROR, state="visible_text")
             if errors:
-                for err in errors:
-                    try:
-                        if err.is_displayed() and err.text.strip():
-                            print(f"  → Error found: {err.text}")
-                            return True
-                    except:
-                        continue
-                print(f"  → Found {len(errors)} error elements but none visible/with text")
-                return False
-            else:
-                print("  → No error elements found")
-                return False
-                
+                print(f"  → Error found: {errors[0]['text']}")
+                return True
+            print("  → No visible error found")
+            return False
         except Exception as e:
             print(f"  → Exception: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -1,9 +1,9 @@
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from tests.pages.base_page import BasePage
 from tests.config import Config
-import time
+from tests.utils.wait_policy import ExplicitWait
+from tests.utils import locator_registry
 
 class UploadPage(BasePage):
     # Locators - Updated to match current UI
@@ -15,6 +15,11 @@ class UploadPage(BasePage):
     SUBMIT_BUTTON = (By.CSS_SELECTOR, "button[type='submit']")
     ERROR_MESSAGE = (By.CSS_SELECTOR, ".text-red-500")
     WARNING_MESSAGE = (By.CSS_SELECTOR, ".text-yellow-500")
+    UPLOAD_FORM = (By.CSS_SELECTOR, "form")
+    # Cảnh báo: text vàng, hoặc lỗi đỏ khi app hiển thị cảnh báo dạng lỗi
+    WARNING = locator_registry.register("UploadPage.warning", WARNING_MESSAGE, ERROR_MESSAGE)
+    ERROR = locator_registry.register("UploadPage.error", ERROR_MESSAGE)
+    SCREENSHOT_ELEMENT = UPLOAD_FORM
     
     def __init__(self, driver):
         super().__init__(driver)
@@ -22,8 +27,8 @@ class UploadPage(BasePage):
     
     def navigate(self):
         """Điều hướng đến trang upload"""
-        self.driver.get(self.url)
-        time.sleep(1)
+        self.open(self.url)
+        self.wait_for_element_state(self.FILE_INPUT, "present", timeout=20, replaces=1)
         return self
     
     def upload_video_quick(self, video_path, title, description="", visibility="public"):
@@ -38,7 +43,7 @@ class UploadPage(BasePage):
         # Upload file
         file_input = self.find_element(*self.FILE_INPUT)
         file_input.send_keys(video_path)
-        time.sleep(1.5)
+        self.wait_for_dom_stable(replaces=1.5)
         
         # Fill title
         title_input = self.find_element(*self.TITLE_INPUT)
@@ -56,14 +61,13 @@ class UploadPage(BasePage):
             try:
                 select = self.find_element(*self.VISIBILITY_SELECT)
                 select.click()
-                time.sleep(0.2)
                 option = self.driver.find_element(By.CSS_SELECTOR, f"option[value='{visibility}']")
                 option.click()
-                time.sleep(0.2)
             except:
                 pass
         
-        # Submit
+        # Submit (cài tracker để wait_for_profile_redirect đợi được request của trang profile)
+        self.install_network_tracker()
         submit_btn = self.find_element(*self.SUBMIT_BUTTON)
         submit_btn.click()
         
@@ -101,16 +105,16 @@ class UploadPage(BasePage):
             input.blur();
         """, element, text)
         
-        time.sleep(0.3)
+        self.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         return self
     
     def wait_for_profile_redirect(self, timeout=20):
         """Đợi redirect về trang profile sau khi upload"""
         try:
-            WebDriverWait(self.driver, timeout).until(
+            ExplicitWait(self.driver, timeout).until(
                 lambda d: "/user/" in d.current_url
             )
-            time.sleep(1)
+            self.wait_for_network_idle(replaces=1)
             return True
         except:
             return False
@@ -118,7 +122,7 @@ class UploadPage(BasePage):
     def is_upload_successful(self):
         """Kiểm tra upload thành công bằng cách check URL"""
         try:
-            WebDriverWait(self.driver, 20).until(
+            ExplicitWait(self.driver, 20).until(
                 lambda d: "/user/" in d.current_url or "/home" in d.current_url
             )
             return True
@@ -127,11 +131,11 @@ class UploadPage(BasePage):
     
     def is_error_displayed(self):
         """Kiểm tra có lỗi hiển thị không"""
-        return self.is_element_present(*self.ERROR_MESSAGE)
+        return bool(self.locate(self.ERROR, timeout=5))
     
     def is_warning_displayed(self):
-        """Kiểm tra có cảnh báo hiển thị không"""
-        return self.is_element_present(*self.WARNING_MESSAGE) or self.is_element_present(*self.ERROR_MESSAGE)
+        """Kiểm tra có cảnh báo hiển thị không (cảnh báo hoặc lỗi, đợi chung một timeout)"""
+        return bool(self.locate(self.WARNING, timeout=5))
     
     def is_submit_disabled(self):
         """Kiểm tra nút submit có bị disable không"""
@@ -1,10 +1,8 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from tests.pages.base_page import BasePage
 from tests.config import Config
-import time
 
 class VideoPage(BasePage):
     # Locators - Video Actions
@@ -20,23 +18,45 @@ class VideoPage(BasePage):
     # Liked state
     LIKED_ICON = (By.CSS_SELECTOR, "svg.fill-[\\#FE2C55]")
     
+    # Thanh action (like, comment, share, bookmark) của video đầu tiên
+    ACTION_BAR = (By.CSS_SELECTOR, "div.flex.flex-col.gap-3")
+    VIDEO = (By.CSS_SELECTOR, "video")
+    
+    # Follow / unfollow: button nhận diện theo text
+    BUTTON = (By.CSS_SELECTOR, "button")
+    FOLLOW_LABELS = ("+", "Theo dõi", "Follow")
+    UNFOLLOW_LABELS = ("✓", "Đang theo dõi", "Following")
+    SCREENSHOT_ELEMENT = ACTION_BAR
+    
     def __init__(self, driver):
         super().__init__(driver)
     
     def navigate_to_video(self, video_id):
         """Điều hướng đến video detail"""
-        self.driver.get(f"{Config.BASE_URL}/video/{video_id}")
-        time.sleep(2)
+        self.open(f"{Config.BASE_URL}/video/{video_id}")
+        self.wait_until_ready(replaces=2)
         return self
     
+    def wait_until_ready(self, replaces=None):
+        """Đợi thanh action của video render xong và DOM ổn định"""
+        self.wait_for_element_state(self.ACTION_BAR, "present", timeout=20, required=False)
+        return self.wait_for_dom_stable(replaces=replaces)
+    
+    def _is_like_active(self):
+        """Trạng thái like của video đầu tiên (một lần gọi JS, không bị implicit wait chặn)"""
+        return self.driver.execute_script("""
+            var bar = document.querySelector('div.flex.flex-col.gap-3');
+            var button = bar && bar.querySelector('button');
+            return !!(button && button.querySelector('div.bg-\\\\[\\\\#FE2C55\\\\]\\\\/90'));
+        """)
+    
     def click_like(self):
         """Click nút like - button đầu tiên trong div.flex.flex-col"""
         try:
             # Scroll và wait để tái tạo DOM hoàn toàn
             self.driver.execute_script("window.scrollTo(0, 100);");
-            time.sleep(0.2)
             self.driver.execute_script("window.scrollTo(0, 0);");
-            time.sleep(0.5)
+            self.wait_for_dom_stable(quiet_ms=150, replaces=0.7)
             
             # Tìm lại container và button hoàn toàn mới
             containers = self.driver.find_elements(By.CSS_SELECTOR, "div.flex.flex-col.gap-3")
@@ -49,10 +69,16 @@ class VideoPage(BasePage):
                 return False
             
             like_button = buttons[0]
+            was_liked = self._is_like_active()
+            mark = self.network_mark()
             
             # Click bằng JavaScript để tránh lỗi
             self.driver.execute_script("arguments[0].click();", like_button)
-            time.sleep(0.7)
+            # Đợi backend trả về (POST like / DELETE unlike) rồi đợi icon đổi trạng thái
+            self.wait_for_request(("POST", "DELETE"), "/api/v1/social/likes/", since=mark,
+                                  timeout=10, replaces=0.7, required=False)
+            self.wait_until(lambda d: self._is_like_active() != was_liked, "like_toggled",
+                            timeout=5, required=False)
             return True
         except Exception as e:
             print(f"Error clicking like: {e}")
@@ -61,23 +87,8 @@ class VideoPage(BasePage):
     def is_video_liked(self):
         """Kiểm tra video đã được like chưa"""
         try:
-            # Đợi một chút để UI update
-            time.sleep(0.3)
-            
-            # Tìm lại elements mới để tránh stale
-            containers = self.driver.find_elements(By.CSS_SELECTOR, "div.flex.flex-col.gap-3")
-            if not containers:
-                return False
-                
-            action_container = containers[0]
-            buttons = action_container.find_elements(By.CSS_SELECTOR, "button")
-            if not buttons:
-                return False
-                
-            like_button = buttons[0]
-            # Kiểm tra div bên trong có class bg-[#FE2C55]/90 không
-            liked_div = like_button.find_elements(By.CSS_SELECTOR, "div.bg-\\[\\#FE2C55\\]\\/90")
-            return len(liked_div) > 0
+            # click_like đã đợi UI cập nhật; kiểm tra div trong nút like có class bg-[#FE2C55]/90 không
+            return self._is_like_active()
         except Exception as e:
             print(f"Error checking liked status: {e}")
             return False
@@ -91,28 +102,33 @@ class VideoPage(BasePage):
             
             # Scroll to top để tránh stale
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(0.3)
             
             # Click nút comment (button thứ 2)
             action_container = self.wait.until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "div.flex.flex-col.gap-3"))
             )
-            comment_button = action_container.find_element(By.CSS_SELECTOR, "button:nth-child(2)")
+            # find_elements: container đã có, thiếu button thì trả lời ngay thay vì đợi hết budget
+            buttons = action_container.find_elements(By.CSS_SELECTOR, "button:nth-child(2)")
+            if not buttons:
+                print("Error: action button 2 not found")
+                return False
+            comment_button = buttons[0]
             self.driver.execute_script("arguments[0].click();", comment_button)
-            time.sleep(1)
             
             # Tìm input với placeholder
-            comment_input = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='Viết bình luận'], input[placeholder*='bình luận']"))
+            comment_input = self.wait_for_element_state(
+                (By.CSS_SELECTOR, "input[placeholder*='Viết bình luận'], input[placeholder*='bình luận']"),
+                "visible", timeout=20, replaces=1
             )
             comment_input.click()
             comment_input.clear()
             comment_input.send_keys(clean_text)
-            time.sleep(0.3)
             
-            # Nhấn Enter để submit
+            # Nhấn Enter để submit và đợi backend lưu comment
+            mark = self.network_mark()
             comment_input.send_keys(Keys.RETURN)
-            time.sleep(1)
+            self.wait_for_request("POST", "/api/v1/comments/", since=mark,
+                                  timeout=10, replaces=1.3, required=False)
             return True
         except Exception as e:
             print(f"Error adding comment: {e}")
@@ -122,51 +138,58 @@ class VideoPage(BasePage):
         """Click bookmark - button thứ 4 và đợi navigate đến /bookmarks"""
         try:
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(0.3)
             
             action_container = self.wait.until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "div.flex.flex-col.gap-3"))
             )
-            bookmark_button = action_container.find_element(By.CSS_SELECTOR, "button:nth-child(4)")
+            # find_elements: container đã có, thiếu button thì trả lời ngay thay vì đợi hết budget
+            buttons = action_container.find_elements(By.CSS_SELECTOR, "button:nth-child(4)")
+            if not buttons:
+                print("Error: action button 4 not found")
+                return False
+            bookmark_button = buttons[0]
+            # Cài tracker trước khi click để đợi được request của trang /bookmarks
+            self.install_network_tracker()
             self.driver.execute_script("arguments[0].click();", bookmark_button)
-            time.sleep(0.5)
             
             # Đợi frontend tự động navigate đến /bookmarks (timeout 5s)
-            try:
-                WebDriverWait(self.driver, 5).until(
-                    lambda d: "/bookmarks" in d.current_url
-                )
-            except:
+            navigated = self.wait_until(lambda d: "/bookmarks" in d.current_url, "url_bookmarks",
+                                        timeout=5, replaces=0.5, required=False)
+            if not navigated:
                 # Nếu không tự navigate thì navigate thủ công
-                self.driver.get(f"{Config.BASE_URL}/bookmarks")
-                time.sleep(1)
+                self.open(f"{Config.BASE_URL}/bookmarks")
+                self.wait_for_network_idle(replaces=1)
             
             return True
         except Exception as e:
             print(f"Error clicking bookmark: {e}")
             return False
     
+    def _find_button(self, labels):
+        """Button đầu tiên có text chứa một trong labels (một snapshot thay vì đọc .text từng button)"""
+        for button in self.snapshot(self.BUTTON):
+            if any(label in button["text"] for label in labels):
+                return button["element"]
+        return None
+    
     def click_follow(self):
         """Click nút follow (+)"""
         try:
             # Scroll to top để tránh stale
             self.driver.execute_script("window.scrollTo(0, 0);");
-            time.sleep(0.5)
             
-            # Tìm nút follow có dấu + (tìm lại mỗi lần để tránh stale)
-            follow_buttons = self.wait.until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "button"))
-            )
-            for btn in follow_buttons:
-                try:
-                    btn_text = btn.text
-                    if "+" in btn_text or "Theo dõi" in btn_text or "Follow" in btn_text:
-                        self.driver.execute_script("arguments[0].click();", btn)
-                        time.sleep(1)
-                        return True
-                except:
-                    continue
-            return False
+            # Đợi các button render rồi tìm nút follow có dấu + trong snapshot
+            self.wait_for_element_state(self.BUTTON, "present", timeout=20)
+            follow_button = self._find_button(self.FOLLOW_LABELS)
+            if follow_button is None:
+                return False
+            mark = self.network_mark()
+            self.driver.execute_script("arguments[0].click();", follow_button)
+            self.wait_for_request("POST", "/api/v1/social/follow/", since=mark,
+                                  timeout=10, replaces=1, required=False)
+            # App tải lại trạng thái follow sau khi mutation xong
+            self.wait_for_network_idle(quiet_ms=150, timeout=5)
+            return True
         except Exception as e:
             print(f"Error clicking follow: {e}")
             return False
@@ -176,22 +199,18 @@ class VideoPage(BasePage):
         try:
             # Scroll to top để tránh stale
             self.driver.execute_script("window.scrollTo(0, 0);");
-            time.sleep(0.5)
             
-            # Tìm nút unfollow có dấu ✓ (tìm lại mỗi lần để tránh stale)
-            unfollow_buttons = self.wait.until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "button"))
-            )
-            for btn in unfollow_buttons:
-                try:
-                    btn_text = btn.text
-                    if "✓" in btn_text or "Đang theo dõi" in btn_text or "Following" in btn_text:
-                        self.driver.execute_script("arguments[0].click();", btn)
-                        time.sleep(1)
-                        return True
-                except:
-                    continue
-            return False
+            # Đợi các button render rồi tìm nút unfollow có dấu ✓ trong snapshot
+            self.wait_for_element_state(self.BUTTON, "present", timeout=20)
+            unfollow_button = self._find_button(self.UNFOLLOW_LABELS)
+            if unfollow_button is None:
+                return False
+            mark = self.network_mark()
+            self.driver.execute_script("arguments[0].click();", unfollow_button)
+            self.wait_for_request("DELETE", "/api/v1/social/unfollow/", since=mark,
+                                  timeout=10, replaces=1, required=False)
+            self.wait_for_network_idle(quiet_ms=150, timeout=5)
+            return True
         except Exception as e:
             print(f"Error clicking unfollow: {e}")
             return False
@@ -199,11 +218,7 @@ class VideoPage(BasePage):
     def is_following(self):
         """Kiểm tra đã follow chưa"""
         try:
-            buttons = self.driver.find_elements(By.CSS_SELECTOR, "button")
-            for btn in buttons:
-                if "✓" in btn.text or "Đang theo dõi" in btn.text or "Following" in btn.text:
-                    return True
-            return False
+            return self._find_button(self.UNFOLLOW_LABELS) is not None
         except:
             return False
     
@@ -211,14 +226,17 @@ class VideoPage(BasePage):
         """Click nút share - button thứ 3 (lucide-share2), copy link và đóng dialog"""
         try:
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(0.3)
             
             action_container = self.wait.until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "div.flex.flex-col.gap-3"))
             )
-            share_button = action_container.find_element(By.CSS_SELECTOR, "button:nth-child(3)")
+            # find_elements: container đã có, thiếu button thì trả lời ngay thay vì đợi hết budget
+            buttons = action_container.find_elements(By.CSS_SELECTOR, "button:nth-child(3)")
+            if not buttons:
+                print("Error: action button 3 not found")
+                return False
+            share_button = buttons[0]
             self.driver.execute_script("arguments[0].click();", share_button)
-            time.sleep(1)
             
             # Click nút copy link trong dialog (button có icon lucide-copy)
             try:
@@ -227,7 +245,7 @@ class VideoPage(BasePage):
                 )
                 parent_button = copy_button.find_element(By.XPATH, "..")
                 self.driver.execute_script("arguments[0].click();", parent_button)
-                time.sleep(0.5)
+                self.wait_for_dom_stable(replaces=0.5)
             except Exception as e:
                 print(f"Warning: Could not click copy button: {e}")
             
@@ -238,13 +256,15 @@ class VideoPage(BasePage):
                 )
                 parent_button = close_button.find_element(By.XPATH, "..")
                 self.driver.execute_script("arguments[0].click();", parent_button)
-                time.sleep(0.3)
+                self.wait_for_element_state((By.CSS_SELECTOR, "button svg.lucide-x"), "absent",
+                                            timeout=3, replaces=0.3, required=False)
             except:
                 # Fallback: nhấn Escape
                 from selenium.webdriver.common.keys import Keys
                 from selenium.webdriver.common.action_chains import ActionChains
                 ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
-                time.sleep(0.3)
+                self.wait_for_element_state((By.CSS_SELECTOR, "button svg.lucide-x"), "absent",
+                                            timeout=3, replaces=0.3, required=False)
             
             return True
         except Exception as e:
@@ -260,11 +280,13 @@ class VideoPage(BasePage):
             return None
     
     def is_comment_button_enabled(self):
-        """Kiểm tra nút gửi comment có enabled không"""
+        """Kiểm tra nút gửi comment có enabled không (chỉ trạng thái hiện tại, không đợi input xuất hiện)"""
         try:
             # Kiểm tra input comment có value không
-            comment_input = self.driver.find_element(By.CSS_SELECTOR, "input[placeholder*='Viết bình luận'], input[placeholder*='bình luận']")
-            input_value = comment_input.get_attribute("value")
+            inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[placeholder*='Viết bình luận'], input[placeholder*='bình luận']")
+            if not inputs:
+                return False
+            input_value = inputs[0].get_attribute("value")
             # Nếu input rỗng thì button sẽ disabled
             return len(input_value) > 0
         except:
@@ -276,26 +298,21 @@ class VideoPage(BasePage):
     
     def navigate_to_home(self):
         """Điều hướng về trang home"""
-        self.driver.get(f"{Config.BASE_URL}/home")
-        time.sleep(2)
+        self.open(f"{Config.BASE_URL}/home")
+        
+        # Đợi video element load
+        video = self.wait_for_element_state(self.VIDEO, "present", timeout=20, replaces=2, required=False)
         
         # Scroll một chút để trigger video load và play
         self.driver.execute_script("window.scrollTo(0, 100);")
-        time.sleep(1)
         self.driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(1)
+        self.wait_for_dom_stable(replaces=2)
         
-        # Đợi video element load
         try:
-            video = self.driver.find_element(By.CSS_SELECTOR, "video")
-            # Scroll đến video để trigger autoplay
-            self.scroll_to_element(video)
-            time.sleep(1)
-            
-            # Nếu video chưa play, click vào để play
-            if video.get_property("paused"):
-                video.click()
-                time.sleep(0.5)
+            if video:
+                # Scroll đến video để trigger autoplay
+                self.scroll_to_element(video)
+                self._play_video(video, replaces=1.5)
         except:
             pass
         
@@ -316,29 +333,31 @@ class VideoPage(BasePage):
         try:
             # Scroll một chút để trigger video detection
             self.driver.execute_script("window.scrollTo(0, 50);")
-            time.sleep(0.5)
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(0.5)
             
             # Tìm và play video
-            video = self.driver.find_element(By.CSS_SELECTOR, "video")
+            video = self.wait_for_element_state(self.VIDEO, "present", timeout=20, replaces=1)
             self.scroll_to_element(video)
-            time.sleep(0.5)
-            
-            # Nếu video chưa play, click để play
-            if video.get_property("paused"):
-                video.click()
-                time.sleep(0.5)
+            self._play_video(video, replaces=1)
         except:
             pass
     
+    def _play_video(self, video, replaces=None):
+        """Nếu video chưa play thì click để play và đợi video chạy"""
+        if video.get_property("paused"):
+            video.click()
+            self.wait_until(lambda d: not video.get_property("paused"), "video_playing",
+                            timeout=3, replaces=replaces, required=False)
+    
     def click_avatar(self):
         """Click vào avatar để đi đến trang profile"""
         try:
             # Tìm avatar: div.w-12.h-12.rounded-full chứa img
-            avatar = self.driver.find_element(By.CSS_SELECTOR, "div.w-12.h-12.rounded-full img")
+            avatar = self.find_element(By.CSS_SELECTOR, "div.w-12.h-12.rounded-full img", timeout=Config.PROBE_TIMEOUT)
+            old_url = self.driver.current_url
             avatar.click()
-            time.sleep(1.5)
+            self.wait_for_url_change(old_url, timeout=5, required=False)
+            self.wait_for_dom_stable(replaces=1.5)
             return True
         except Exception as e:
             print(f"Error clicking avatar: {e}")
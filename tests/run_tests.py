@@ -1,15 +1,103 @@
 import pytest
+import argparse
 import sys
 import os
 
 # Thêm thư mục gốc vào Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-if __name__ == "__main__":
-    # Chạy tất cả tests với báo cáo HTML
-    pytest.main([
+
+def run_all(workers=0, profile=None, self_contained=False):
+    """Chạy tất cả tests với báo cáo HTML"""
+    args = [
         "-v",  # Verbose
-        "--html=tests/report.html",  # Tạo báo cáo HTML
-        "--self-contained-html",  # Báo cáo standalone
-        "tests/",  # Thư mục chứa tests
-    ])
\ No newline at end of file
+        "--html=tests/report.html",  # Tạo báo cáo HTML (screenshot để ngoài, trong tests/assets/)
+    ]
+    if self_contained:
+        args.append("--self-contained-html")  # Báo cáo standalone để gửi đi (nhúng cả screenshot)
+    if workers > 1:
+        # loadscope: các test cùng class/module (I08 → I09 phụ thuộc nhau) chạy trên cùng worker
+        args += ["-n", str(workers), "--dist", "loadscope"]
+    if profile:
+        args += ["--browser-profile", profile]
+    args.append("tests/")  # Thư mục chứa tests
+    pytest.main(args)
+
+
+def refresh_driver():
+    """Tải lại và pin chromedriver cho Chrome đang cài (cần mạng)"""
+    from tests.utils.chromedriver_cache import resolve_chromedriver
+    path = resolve_chromedriver(refresh=True)
+    print(f"✅ Pinned chromedriver: {path}")
+
+
+def live_report(log_path=None, html_path=None, interval=1.0):
+    """Theo dõi results log của lần chạy đang diễn ra và dựng báo cáo live"""
+    from tests.config import Config
+    from tests.utils.live_report import LiveReportRenderer
+    renderer = LiveReportRenderer(log_path or Config.RESULTS_LOG_PATH, html_path or Config.LIVE_REPORT_PATH)
+    print(f"👀 Live report: {renderer.html_path} (Ctrl+C để dừng)")
+    try:
+        finished = renderer.watch(interval)
+        print(f"✅ Session finished (exit status {finished['exitstatus']})")
+    except KeyboardInterrupt:
+        pass
+
+
+def history(runs=20, limit=10, since=None):
+    """In tóm tắt lịch sử chạy: test flaky, test chậm nhất (p95, xu hướng), test chậm đi kể từ commit"""
+    from tests.utils import run_history
+    for line in run_history.summary_lines(runs=runs, limit=limit, since=since):
+        print(line)
+
+
+def screenshots(prune=False, migrate=False, keep_runs=None, max_age_days=None):
+    """Quản lý screenshot store: chuyển screenshot cũ vào store và/hoặc áp dụng retention"""
+    from tests.config import Config
+    from tests.utils import screenshot_store
+    if migrate:
+        count = screenshot_store.migrate_legacy()
+        print(f"✅ Migrated {count} screenshots into {Config.SCREENSHOT_STORE_DIR}")
+    if prune:
+        removed_runs, removed_blobs = screenshot_store.prune(max_age_days=max_age_days, keep_runs=keep_runs)
+        print(f"🧹 Pruned {removed_runs} run manifests, {removed_blobs} unreferenced blobs")
+
+
+if __name__ == "__main__":
+    from tests.config import Config
+    parser = argparse.ArgumentParser(description="Selenium test runner")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run", help="Chạy tất cả tests (mặc định)")
+    run_parser.add_argument("--workers", type=int, default=0, help="Số worker chạy song song (pytest-xdist)")
+    run_parser.add_argument("--profile", choices=sorted(Config.BROWSER_PROFILES), default=None, help="Browser profile (fast = headless tối ưu tốc độ)")
+    run_parser.add_argument("--self-contained", action="store_true", help="Báo cáo một file duy nhất (nhúng screenshot)")
+    subparsers.add_parser("refresh-driver", help="Pin lại chromedriver theo version Chrome hiện tại")
+    live_parser = subparsers.add_parser("live-report", help="Dựng báo cáo live từ results log trong lúc tests đang chạy")
+    live_parser.add_argument("--log", default=None, help="File JSONL (mặc định Config.RESULTS_LOG_PATH)")
+    live_parser.add_argument("--html", default=None, help="File HTML (mặc định Config.LIVE_REPORT_PATH)")
+    live_parser.add_argument("--interval", type=float, default=1.0, help="Số giây giữa hai lần đọc log")
+    history_parser = subparsers.add_parser("history", help="Tóm tắt lịch sử chạy (flaky, chậm nhất, chậm đi kể từ commit)")
+    history_parser.add_argument("--runs", type=int, default=20, help="Số lần chạy gần nhất để phân tích")
+    history_parser.add_argument("--limit", type=int, default=10, help="Số test chậm nhất in ra")
+    history_parser.add_argument("--since", default=None, help="Commit (hoặc prefix) để so test chậm đi kể từ commit đó")
+    screenshots_parser = subparsers.add_parser("screenshots", help="Quản lý screenshot store")
+    screenshots_parser.add_argument("--prune", action="store_true", help="Xóa run cũ và blob không còn được tham chiếu")
+    screenshots_parser.add_argument("--migrate", action="store_true", help="Chuyển screenshot <name>_<timestamp>.png cũ vào store")
+    screenshots_parser.add_argument("--keep-runs", type=int, default=None, help="Số lần chạy giữ lại (mặc định Config.SCREENSHOT_KEEP_RUNS)")
+    screenshots_parser.add_argument("--max-age-days", type=int, default=None, help="Tuổi tối đa của run (mặc định Config.SCREENSHOT_RETENTION_DAYS)")
+    args = parser.parse_args()
+
+    if args.command == "refresh-driver":
+        refresh_driver()
+    elif args.command == "live-report":
+        live_report(log_path=args.log, html_path=args.html, interval=args.interval)
+    elif args.command == "history":
+        history(runs=args.runs, limit=args.limit, since=args.since)
+    elif args.command == "screenshots":
+        screenshots(prune=args.prune, migrate=args.migrate, keep_runs=args.keep_runs, max_age_days=args.max_age_days)
+    else:
+        run_all(
+            workers=getattr(args, "workers", 0),
+            profile=getattr(args, "profile", None),
+            self_contained=getattr(args, "self_contained", False),
+        )
@@ -1,50 +1,8 @@
-import pytest
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from tests.config import Config
 from tests.pages.login_page import LoginPage
 from tests.pages.register_page import RegisterPage
-import time
 
 class TestAuth:
-    @pytest.fixture(scope="function")
-    def driver(self):
-        """Setup và teardown browser"""
-        options = webdriver.ChromeOptions()
-        if Config.HEADLESS:
-            options.add_argument("--headless")
-        options.add_argument("--start-maximized")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        # Disable browser popups/notifications and password manager prompts
-        prefs = {
-            "profile.password_manager_leak_detection": False,
-            "profile.password_manager_enabled": False,
-            "credentials_enable_service": False,
-            "safebrowsing.enabled": False,
-            # Block site notification prompts completely
-            "profile.default_content_setting_values.notifications": 2,
-        }
-        try:
-            options.add_experimental_option("prefs", prefs)
-        except Exception:
-            pass
-        options.add_argument("--disable-notifications")
-        options.add_argument("--no-default-browser-check")
-        options.add_argument("--disable-save-password-bubble")
-        options.add_argument("--disable-infobars")
-        
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=options
-        )
-        driver.implicitly_wait(Config.IMPLICIT_WAIT)
-        
-        yield driver
-        
-        # Cleanup
-        driver.quit()
-    
     # ========== REGISTER SUCCESS TESTS ==========
     
     def test_R01_register_success(self, driver):
@@ -79,7 +37,7 @@ class TestAuth:
             password=Config.TEST_PASSWORD_1
         )
         
-        time.sleep(0.3)
+        register_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         register_page.take_screenshot("R02_email_invalid_format")
         assert not register_page.is_register_successful(), "Không nên đăng ký thành công với email không hợp lệ"
         print("✅ Test đăng ký email không hợp lệ - passed")
@@ -96,7 +54,7 @@ class TestAuth:
             password=Config.TEST_PASSWORD_1
         )
         
-        time.sleep(0.3)
+        register_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         register_page.take_screenshot("R03_email_empty")
         assert not register_page.is_register_successful(), "Không nên đăng ký thành công với email trống"
         print("✅ Test đăng ký email trống - passed")
@@ -113,7 +71,7 @@ class TestAuth:
             fullname=Config.TEST_FULLNAME_1,
             password=Config.TEST_PASSWORD_1
         )
-        time.sleep(0.5)       
+        register_page.wait_for_dom_stable(quiet_ms=500, replaces=0.5)
         
         
         # Kỳ vọng: Không chuyển trang (vẫn ở /register) hoặc hiển thị lỗi
@@ -137,7 +95,7 @@ class TestAuth:
             fullname=Config.TEST_FULLNAME_1,
             password=Config.TEST_PASSWORD_1
         )
-        time.sleep(0.5)
+        register_page.wait_for_dom_stable(quiet_ms=500, replaces=0.5)
         
         # Kỳ vọng: Không chuyển trang hoặc hiển thị lỗi
         current_url = register_page.get_current_url()
@@ -160,7 +118,7 @@ class TestAuth:
             password=Config.TEST_PASSWORD_1
         )
         
-        time.sleep(0.3)
+        register_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         register_page.take_screenshot("R06_username_too_short")
         assert not register_page.is_register_successful(), "Không nên đăng ký thành công với username quá ngắn"
         print("✅ Test đăng ký username quá ngắn - passed")
@@ -171,13 +129,16 @@ class TestAuth:
         
         long_username = "u" * 51  # 51 ký tự - SAI (vượt quá 50)
         
-        # Điền tất cả các field bằng cách thông thường
-        register_page.input_text(*register_page.EMAIL_INPUT, Config.TEST_EMAIL_1)
-        register_page.input_text(*register_page.USERNAME_INPUT, long_username)
-        register_page.input_text(*register_page.FULLNAME_INPUT, Config.TEST_FULLNAME_1)
-        register_page.input_text(*register_page.PASSWORD_INPUT, Config.TEST_PASSWORD_1)
-        register_page.input_text(*register_page.CONFIRM_PASSWORD_INPUT, Config.TEST_PASSWORD_1)
-        time.sleep(0.5)  # Đợi validation hiển thị lỗi
+        # Điền các field bằng JS, riêng username gõ từng phím (đang test giới hạn độ dài khi gõ)
+        register_page.fill_form({
+            register_page.EMAIL_INPUT: Config.TEST_EMAIL_1,
+            register_page.USERNAME_INPUT: long_username,
+            register_page.FULLNAME_INPUT: Config.TEST_FULLNAME_1,
+            register_page.PASSWORD_INPUT: Config.TEST_PASSWORD_1,
+            register_page.CONFIRM_PASSWORD_INPUT: Config.TEST_PASSWORD_1,
+        }, keystrokes=(register_page.USERNAME_INPUT,))
+        register_page.wait_for_element_state(register_page.ERROR_MESSAGE, "visible", timeout=3,
+                                             replaces=0.5, required=False)  # Đợi validation hiển thị lỗi
         
         # Kiểm tra có lỗi validation hiển thị
         has_error = register_page.is_error_displayed()
@@ -199,7 +160,7 @@ class TestAuth:
             password=Config.TEST_PASSWORD_1
         )
         
-        time.sleep(0.3)
+        register_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         register_page.take_screenshot("R08_fullname_empty")
         assert not register_page.is_register_successful(), "Không nên đăng ký thành công với fullname trống"
         print("✅ Test đăng ký fullname trống - passed")
@@ -211,13 +172,16 @@ class TestAuth:
         
         long_fullname = "Nguyễn Ngọc Ánh " * 10  # ~220 ký tự - SAI (vượt quá 100)
         
-        # Điền tất cả các field bằng cách thông thường
-        register_page.input_text(*register_page.EMAIL_INPUT, Config.TEST_EMAIL_1)
-        register_page.input_text(*register_page.USERNAME_INPUT, Config.TEST_USERNAME_1)
-        register_page.input_text(*register_page.FULLNAME_INPUT, long_fullname)
-        register_page.input_text(*register_page.PASSWORD_INPUT, Config.TEST_PASSWORD_1)
-        register_page.input_text(*register_page.CONFIRM_PASSWORD_INPUT, Config.TEST_PASSWORD_1)
-        time.sleep(0.5)  # Đợi validation hiển thị lỗi
+        # Điền các field bằng JS, riêng fullname gõ từng phím (đang test giới hạn độ dài khi gõ)
+        register_page.fill_form({
+            register_page.EMAIL_INPUT: Config.TEST_EMAIL_1,
+            register_page.USERNAME_INPUT: Config.TEST_USERNAME_1,
+            register_page.FULLNAME_INPUT: long_fullname,
+            register_page.PASSWORD_INPUT: Config.TEST_PASSWORD_1,
+            register_page.CONFIRM_PASSWORD_INPUT: Config.TEST_PASSWORD_1,
+        }, keystrokes=(register_page.FULLNAME_INPUT,))
+        register_page.wait_for_element_state(register_page.ERROR_MESSAGE, "visible", timeout=3,
+                                             replaces=0.5, required=False)  # Đợi validation hiển thị lỗi
         
         # Kiểm tra có lỗi validation hiển thị
         has_error = register_page.is_error_displayed()
@@ -238,7 +202,7 @@ class TestAuth:
             password="12345"  # Chỉ 5 ký tự - SAI
         )
         
-        time.sleep(0.3)
+        register_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         register_page.take_screenshot("R10_password_too_short")
         assert not register_page.is_register_successful(), "Không nên đăng ký thành công với password quá ngắn"
         print("✅ Test đăng ký password quá ngắn - passed")
@@ -249,15 +213,17 @@ class TestAuth:
         register_page.navigate()
         
         # Nhập confirm password khác
-        from selenium.webdriver.common.by import By
-        register_page.input_text(*register_page.EMAIL_INPUT, Config.TEST_EMAIL_1)
-        register_page.input_text(*register_page.USERNAME_INPUT, Config.TEST_USERNAME_1)
-        register_page.input_text(*register_page.FULLNAME_INPUT, Config.TEST_FULLNAME_1)
-        register_page.input_text(*register_page.PASSWORD_INPUT, Config.TEST_PASSWORD_1)
-        register_page.input_text(*register_page.CONFIRM_PASSWORD_INPUT, "DifferentPassword123")  # SAI - không khớp
+        register_page.fill_form({
+            register_page.EMAIL_INPUT: Config.TEST_EMAIL_1,
+            register_page.USERNAME_INPUT: Config.TEST_USERNAME_1,
+            register_page.FULLNAME_INPUT: Config.TEST_FULLNAME_1,
+            register_page.PASSWORD_INPUT: Config.TEST_PASSWORD_1,
+            register_page.CONFIRM_PASSWORD_INPUT: "DifferentPassword123",  # SAI - không khớp
+        })
+        register_page.submit_mark = register_page.network_mark()
         register_page.click_element(*register_page.REGISTER_BUTTON)
         
-        time.sleep(0.3)
+        register_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         register_page.take_screenshot("R11_password_mismatch")
         assert not register_page.is_register_successful(), "Không nên đăng ký thành công với password không khớp"
         print("✅ Test đăng ký password không khớp - passed")    
@@ -269,13 +235,16 @@ class TestAuth:
         
         long_password = "Pass@123" * 20  # ~160 ký tự - SAI (vượt quá 100)
         
-        # Điền tất cả các field bằng cách thông thường
-        register_page.input_text(*register_page.EMAIL_INPUT, Config.TEST_EMAIL_1)
-        register_page.input_text(*register_page.USERNAME_INPUT, Config.TEST_USERNAME_1)
-        register_page.input_text(*register_page.FULLNAME_INPUT, Config.TEST_FULLNAME_1)
-        register_page.input_text(*register_page.PASSWORD_INPUT, long_password)
-        register_page.input_text(*register_page.CONFIRM_PASSWORD_INPUT, long_password)
-        time.sleep(0.5)  # Đợi validation hiển thị lỗi
+        # Điền các field bằng JS, riêng 2 field password gõ từng phím (đang test giới hạn độ dài khi gõ)
+        register_page.fill_form({
+            register_page.EMAIL_INPUT: Config.TEST_EMAIL_1,
+            register_page.USERNAME_INPUT: Config.TEST_USERNAME_1,
+            register_page.FULLNAME_INPUT: Config.TEST_FULLNAME_1,
+            register_page.PASSWORD_INPUT: long_password,
+            register_page.CONFIRM_PASSWORD_INPUT: long_password,
+        }, keystrokes=(register_page.PASSWORD_INPUT, register_page.CONFIRM_PASSWORD_INPUT))
+        register_page.wait_for_element_state(register_page.ERROR_MESSAGE, "visible", timeout=3,
+                                             replaces=0.5, required=False)  # Đợi validation hiển thị lỗi
         
         # Kiểm tra có lỗi validation hiển thị
         has_error = register_page.is_error_displayed()
@@ -313,7 +282,7 @@ class TestAuth:
             password="wrong_password"
         )
         
-        time.sleep(0.3)
+        login_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         login_page.take_screenshot("L02_login_wrong_password")
         assert not login_page.is_login_successful(), "Không nên đăng nhập thành công với mật khẩu sai"
         print("✅ Test đăng nhập sai mật khẩu - passed")
@@ -328,7 +297,7 @@ class TestAuth:
             password=Config.TEST_PASSWORD_1
         )
         
-        time.sleep(0.3)
+        login_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         login_page.take_screenshot("L03_login_wrong_email")
         assert not login_page.is_login_successful(), "Không nên đăng nhập thành công với email không tồn tại"
         print("✅ Test đăng nhập email không tồn tại - passed")
@@ -343,7 +312,7 @@ class TestAuth:
             password=Config.TEST_PASSWORD_2
         )
         
-        time.sleep(0.3)
+        login_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         login_page.take_screenshot("L04_login_empty_email")
         assert not login_page.is_login_successful(), "Không nên đăng nhập thành công với email trống"
         print("✅ Test đăng nhập email trống - passed")
@@ -358,7 +327,7 @@ class TestAuth:
             password=""
         )
         
-        time.sleep(0.3)
+        login_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         login_page.take_screenshot("L05_login_empty_password")
         assert not login_page.is_login_successful(), "Không nên đăng nhập thành công với password trống"
         print("✅ Test đăng nhập password trống - passed")
@@ -373,7 +342,7 @@ class TestAuth:
             password=""
         )
         
-        time.sleep(0.3)
+        login_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         login_page.take_screenshot("L06_login_both_empty")
         assert not login_page.is_login_successful(), "Không nên đăng nhập thành công với cả hai trống"
         print("✅ Test đăng nhập cả hai trống - passed")
@@ -388,7 +357,7 @@ class TestAuth:
             password=Config.TEST_PASSWORD
         )
         
-        time.sleep(0.3)
+        login_page.wait_for_dom_stable(quiet_ms=200, replaces=0.3)
         login_page.take_screenshot("L07_login_invalid_email_format")
         assert not login_page.is_login_successful(), "Không nên đăng nhập thành công với email sai định dạng"
         print("✅ Test đăng nhập email sai định dạng - passed")
@@ -1,11 +1,6 @@
 import pytest
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from tests.config import Config
-from tests.pages.login_page import LoginPage
 from tests.pages.video_page import VideoPage
-import time
 
 class TestVideoInteractions:
     """
@@ -18,53 +13,15 @@ class TestVideoInteractions:
     """
     
     @pytest.fixture(scope="function")
-    def driver(self):
-        """Setup và teardown browser"""
-        options = webdriver.ChromeOptions()
-        if Config.HEADLESS:
-            options.add_argument("--headless")
-        options.add_argument("--start-maximized")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        
-        # Disable browser popups/notifications
-        prefs = {
-            "profile.password_manager_leak_detection": False,
-            "profile.password_manager_enabled": False,
-            "credentials_enable_service": False,
-            "safebrowsing.enabled": False,
-            "profile.default_content_setting_values.notifications": 2,
-        }
-        options.add_experimental_option("prefs", prefs)
-        options.add_argument("--disable-notifications")
-        options.add_argument("--no-default-browser-check")
-        options.add_argument("--disable-save-password-bubble")
-        options.add_argument("--disable-infobars")
-        
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=options
-        )
-        driver.implicitly_wait(Config.IMPLICIT_WAIT)
-        
-        yield driver
-        
-        # Cleanup
-        driver.quit()
-    
-    @pytest.fixture(scope="function")
-    def logged_in_driver(self, driver):
+    def logged_in_driver(self, driver, auth_sessions, test_account):
         """
         Fixture đăng nhập trước khi chạy test
+        (login qua UI một lần, các test sau inject auth snapshot và mở thẳng /home)
         """
-        login_page = LoginPage(driver)
-        login_page.navigate()
-        
-        # Đăng nhập với user test
-        login_page.login(Config.TEST_EMAIL_2, Config.TEST_PASSWORD_2)
-        time.sleep(2)
-        
-        # Verify đăng nhập thành công
-        assert login_page.is_login_successful(), "Đăng nhập không thành công"
+        auth_sessions.login(
+            driver, test_account["email"], test_account["password"],
+            start_url=f"{Config.BASE_URL}/home"
+        )
         
         yield driver
     
@@ -80,12 +37,10 @@ class TestVideoInteractions:
         
         # Đã ở trang home sau khi login, đảm bảo video playing
         video_page.ensure_video_playing()
-        time.sleep(1)
         
         # Click nút follow trên video đầu tiên
         follow_success = video_page.click_follow()
         assert follow_success, "Không thể click nút Follow"
-        time.sleep(1)
         
         # Sau đó chuyển hướng đến trang profile người đó bằng cách click vào avatar
         avatar_clicked = video_page.click_avatar()
@@ -109,17 +64,15 @@ class TestVideoInteractions:
         video_page = VideoPage(logged_in_driver)
         
         # Đã ở trang home sau khi login
-        time.sleep(2)
+        video_page.wait_until_ready(replaces=2)
         
         # Đảm bảo đã follow user trước
         if not video_page.is_following():
             video_page.click_follow()
-            time.sleep(1)
         
         # Click unfollow
         unfollow_success = video_page.click_unfollow()
         assert unfollow_success, "Không thể click nút Unfollow"
-        time.sleep(1)
         
         # Sau đó chuyển hướng về trang profile người đó bằng cách click vào avatar
         avatar_clicked = video_page.click_avatar()
@@ -144,7 +97,7 @@ class TestVideoInteractions:
         video_page = VideoPage(logged_in_driver)
         
         # Đã ở trang home sau khi login
-        time.sleep(2)
+        video_page.wait_until_ready(replaces=2)
         
         # Kiểm tra trạng thái like ban đầu
         initial_liked = video_page.is_video_liked()
@@ -152,11 +105,9 @@ class TestVideoInteractions:
         # Nếu đã like thì unlike trước
         if initial_liked:
             video_page.click_like()
-            time.sleep(1.5)
         
         # Click like
         like_success = video_page.click_like()
-        time.sleep(1.5)  # Tăng wait time để UI update
         
         # Screenshot
         video_page.take_screenshot("I03_like_video")
@@ -176,22 +127,18 @@ class TestVideoInteractions:
         video_page = VideoPage(logged_in_driver)
         
         # Đã ở trang home sau khi login
-        time.sleep(2)
+        video_page.wait_until_ready(replaces=2)
         
         # Đảm bảo video đã được like trước
         if not video_page.is_video_liked():
             video_page.click_like()
-            time.sleep(1.5)
         
         # Scroll để refresh DOM trước khi click unlike
         logged_in_driver.execute_script("window.scrollBy(0, 50);")
-        time.sleep(0.3)
         logged_in_driver.execute_script("window.scrollBy(0, -50);")
-        time.sleep(0.3)
         
         # Click unlike
         unlike_success = video_page.click_like()
-        time.sleep(1.5)  # Tăng wait time để UI update
         
         # Screenshot
         video_page.take_screenshot("I04_unlike_video")
@@ -216,7 +163,7 @@ class TestVideoInteractions:
         video_page = VideoPage(logged_in_driver)
         
         # Đã ở trang home sau khi login
-        time.sleep(2)
+        video_page.wait_until_ready(replaces=2)
         
         # Thêm comment
         comment_text = "Đây là bình luận test hợp lệ!"
@@ -239,7 +186,7 @@ class TestVideoInteractions:
         video_page = VideoPage(logged_in_driver)
         
         # Đã ở trang home sau khi login
-        time.sleep(2)
+        video_page.wait_until_ready(replaces=2)
         
         # Thử thêm comment rỗng
         comment_success = video_page.add_comment("")
@@ -264,7 +211,7 @@ class TestVideoInteractions:
         video_page = VideoPage(logged_in_driver)
         
         # Đã ở trang home sau khi login
-        time.sleep(2)
+        video_page.wait_until_ready(replaces=2)
         
         # Tạo comment dài 501 ký tự
         long_comment = "A" * 501
@@ -292,14 +239,12 @@ class TestVideoInteractions:
     #     video_page = VideoPage(logged_in_driver)
         
     #     # Đã ở trang home sau khi login
-    #     time.sleep(2)
         
     #     # Lấy URL video hiện tại
     #     current_url = video_page.get_video_url()
         
     #     # Click share (sẽ tự động đóng dialog sau khi copy)
     #     share_success = video_page.click_share()
-    #     time.sleep(1)
         
     #     # Screenshot
     #     video_page.take_screenshot("I08_share_link")
@@ -324,11 +269,11 @@ class TestVideoInteractions:
         video_page = VideoPage(logged_in_driver)
         
         # Đã ở trang home sau khi login
-        time.sleep(2)
+        video_page.wait_until_ready(replaces=2)
         
         # Click bookmark (sẽ chuyển đến /bookmarks)
         bookmark_success = video_page.click_bookmark()
-        time.sleep(1)
+        video_page.wait_for_network_idle(replaces=1)
         
         # Screenshot tại trang bookmarks
         video_page.take_screenshot("I08_bookmark_video")
@@ -340,6 +285,7 @@ class TestVideoInteractions:
         
         print("✅ Test I08 - Bookmark video thành công")
     
+    @pytest.mark.shared_backend_state  # Dùng video đã bookmark ở I08
     def test_I09_unbookmark_video(self, logged_in_driver):
         """
         I09 - Unbookmark Video
@@ -349,15 +295,13 @@ class TestVideoInteractions:
         
         # Quay về trang home từ bookmarks page
         video_page.navigate_to_home()
-        time.sleep(2)  # Tăng thời gian đợi page load
         
         # Scroll để element hiển thị
         logged_in_driver.execute_script("window.scrollBy(0, 300)")
-        time.sleep(0.5)
         
         # Click unbookmark (video đã được bookmark ở test I08)
         unbookmark_success = video_page.click_bookmark()
-        time.sleep(1)
+        video_page.wait_for_network_idle(replaces=1)
         
         # Screenshot tại trang bookmarks
         video_page.take_screenshot("I09_unbookmark_video")
@@ -0,0 +1 @@
+# Unit test cho logic thuần trong tests/utils (không cần browser / app)
@@ -0,0 +1,127 @@
+import base64
+import json
+import shutil
+import subprocess
+import time
+import pytest
+from urllib.parse import urlparse
+from tests.config import Config
+from tests.utils.auth_session import AuthSessionStore
+from tests.utils.driver_factory import DriverPool, CLEAR_SESSION_STORAGE_SCRIPT
+
+NODE = shutil.which("node")
+pytestmark = pytest.mark.skipif(NODE is None, reason="cần node để chạy script inject như trong browser")
+
+# Chạy các script "new document" với localStorage / sessionStorage giả, trả về storage sau khi chạy
+RUN_SCRIPTS_JS = """
+const state = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const storage = (items) => ({
+    getItem: (key) => (key in items ? items[key] : null),
+    setItem: (key, value) => { items[key] = String(value); },
+    clear: () => Object.keys(items).forEach((key) => delete items[key]),
+});
+global.location = {origin: state.origin};
+global.localStorage = storage(state.local);
+global.sessionStorage = storage(state.session);
+state.scripts.forEach((source) => eval(source));
+process.stdout.write(JSON.stringify({local: state.local, session: state.session}));
+"""
+
+
+def app_origin():
+    app_url = urlparse(Config.BASE_URL)
+    return f"{app_url.scheme}://{app_url.netloc}"
+
+
+class FakeBrowser:
+    """Một tab Chrome tối giản: script new document, storage theo origin của app, app chuyển về login khi thiếu token"""
+
+    def __init__(self):
+        self.current_url = "about:blank"
+        self.window_handles = ["main"]
+        self.switch_to = self
+        self.scripts = {}
+        self.local = {}
+        self.session = {}
+        self._next_id = 0
+
+    def window(self, handle):
+        pass
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def quit(self):
+        pass
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Page.addScriptToEvaluateOnNewDocument":
+            self._next_id += 1
+            self.scripts[str(self._next_id)] = params["source"]
+            return {"identifier": str(self._next_id)}
+        if command == "Page.removeScriptToEvaluateOnNewDocument":
+            del self.scripts[params["identifier"]]
+        if command == "Storage.clearDataForOrigin" and "local_storage" in params["storageTypes"].split(","):
+            self.local.clear()
+        return {}
+
+    def execute_script(self, script, *args):
+        if script == CLEAR_SESSION_STORAGE_SCRIPT and self.current_url.startswith(args[0]):
+            self.session.clear()
+
+    def get(self, url):
+        self.current_url = url
+        if not url.startswith(app_origin()):
+            return
+        result = subprocess.run(
+            [NODE, "-e", RUN_SCRIPTS_JS], check=True, capture_output=True, text=True,
+            input=json.dumps({"origin": app_origin(), "local": self.local, "session": self.session,
+                              "scripts": list(self.scripts.values())}),
+        )
+        state = json.loads(result.stdout)
+        self.local, self.session = state["local"], state["session"]
+        if "accessToken" not in self.local:
+            self.current_url = f"{Config.BASE_URL}/auth/login"
+
+
+def make_token():
+    payload = base64.urlsafe_b64encode(json.dumps({"sub": "1", "exp": int(time.time()) + 3600}).encode())
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload.decode().rstrip('=')}.sig"
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = AuthSessionStore()
+    store._snapshots["user@test.local"] = {
+        "local_storage": {"accessToken": make_token()}, "cookies": [], "validated_at": time.time(),
+    }
+    monkeypatch.setattr(store, "ui_login", lambda *args: pytest.fail("Không được login lại qua UI"))
+    return store
+
+
+def test_pooled_browser_checked_out_twice_needs_no_relogin(store):
+    """Browser dùng lại từ pool vẫn được inject snapshot ở lần mượn thứ 2"""
+    pool = DriverPool(size=1, factory=FakeBrowser)
+    start_url = f"{Config.BASE_URL}/upload"
+    for _ in range(2):
+        driver = pool.acquire()
+        store.login(driver, "user@test.local", "secret", start_url)
+        assert driver.current_url == start_url
+        pool.release(driver)
+    assert (pool.stats["started"], pool.stats["reused"]) == (1, 1)
+    assert store.stats == {"ui_logins": 0, "injections": 2, "relogins": 0}
+
+
+def test_injection_flag_left_by_previous_checkout_does_not_block(store):
+    """Cờ sessionStorage của lần inject trước (vd. reset khi tab không ở trang app) không chặn lần inject mới"""
+    driver = FakeBrowser()
+    start_url = f"{Config.BASE_URL}/upload"
+    store.login(driver, "user@test.local", "secret", start_url)
+    assert driver.session
+    # Chỉ xóa localStorage + script, giữ sessionStorage
+    driver.scripts.clear()
+    driver._new_document_scripts = []
+    driver.local.clear()
+    store.login(driver, "user@test.local", "secret", start_url)
+    assert driver.current_url == start_url
+    assert "accessToken" in driver.local
@@ -0,0 +1,95 @@
+import base64
+import json
+import time
+from tests.utils.cassette import (
+    Cassette, REDACTED_SIGNATURE, normalize_body, normalize_path, redact, redact_response, refresh_tokens,
+)
+
+
+def jwt(claims):
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'HS256'})}.{encode(claims)}.real-signature"
+
+
+def claims(token):
+    payload = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+def test_redact_hides_secrets_and_jwt_signature():
+    """password / authorization → HMAC ổn định; JWT giữ payload, bỏ chữ ký; field khác giữ nguyên"""
+    token = jwt({"sub": "1", "exp": 1})
+    data = redact({"user": {"email": "a@b.c", "password": "pw"},
+                   "items": [{"access_token": token}], "Authorization": "Bearer x"})
+
+    assert data["user"]["email"] == "a@b.c"
+    assert data["user"]["password"].startswith("<redacted:")
+    assert data["user"]["password"] == redact({"password": "pw"})["password"]
+    assert data["user"]["password"] != redact({"password": "other"})["password"]
+    assert data["Authorization"].startswith("<redacted:")
+    header, payload, signature = data["items"][0]["access_token"].split(".")
+    assert signature == REDACTED_SIGNATURE
+    assert token.startswith(f"{header}.{payload}.")
+
+
+def test_redact_response_copies_and_keeps_original():
+    """Cassette nhận bản đã che, response gốc (browser nhận) không đổi"""
+    token = jwt({"sub": "1", "exp": 1})
+    response = {"status": 200, "content_type": "application/json", "body": json.dumps({"access_token": token})}
+    stored = redact_response(response)
+
+    assert json.loads(response["body"])["access_token"] == token
+    assert json.loads(stored["body"])["access_token"].endswith(f".{REDACTED_SIGNATURE}")
+    binary = {"status": 200, "content_type": "video/mp4", "body_b64": "AAAA"}
+    assert redact_response(binary) is binary
+
+
+def test_refresh_tokens_sets_future_exp():
+    data = refresh_tokens({"data": [{"access_token": jwt({"sub": "1", "exp": 1})}], "title": "a.b.c"})
+    assert claims(data["data"][0]["access_token"])["exp"] > time.time()
+    assert data["title"] == "a.b.c"
+
+
+def test_normalize_body_is_stable_across_runs():
+    """JSON sort key, form sort field, multipart bỏ boundary / nội dung file"""
+    assert normalize_body("application/json", b'{"b": 1, "a": 2}') == normalize_body(
+        "application/json; charset=utf-8", b'{"a":2,"b":1}')
+    assert normalize_body("application/x-www-form-urlencoded", b"username=u&password=p") == \
+        normalize_body("application/x-www-form-urlencoded", b"password=p&username=u")
+    assert "password=p" not in normalize_body("application/x-www-form-urlencoded", b"username=u&password=p")
+
+    def multipart(boundary, content):
+        return (f"--{boundary}\r\nContent-Disposition: form-data; name=\"title\"\r\n\r\nHello\r\n"
+                f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"v.mp4\"\r\n"
+                f"Content-Type: video/mp4\r\n\r\n{content}\r\n--{boundary}--\r\n").encode()
+    first = normalize_body("multipart/form-data; boundary=AAA", multipart("AAA", "one"))
+    second = normalize_body("multipart/form-data; boundary=BBB", multipart("BBB", "two"))
+    assert first == second == "file=%3Cfile%3Av.mp4%3E&title=Hello"
+    assert normalize_body("application/json", b"") == ""
+
+
+def test_normalize_path_drops_origin_and_sorts_query():
+    assert normalize_path("http://api:8000/api/v1/videos/?skip=0&limit=10") == "/api/v1/videos/?limit=10&skip=0"
+    assert normalize_path("/api/v1/users/me") == "/api/v1/users/me"
+    assert "plain-token" not in normalize_path("/api/v1/auth/test-token?token=plain-token")
+
+
+def test_find_uses_each_match_once_then_repeats_last():
+    """Cặp khớp chưa dùng đầu tiên; hết thì lặp lại cặp cuối; khác body thì không khớp"""
+    cassette = Cassette("unused.json", ("method", "path", "body"))
+    request = {"method": "GET", "path": "/api/v1/videos/1", "body": ""}
+    cassette.add(request, {"status": 200, "body": "first"})
+    cassette.add({**request, "body": "x"}, {"status": 200, "body": "other"})
+    cassette.add(request, {"status": 200, "body": "second"})
+
+    assert [cassette.find(request)["body"] for _ in range(3)] == ["first", "second", "second"]
+    assert cassette.find({**request, "method": "POST"}) is None
+
+
+def test_add_unique_replaces_same_key():
+    cassette = Cassette("unused.json", ("method", "path"))
+    request = {"method": "POST", "path": "/api/v1/auth/login", "body": "a"}
+    cassette.add(request, {"body": "old"}, unique=True)
+    cassette.add({**request, "body": "b"}, {"body": "new"}, unique=True)
+    assert [i["response"]["body"] for i in cassette.interactions] == ["new"]
@@ -0,0 +1,56 @@
+from tests.utils.chrome_trace import summarize
+
+MAIN, OTHER = (1, 10), (1, 20)
+
+
+def event(name, ts_ms, dur_ms, thread=MAIN, **args):
+    return {"ph": "X", "name": name, "pid": thread[0], "tid": thread[1],
+            "ts": ts_ms * 1000, "dur": dur_ms * 1000, "args": args}
+
+
+def thread_name(thread, name):
+    return {"ph": "M", "name": "thread_name", "pid": thread[0], "tid": thread[1], "args": {"name": name}}
+
+
+EVENTS = [
+    thread_name(MAIN, "CrRendererMain"),
+    thread_name(OTHER, "Compositor"),
+    # Long task 120ms: script app.js (gồm FunctionCall lồng bên trong) + forced layout
+    event("RunTask", 0, 120),
+    event("EvaluateScript", 0, 80, data={"url": "app.js"}),
+    event("FunctionCall", 10, 30, data={"url": "app.js"}),
+    event("Layout", 85, 20, beginData={"stackTrace": [{"url": "app.js"}]}),
+    # Long task 60ms, layout thường + style
+    event("RunTask", 200, 60),
+    event("FunctionCall", 200, 10, data={"url": "vendor.js"}),
+    event("UpdateLayoutTree", 215, 5),
+    event("Layout", 220, 30),
+    # Task ngắn, không tính là long task
+    event("RunTask", 300, 40),
+    # Thread khác main renderer: bỏ qua
+    event("RunTask", 0, 500, thread=OTHER),
+    event("Layout", 0, 400, thread=OTHER),
+]
+
+
+def test_summarize_long_tasks_on_main_thread():
+    summary = summarize(EVENTS, top=5)
+    assert summary["events"] == len(EVENTS)
+    assert summary["long_tasks"]["count"] == 2
+    assert summary["long_tasks"]["total_ms"] == 180
+    assert summary["long_tasks"]["top"] == [
+        {"ms": 120, "heaviest": "EvaluateScript app.js"},
+        {"ms": 60, "heaviest": "Layout"},
+    ]
+
+
+def test_summarize_layout_and_forced_layout():
+    assert summarize(EVENTS)["layout"] == {
+        "count": 2, "total_ms": 50, "forced": 1, "forced_ms": 20, "style_recalc_ms": 5,
+    }
+
+
+def test_summarize_script_time_not_double_counted():
+    """FunctionCall nằm trong EvaluateScript không cộng thêm; top giới hạn số file"""
+    assert summarize(EVENTS, top=5)["scripts"] == [{"url": "app.js", "ms": 80}, {"url": "vendor.js", "ms": 10}]
+    assert summarize(EVENTS, top=1)["scripts"] == [{"url": "app.js", "ms": 80}]
@@ -0,0 +1,57 @@
+import json
+import pytest
+from tests.utils import locator_registry
+
+FIRST = ("css selector", ".error-message")
+SECOND = ("xpath", "//*[contains(@class, 'error')]")
+THIRD = ("css selector", "[role='alert']")
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Registry riêng cho mỗi test (không ảnh hưởng locator của page object)"""
+    monkeypatch.setattr(locator_registry, "_strategies", {})
+    monkeypatch.setattr(locator_registry, "_winners", {})
+    monkeypatch.setattr(locator_registry, "_lookups", None)
+    return locator_registry.register("error", FIRST, SECOND, THIRD)
+
+
+def test_declared_order_without_winner(registry):
+    assert locator_registry.order(registry) == [0, 1, 2]
+
+
+def test_winner_is_tried_first(registry):
+    """Strategy thắng lần trước lên đầu, các strategy còn lại giữ thứ tự khai báo"""
+    locator_registry.record(registry, 2, [1, 2])
+    assert locator_registry.order(registry) == [2, 0, 1]
+    locator_registry.record(registry, -1, [])
+    assert locator_registry.order(registry) == [2, 0, 1]
+
+
+def test_winner_follows_strategy_not_index(registry):
+    """Danh sách strategy đổi (thêm / xoá) thì winner vẫn trỏ đúng (By, value); winner không còn thì bỏ qua"""
+    locator_registry.record(registry, 1, [1])
+    locator_registry.register(registry, THIRD, FIRST, SECOND)
+    assert locator_registry.order(registry) == [2, 0, 1]
+    locator_registry.register(registry, THIRD, FIRST)
+    assert locator_registry.order(registry) == [0, 1]
+
+
+def test_load_winners_from_previous_run(registry, tmp_path):
+    path = tmp_path / "locators.json"
+    path.write_text(json.dumps({"winners": {registry: list(SECOND)}}), encoding="utf-8")
+    locator_registry.load_winners(str(path))
+    assert locator_registry.order(registry) == [1, 0, 2]
+    locator_registry.load_winners(str(tmp_path / "missing.json"))
+    assert locator_registry.order(registry) == [1, 0, 2]
+
+
+def test_aggregate_hits_misses_and_used(registry):
+    locator_registry.start()
+    locator_registry.record(registry, 0, [0, 2])
+    locator_registry.record(registry, 2, [2])
+    locator_registry.record(registry, -1, [])
+    stats = locator_registry.aggregate(locator_registry.finish())[registry]
+
+    assert (stats["lookups"], stats["found"]) == (3, 2)
+    assert [(s["used"], s["hits"], s["misses"]) for s in stats["strategies"]] == [(1, 1, 2), (0, 0, 3), (1, 2, 1)]
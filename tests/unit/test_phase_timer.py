@@ -0,0 +1,58 @@
+import json
+from types import SimpleNamespace
+from tests.config import Config
+from tests.utils import phase_timer
+from tests.utils.phase_timer import PhaseTimingPlugin, compare
+
+
+def timing(total, **phases):
+    return {"total": total, "phases": phases}
+
+
+class FakeConfig:
+    def __init__(self, **options):
+        self.options = options
+
+    def getoption(self, name):
+        return self.options.get(name)
+
+
+def test_compare_reports_slower_total_and_phases():
+    """Chậm hơn cả threshold (tỉ lệ) và min_seconds mới tính là regression"""
+    baseline = {"t1": timing(10, login=2, navigation=1), "t2": timing(5, login=1)}
+    current = {
+        "t1": timing(12, login=3, navigation=1.05, screenshot=0.6),
+        "t2": timing(5.3, login=1.3),
+        "new": timing(100, login=50),
+    }
+    regressions = compare(current, baseline, threshold=0.25, min_seconds=0.5)
+    assert [(r["test"], r["phase"]) for r in regressions] == [("t1", "login"), ("t1", "screenshot")]
+    assert regressions[1]["baseline"] == 0.0
+
+
+def test_compare_without_baseline_entry_is_ignored():
+    assert compare({"t": timing(10)}, {}, threshold=0, min_seconds=0) == []
+
+
+def test_gate_fails_session_only_on_regression(tmp_path, monkeypatch):
+    """--phase-gate đổi exitstatus 0 → 1 khi có regression, ghi report cả khi không gate"""
+    baseline_path = tmp_path / "baseline.json"
+    phase_timer.write_report(str(baseline_path), {"t": timing(2, login=1)})
+    monkeypatch.setattr(Config, "PHASE_REPORT_PATH", str(tmp_path / "report.json"))
+    monkeypatch.setattr(Config, "PHASE_REGRESSION_MIN_SECONDS", 0.5)
+
+    def run(login, gate):
+        plugin = PhaseTimingPlugin(FakeConfig(**{
+            "--phase-baseline": str(baseline_path), "--phase-threshold": 0.2, "--phase-gate": gate,
+        }))
+        plugin.results = {"t": timing(1 + login, login=login)}
+        session = SimpleNamespace(exitstatus=0)
+        plugin.pytest_sessionfinish(session)
+        return session.exitstatus, plugin.regressions
+
+    assert run(login=3, gate=True)[0] == 1
+    status, regressions = run(login=3, gate=False)
+    assert status == 0 and regressions
+    with open(Config.PHASE_REPORT_PATH, encoding="utf-8") as f:
+        assert json.load(f)["regressions"] == regressions
+    assert run(login=1.1, gate=True) == (0, [])
@@ -0,0 +1,67 @@
+import json
+import pytest
+from tests.utils import run_history
+from tests.utils.stats import percentile
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "history.sqlite3")
+
+
+def record(tmp_path, db, commit, results):
+    """Ghi một run từ results.jsonl giả: results = {test: (outcome, duration)}"""
+    path = tmp_path / "results.jsonl"
+    lines = [{"event": "session_start", "time": "2026-01-01T00:00:00"}]
+    lines += [{"event": "test", "test": test, "outcome": outcome, "duration": duration}
+              for test, (outcome, duration) in results.items()]
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n", encoding="utf-8")
+    return run_history.record_run(str(path), exitstatus=0, commit=commit, db_path=db)
+
+
+def test_percentile_interpolates():
+    assert percentile([], 0.5) is None
+    assert percentile([3], 0.95) == 3
+    assert percentile([4, 1, 3, 2], 0.5) == 2.5
+    assert percentile([1, 2, 3, 4, 5], 0.95) == pytest.approx(4.8)
+
+
+def test_record_run_skips_empty_log(tmp_path, db):
+    assert record(tmp_path, db, "aaa", {}) is None
+    assert record(tmp_path, db, "aaa", {"t": ("passed", 1.0)}) == 1
+
+
+def test_flaky_tests_count_pass_fail_flips(tmp_path, db):
+    """Chỉ tính passed ↔ failed (skipped bỏ qua), sắp xếp theo số lần đổi"""
+    outcomes = {
+        "flaky": ["passed", "failed", "skipped", "passed", "failed"],
+        "once": ["passed", "passed", "failed", "failed", "failed"],
+        "stable": ["passed"] * 5,
+    }
+    for index in range(5):
+        record(tmp_path, db, "aaa", {test: (runs[index], 1.0) for test, runs in outcomes.items()})
+
+    flaky = run_history.flaky_tests(db_path=db)
+    assert [(item["test"], item["flips"], item["runs"], item["last"]) for item in flaky] == [("flaky", 3, 4, "failed")]
+    assert [item["test"] for item in run_history.flaky_tests(min_flips=1, db_path=db)] == ["flaky", "once"]
+    assert run_history.flaky_tests(runs=2, db_path=db) == []
+
+
+def test_slowest_tests_by_p95_with_trend(tmp_path, db):
+    for duration in (1, 1, 3, 3):
+        record(tmp_path, db, "aaa", {"slow": ("passed", duration), "fast": ("passed", 0.1), "skip": ("skipped", 9)})
+
+    slowest = run_history.slowest_tests(db_path=db)
+    assert [item["test"] for item in slowest] == ["slow", "fast"]
+    assert slowest[0]["p95_previous"] == 1 and slowest[0]["p95_recent"] == 3
+    assert len(run_history.slowest_tests(limit=1, db_path=db)) == 1
+
+
+def test_slower_since_compares_runs_before_and_after_commit(tmp_path, db):
+    record(tmp_path, db, "1111aaaa", {"slower": ("passed", 1.0), "same": ("passed", 2.0)})
+    record(tmp_path, db, "2222bbbb", {"slower": ("passed", 3.0), "same": ("passed", 2.1), "new": ("passed", 5.0)})
+    record(tmp_path, db, "3333cccc", {"slower": ("passed", 5.0), "same": ("passed", 2.0)})
+
+    slower = run_history.slower_since("2222bbbb", threshold=0.2, min_seconds=0.5, db_path=db)
+    assert slower == [{"test": "slower", "before": 1.0, "after": 4.0, "change": 3.0}]
+    assert run_history.slower_since("9999", db_path=db) is None
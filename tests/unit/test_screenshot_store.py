@@ -0,0 +1,98 @@
+import json
+import os
+import struct
+import zlib
+import pytest
+from tests.config import Config
+from tests.utils import screenshot_store
+from tests.utils.screenshot_store import PNG_SIGNATURE, _png_chunk
+
+
+def png(pixel, level=6):
+    """PNG 1x1 RGB; cùng pixel khác mức nén → cùng nội dung"""
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return PNG_SIGNATURE + _png_chunk(b"IHDR", header) + \
+        _png_chunk(b"IDAT", zlib.compress(b"\x00" + bytes(pixel), level)) + _png_chunk(b"IEND", b"")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Store trong tmp_path, trạng thái module sạch"""
+    monkeypatch.setattr(Config, "SCREENSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "SCREENSHOT_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(screenshot_store, "run_group", "20260101_000000")
+    monkeypatch.setattr(screenshot_store, "_manifest", None)
+    monkeypatch.setattr(screenshot_store, "registry", {})
+    monkeypatch.setattr(screenshot_store, "stats", dict.fromkeys(screenshot_store.stats, 0))
+    return screenshot_store
+
+
+def blobs(root):
+    return sorted(name for _, _, files in os.walk(os.path.join(root, "blobs")) for name in files)
+
+
+def write_run(store, run, group, created, screenshots):
+    os.makedirs(store._manifest_dir(), exist_ok=True)
+    with open(os.path.join(store._manifest_dir(), f"{run}.json"), "w", encoding="utf-8") as f:
+        json.dump({"run": run, "run_group": group, "created": created, "screenshots": screenshots}, f)
+
+
+def test_same_pixels_stored_once(store):
+    """Frame giống nhau (khác mức nén) chỉ có một blob, manifest vẫn có đủ entry"""
+    first = store.save(png((1, 2, 3), level=1), "a", test="t")
+    second = store.save(png((1, 2, 3), level=9), "b", test="t")
+    third = store.save(png((9, 9, 9)), "c", test="t")
+
+    assert first == second != third
+    assert len(blobs(Config.SCREENSHOT_STORE_DIR)) == 2
+    assert store.stats["deduplicated"] == 1
+    assert [entry["name"] for entry in store.entries_for("t")] == ["a", "b", "c"]
+
+
+def test_write_manifest_once_at_end(store):
+    """save() không ghi manifest; write_manifest() ghi một file với mọi entry"""
+    store.save(png((1, 1, 1)), "a", test="t")
+    store.save(png((2, 2, 2)), "b", test="t")
+    assert not os.path.exists(store._manifest_dir())
+
+    path = store.write_manifest()
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["run_group"] == "20260101_000000"
+    assert [s["name"] for s in manifest["screenshots"]] == ["a", "b"]
+
+
+def test_prune_counts_workers_of_a_run_once(store):
+    """keep_runs tính theo run_group (mọi worker xdist), blob không còn tham chiếu bị xóa"""
+    old_blob = os.path.relpath(store.save(png((1, 1, 1)), "old"), Config.SCREENSHOT_STORE_DIR)
+    new_blob = os.path.relpath(store.save(png((2, 2, 2)), "new"), Config.SCREENSHOT_STORE_DIR)
+    created = "2099-01-01T00:00:0"
+    write_run(store, "old_gw0", "old", created + "0", [{"blob": old_blob}])
+    write_run(store, "new_gw0", "new", created + "1", [{"blob": new_blob}])
+    write_run(store, "new_gw1", "new", created + "2", [{"blob": new_blob}])
+
+    assert store.prune(max_age_days=10 ** 5, keep_runs=1) == (1, 1)
+    assert sorted(m["run"] for m in store.load_manifests()) == ["new_gw0", "new_gw1"]
+    assert blobs(Config.SCREENSHOT_STORE_DIR) == [os.path.basename(new_blob)]
+
+
+def test_prune_removes_manifests_older_than_retention(store):
+    write_run(store, "ancient_main", "ancient", "2000-01-01T00:00:00", [])
+    write_run(store, "recent_main", "recent", "2099-01-01T00:00:00", [])
+    assert store.prune(max_age_days=1, keep_runs=10) == (1, 0)
+    assert [m["run"] for m in store.load_manifests()] == ["recent_main"]
+
+
+def test_migrate_legacy_moves_timestamped_files(store):
+    """<name>_<timestamp>.png cũ vào store + manifest legacy; file khác giữ nguyên"""
+    with open(os.path.join(Config.SCREENSHOT_DIR, "I01_like_20250101_120000.png"), "wb") as f:
+        f.write(png((1, 2, 3)))
+    with open(os.path.join(Config.SCREENSHOT_DIR, "notes.png"), "wb") as f:
+        f.write(png((4, 5, 6)))
+
+    assert store.migrate_legacy() == 1
+    assert sorted(os.listdir(Config.SCREENSHOT_DIR)) == ["notes.png", "store"]
+    manifest, = store.load_manifests()
+    assert manifest["run_group"] == "legacy_20260101_000000"
+    assert [s["name"] for s in manifest["screenshots"]] == ["I01_like"]
+    assert store._manifest is None
@@ -0,0 +1,68 @@
+import socket
+import pytest
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from tests.config import Config
+from tests.utils.stub_backend import StubBackend, StubState
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def stub():
+    backend = StubBackend(port=free_port(), latency=0).start()
+    yield backend
+    backend.stop()
+
+
+def test_reset_email_only_clears_that_account():
+    """reset(email) chỉ xoá like/bookmark/follow/comment/upload của account đó, giữ video gốc"""
+    state = StubState("http://stub/video.mp4")
+    me = state.find_user(email=Config.TEST_EMAIL_2)["id"]
+    other = state.find_user(email="creator@toptop.local")["id"]
+    seed_videos = set(state.videos)
+
+    state.likes |= {(me, 1), (other, 1)}
+    state.bookmarks |= {(me, 2), (other, 2)}
+    state.follows |= {(me, other), (other, me)}
+    state.comments = {1: {"id": 1, "video_id": 1, "user_id": me, "content": "a"},
+                      2: {"id": 2, "video_id": 1, "user_id": other, "content": "b"}}
+    state.videos[99] = dict(state.videos[1], id=99, owner_id=me)
+
+    state.reset(email=Config.TEST_EMAIL_2)
+
+    assert state.likes == {(other, 1)}
+    assert state.bookmarks == {(other, 2)}
+    assert state.follows == {(other, me)}
+    assert list(state.comments) == [2]
+    assert set(state.videos) == seed_videos
+
+
+def test_reset_unknown_email_is_noop():
+    state = StubState("http://stub/video.mp4")
+    state.likes.add((1, 1))
+    state.reset(email="nobody@toptop.local")
+    assert state.likes == {(1, 1)}
+
+
+def test_invalid_json_body_returns_400(stub):
+    """Body application/json hỏng → 400 thay vì lỗi trong thread handler"""
+    request = Request(f"{stub.url}/api/v1/auth/register", data=b"{not json",
+                      headers={"Content-Type": "application/json"}, method="POST")
+    with pytest.raises(HTTPError) as error:
+        urlopen(request, timeout=5)
+    assert error.value.code == 400
+
+
+def test_http_reset_by_email(stub):
+    """reset(email) qua HTTP chỉ xoá dữ liệu của account đó"""
+    me = stub.state.find_user(email=Config.TEST_EMAIL_2)["id"]
+    stub.state.likes |= {(me, 1), (me + 1, 1)}
+    assert stub.reset(email=Config.TEST_EMAIL_2) == {"reset": Config.TEST_EMAIL_2}
+    assert stub.state.likes == {(me + 1, 1)}
+    assert stub.reset() == {"reset": "all"}
+    assert stub.state.likes == set()
@@ -0,0 +1,78 @@
+import time
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.remote.command import Command
+from tests.utils import wait_policy
+from tests.utils.wait_policy import ExplicitWait
+
+
+class MissingElementDriver:
+    """Driver giả: lệnh find_element luôn không thấy element"""
+
+    def __init__(self):
+        self.finds = 0
+
+    def execute(self, command, params=None):
+        if command == Command.FIND_ELEMENT:
+            self.finds += 1
+            raise NoSuchElementException("missing")
+        return {"value": None}
+
+    def find(self):
+        return self.execute(Command.FIND_ELEMENT, {"using": "css selector", "value": "#missing"})
+
+
+def test_explicit_wait_is_capped_at_remaining_budget():
+    """ExplicitWait(20s) trong lời gọi budget 0.3s chỉ đợi tới hết budget"""
+    driver = MissingElementDriver()
+    start = time.perf_counter()
+    with wait_policy.call("Page.method", 0.3):
+        with pytest.raises(TimeoutException):
+            ExplicitWait(driver, 20, poll_frequency=0.05).until(lambda d: False)
+    assert time.perf_counter() - start < 1
+
+
+def test_explicit_wait_timeout_restored_after_call():
+    """Cap chỉ áp dụng trong lời gọi: self.wait dùng chung giữ nguyên timeout"""
+    wait = ExplicitWait(MissingElementDriver(), 20)
+    with wait_policy.call("Page.method", 0):
+        with pytest.raises(TimeoutException):
+            wait.until(lambda d: False)
+    assert wait._timeout == 20
+
+
+def test_nested_call_does_not_extend_outer_deadline():
+    """Lời gọi lồng bên trong dùng deadline sớm hơn của lời gọi ngoài"""
+    with wait_policy.call("Outer.method", 0.2):
+        with wait_policy.call("Inner.method", 10):
+            assert wait_policy.cap(10) <= 0.2
+            assert wait_policy._caller() == "Outer.method > Inner.method"
+    assert wait_policy.cap(10) == 10
+    assert wait_policy._caller() == "<driver>"
+
+
+def test_find_retries_until_budget_but_once_inside_explicit_wait():
+    """find_element thử lại tới hết budget; trong ExplicitWait chỉ thử một lần mỗi vòng"""
+    driver = wait_policy.instrument_driver(MissingElementDriver())
+    with wait_policy.call("Page.probe", 0.35):
+        with pytest.raises(NoSuchElementException):
+            driver.find()
+    assert driver.finds > 1
+
+    driver.finds = 0
+    with wait_policy.explicit():
+        with pytest.raises(NoSuchElementException):
+            driver.find()
+    assert driver.finds == 1
+
+
+def test_budget_decorator_sets_call_budget():
+    """@wait_policy.budget(seconds) đổi budget của method được bọc bởi budget_page_methods"""
+    class Page:
+        @wait_policy.budget(0.5)
+        def probe(self):
+            return wait_policy.cap(10)
+
+    wait_policy.budget_page_methods(Page)
+    assert wait_policy.cap(10) == 10
+    assert Page().probe() <= 0.5
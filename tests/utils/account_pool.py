@@ -0,0 +1,50 @@
+from tests.config import Config
+import json
+import os
+
+
+def load_accounts():
+    """Danh sách account test: Config.TEST_ACCOUNTS + file Config.TEST_ACCOUNTS_FILE (nếu có)"""
+    accounts = list(Config.TEST_ACCOUNTS)
+    if os.path.exists(Config.TEST_ACCOUNTS_FILE):
+        with open(Config.TEST_ACCOUNTS_FILE, encoding="utf-8") as f:
+            accounts.extend(json.load(f))
+
+    # Bỏ account trùng email để 2 worker không bao giờ nhận cùng một user
+    unique, seen = [], set()
+    for account in accounts:
+        if account["email"] not in seen:
+            seen.add(account["email"])
+            unique.append(account)
+    return unique
+
+
+def get_worker_index():
+    """Index của xdist worker hiện tại (gw0 → 0); chạy tuần tự thì là 0"""
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return int(worker_id.lstrip("gw") or 0)
+
+
+def get_worker_count():
+    return int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", 1))
+
+
+def check_capacity(worker_count):
+    """Báo lỗi ngay nếu số account ít hơn số worker"""
+    accounts = load_accounts()
+    if len(accounts) < worker_count:
+        raise RuntimeError(
+            f"Cần {worker_count} account test cho {worker_count} worker nhưng chỉ có {len(accounts)}. "
+            f"Thêm account vào Config.TEST_ACCOUNTS hoặc {Config.TEST_ACCOUNTS_FILE}, "
+            f"hoặc giảm số worker (-n)."
+        )
+    return accounts
+
+
+def lease_account():
+    """
+    Account dành riêng cho worker hiện tại.
+    Mỗi worker có index khác nhau nên không có 2 worker dùng chung một account.
+    """
+    accounts = check_capacity(get_worker_count())
+    return accounts[get_worker_index()]
@@ -0,0 +1,150 @@
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError, URLError
+from tests.config import Config
+from tests.pages.login_page import LoginPage
+from tests.utils.driver_factory import add_new_document_script, remove_new_document_script
+from tests.utils.cassette import UNRECORDED_HEADER
+from tests.utils import phase_timer
+from tests.utils import web_vitals
+import base64
+import json
+import time
+import uuid
+
+# Các field CDP Network.setCookies chấp nhận (Network.getAllCookies trả về thêm field khác)
+COOKIE_PARAM_KEYS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+# Script set localStorage một lần cho mỗi lần inject (mỗi lần mượn browser từ pool), trước khi code của app chạy.
+# Cờ trong sessionStorage mang id của lần inject: cờ của test trước còn sót trên browser dùng lại không chặn lần này.
+INJECT_STORAGE_SCRIPT = """
+(function () {
+    if (location.origin !== %(origin)s) return;
+    if (sessionStorage.getItem('__authSnapshotInjected') === %(injection)s) return;
+    var items = %(items)s;
+    Object.keys(items).forEach(function (key) { localStorage.setItem(key, items[key]); });
+    sessionStorage.setItem('__authSnapshotInjected', %(injection)s);
+})();
+"""
+
+
+def _token_expired(token, margin=60):
+    """Kiểm tra claim exp của JWT (token không phải JWT coi như chưa hết hạn)"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return False
+    return exp is not None and exp < time.time() + margin
+
+
+def _token_rejected(token):
+    """
+    Hỏi backend token còn hợp lệ không (lỗi mạng coi như không xác định được → hợp lệ).
+    Không nằm trong cassette của test: proxy cassette chuyển tiếp (record) hoặc trả 200 (replay)
+    """
+    url = f"{Config.API_BASE_URL.rstrip('/')}/api/v1/users/me"
+    request = Request(url, headers={"Authorization": f"Bearer {token}", UNRECORDED_HEADER: "1"})
+    try:
+        with urlopen(request, timeout=5):
+            return False
+    except HTTPError as e:
+        return e.code == 401
+    except (URLError, OSError):
+        return False
+
+
+class AuthSessionStore:
+    """
+    Đăng nhập qua UI một lần cho mỗi account trong một lần chạy, lưu lại auth state
+    (localStorage + cookies) và inject vào các browser sau trước lần driver.get đầu tiên.
+    Snapshot hết hạn hoặc bị backend từ chối sẽ được login lại một lần.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self.stats = {"ui_logins": 0, "injections": 0, "relogins": 0}
+
+    def capture(self, driver):
+        """Chụp auth state hiện tại của browser"""
+        local_storage = driver.execute_script(
+            "var items = {};"
+            "for (var i = 0; i < localStorage.length; i++) {"
+            "  var key = localStorage.key(i); items[key] = localStorage.getItem(key);"
+            "}"
+            "return items;"
+        )
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        return {
+            "local_storage": local_storage,
+            "cookies": [{k: c[k] for k in COOKIE_PARAM_KEYS if k in c} for c in cookies],
+            "validated_at": time.time(),
+        }
+
+    def inject(self, driver, snapshot):
+        """Inject snapshot vào browser (phải gọi trước driver.get vào app); trả về id của script"""
+        app_url = urlparse(Config.BASE_URL)
+        script_id = add_new_document_script(driver, INJECT_STORAGE_SCRIPT % {
+            "origin": json.dumps(f"{app_url.scheme}://{app_url.netloc}"),
+            "items": json.dumps(snapshot["local_storage"]),
+            "injection": json.dumps(uuid.uuid4().hex),
+        })
+        if snapshot["cookies"]:
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": snapshot["cookies"]})
+        self.stats["injections"] += 1
+        return script_id
+
+    def is_usable(self, snapshot):
+        """Snapshot còn dùng được: token chưa hết hạn và backend chưa từ chối"""
+        token = snapshot["local_storage"].get("accessToken")
+        if not token or _token_expired(token):
+            return False
+        # Chỉ hỏi lại backend sau một khoảng thời gian để không tốn request mỗi test
+        if time.time() - snapshot["validated_at"] > Config.AUTH_SNAPSHOT_REVALIDATE:
+            if _token_rejected(token):
+                return False
+            snapshot["validated_at"] = time.time()
+        return True
+
+    def ui_login(self, driver, email, password):
+        """Đăng nhập qua trang login và lưu snapshot cho account"""
+        login_page = LoginPage(driver)
+        login_page.navigate()
+        login_page.login(email, password)
+        if not login_page.is_login_successful():
+            raise RuntimeError(f"Đăng nhập không thành công: {email}")
+        self.stats["ui_logins"] += 1
+        self._snapshots[email] = self.capture(driver)
+
+    def login(self, driver, email, password, start_url):
+        """Đưa browser vào trạng thái đã đăng nhập và mở start_url"""
+        with phase_timer.phase("login"):
+            return self._login(driver, email, password, start_url)
+
+    def _login(self, driver, email, password, start_url):
+        snapshot = self._snapshots.get(email)
+        if snapshot is not None and self.is_usable(snapshot):
+            script_id = self.inject(driver, snapshot)
+            driver.get(start_url)
+            if "/auth/login" not in driver.current_url:
+                return driver
+            # Snapshot bị app từ chối → gỡ script inject và login lại qua UI
+            remove_new_document_script(driver, script_id)
+        if snapshot is not None:
+            self.stats["relogins"] += 1
+            self._snapshots.pop(email, None)
+
+        self.ui_login(driver, email, password)
+        if not driver.current_url.startswith(start_url):
+            # Ghi số liệu của trang login trước khi rời đi
+            web_vitals.collect(driver)
+            driver.get(start_url)
+        return driver
+
+    def summary_lines(self):
+        """Các dòng tóm tắt để in cuối session"""
+        return [
+            f"UI logins: {self.stats['ui_logins']}, snapshot injections: {self.stats['injections']}, "
+            f"re-logins: {self.stats['relogins']}",
+        ]
@@ -0,0 +1,191 @@
+# Thời gian chạy + bộ nhớ browser của từng test theo browser profile,
+# so sánh với lần chạy gần nhất của profile khác (lưu trong Config.DRIVER_CACHE_DIR).
+# Mỗi mẫu kèm thay đổi thống kê driver pool / chromedriver trong test đó để process chính
+# (cả khi chạy xdist) in được tổng hợp khởi động browser của mọi worker.
+from tests.config import Config
+from tests.utils import chromedriver_cache
+from tests.utils.driver_factory import pool_summary_lines
+import json
+import os
+import pytest
+
+_samples = None
+
+
+def record(profile, nodeid, duration, memory_mb=None, memory_source=None, pool=None, chromedriver=None):
+    """
+    Ghi lại một test đã chạy với profile; pool / chromedriver: thay đổi của DriverPool.stats /
+    chromedriver_cache.stats trong test (stats_delta)
+    """
+    if _samples is None:
+        return
+    _samples.append({
+        "profile": profile,
+        "test": nodeid,
+        "duration": duration,
+        "memory_mb": memory_mb,
+        "memory_source": memory_source,
+        "pool": pool or {},
+        "chromedriver": chromedriver or {},
+    })
+
+
+def stats_delta(before, after):
+    """Thay đổi của các số liệu dạng số; giá trị khác (vd. source) lấy giá trị sau"""
+    return {
+        key: value - (before.get(key) or 0) if isinstance(value, (int, float)) and key in before else value
+        for key, value in after.items()
+    }
+
+
+def start():
+    global _samples
+    _samples = []
+
+
+def finish():
+    global _samples
+    samples, _samples = _samples, None
+    return samples or []
+
+
+def _stats_path():
+    return os.path.join(Config.DRIVER_CACHE_DIR, "browser_profiles.json")
+
+
+def _aggregate(samples):
+    memory = [s["memory_mb"] for s in samples if s["memory_mb"] is not None]
+    return {
+        "tests": len(samples),
+        "avg_duration": sum(s["duration"] for s in samples) / len(samples),
+        "avg_memory_mb": sum(memory) / len(memory) if memory else None,
+        "max_memory_mb": max(memory) if memory else None,
+        "memory_source": next((s["memory_source"] for s in samples if s["memory_source"]), None),
+    }
+
+
+def _load_previous():
+    try:
+        with open(_stats_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(previous, current):
+    os.makedirs(Config.DRIVER_CACHE_DIR, exist_ok=True)
+    with open(_stats_path(), "w", encoding="utf-8") as f:
+        json.dump(dict(previous, **current), f, indent=2)
+
+
+def _change(new, old):
+    if new is None or not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def profile_stats(samples):
+    """{profile: thống kê} từ danh sách mẫu"""
+    by_profile = {}
+    for sample in samples:
+        by_profile.setdefault(sample["profile"], []).append(sample)
+    return {profile: _aggregate(entries) for profile, entries in by_profile.items()}
+
+
+def pool_stats(samples):
+    """{profile: DriverPool.stats cộng dồn} từ danh sách mẫu"""
+    pools = {}
+    for sample in samples:
+        totals = pools.setdefault(sample["profile"], {})
+        for key, value in sample["pool"].items():
+            totals[key] = totals.get(key, 0) + value
+    return pools
+
+
+def chromedriver_stats(samples):
+    """chromedriver_cache.stats gộp từ các mẫu: lookups / lookup_time cộng dồn, source / install_time gần nhất"""
+    stats = {"source": None, "lookups": 0, "lookup_time": 0.0, "install_time": None}
+    for sample in samples:
+        delta = sample["chromedriver"]
+        stats["lookups"] += delta.get("lookups", 0)
+        stats["lookup_time"] += delta.get("lookup_time", 0.0)
+        stats["source"] = delta.get("source") or stats["source"]
+        stats["install_time"] = delta.get("install_time") or stats["install_time"]
+    return stats
+
+
+def summary_lines(current, previous):
+    """Tổng hợp theo profile + thay đổi so với profile khác (cùng lần chạy hoặc lần chạy trước)"""
+    lines = []
+    for profile, stats in current.items():
+        memory = (f"avg {stats['avg_memory_mb']:.0f}MB, max {stats['max_memory_mb']:.0f}MB ({stats['memory_source']})"
+                  if stats["avg_memory_mb"] is not None else "memory n/a")
+        lines.append(f"{profile:<8} {stats['tests']:>4} tests  avg {stats['avg_duration']:.2f}s/test  {memory}")
+
+    known = {**previous, **current}
+    if "default" in known and "fast" in known:
+        fast, default = known["fast"], known["default"]
+        # Chỉ so bộ nhớ khi đo cùng một cách (rss / js_heap)
+        same_source = fast.get("memory_source") == default.get("memory_source")
+        memory_change = _change(fast["avg_memory_mb"], default["avg_memory_mb"]) if same_source else "n/a"
+        source = "this run" if "default" in current and "fast" in current else "last recorded run"
+        lines.append(
+            f"fast vs default ({source}): duration {_change(fast['avg_duration'], default['avg_duration'])}, "
+            f"memory {memory_change}"
+        )
+    return lines
+
+
+class BrowserStatsPlugin:
+    """
+    Plugin pytest: process chạy test gửi mẫu của từng test qua report.user_properties
+    (hoạt động cả với xdist), process chính tổng hợp theo profile, ghi file so sánh profile ở sessionfinish.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.samples = []
+        self.profiles = {}
+        self.previous = {}
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        start()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_makereport(self, item, call):
+        # driver fixture ghi mẫu ở teardown, sau khi trả browser về pool
+        if call.when == "teardown":
+            samples = finish()
+            if samples:
+                item.user_properties.append(("browser_stats", samples))
+        return None
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "teardown":
+            return
+        for key, value in report.user_properties:
+            if key == "browser_stats":
+                self.samples.extend(value)
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.samples:
+            return
+        self.previous = _load_previous()
+        self.profiles = profile_stats(self.samples)
+        _save(self.previous, self.profiles)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.samples:
+            return
+        mode = "fresh browser per test" if self.config.getoption("--no-driver-pool") else "pooled"
+        for profile, stats in pool_stats(self.samples).items():
+            terminalreporter.section(f"driver pool: {profile} ({mode})")
+            for line in pool_summary_lines(stats):
+                terminalreporter.write_line(line)
+        for line in chromedriver_cache.summary_lines(chromedriver_stats(self.samples)):
+            terminalreporter.write_line(line)
+
+        terminalreporter.section("browser profiles")
+        for line in summary_lines(self.profiles, self.previous):
+            terminalreporter.write_line(line)
@@ -0,0 +1,382 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl, urlencode
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+from email.parser import BytesParser
+from email.policy import HTTP
+from tests.config import Config
+from tests.utils.stub_backend import REDIRECT_API_SCRIPT, CORS_HEADERS
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+
+# Header được chuyển tiếp lên backend thật khi record (không ghi vào cassette)
+FORWARD_HEADERS = ("Authorization", "Content-Type", "X-Skip-Auth-Redirect", "Accept")
+# Request có header này (kiểm tra token của AuthSessionStore từ Python) không ghi / so khớp cassette:
+# record chỉ chuyển tiếp, replay trả 200 (không có backend để hỏi)
+UNRECORDED_HEADER = "X-Cassette-Unrecorded"
+
+# Field bí mật không được ghi ra cassette: password / secret / authorization thay bằng HMAC của giá trị
+# (request vẫn khớp khi replay, sai mật khẩu vẫn khác đúng mật khẩu); token JWT bị bỏ chữ ký
+SECRET_FIELD = re.compile(r"password|secret|authorization", re.IGNORECASE)
+TOKEN_FIELD = re.compile(r"token$", re.IGNORECASE)
+REDACTED_SIGNATURE = "redacted"
+
+
+def redact_value(value):
+    digest = hmac.new(Config.CASSETTE_REDACT_KEY.encode(), str(value).encode(), hashlib.sha256).hexdigest()
+    return f"<redacted:{digest[:12]}>"
+
+
+def _is_jwt(value):
+    return isinstance(value, str) and value.count(".") == 2
+
+
+def redact_token(token):
+    """JWT: giữ header + payload (claim sub, exp), bỏ chữ ký; token khác: HMAC"""
+    if _is_jwt(token):
+        header, payload, _ = token.split(".")
+        return f"{header}.{payload}.{REDACTED_SIGNATURE}"
+    return redact_value(token)
+
+
+def redact_field(key, value):
+    if isinstance(value, (dict, list)):
+        return redact(value)
+    if value is None or value == "":
+        return value
+    if SECRET_FIELD.search(key):
+        return redact_value(value)
+    if TOKEN_FIELD.search(key) and isinstance(value, str):
+        return redact_token(value)
+    return value
+
+
+def redact(data):
+    """Che field bí mật trong dữ liệu JSON (dict / list lồng nhau)"""
+    if isinstance(data, dict):
+        return {key: redact_field(key, value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [redact(item) for item in data]
+    return data
+
+
+def _with_fresh_exp(token):
+    header, payload, signature = token.split(".")
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        return token
+    claims["exp"] = int(time.time()) + Config.CASSETTE_TOKEN_TTL
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"{header}.{payload}.{signature}"
+
+
+def redact_response(response):
+    """Bản sao response để ghi vào cassette (JSON đã che field bí mật); browser vẫn nhận response gốc"""
+    if "body" not in response or not (response.get("content_type") or "").startswith("application/json"):
+        return response
+    try:
+        return dict(response, body=json.dumps(redact(json.loads(response["body"])), ensure_ascii=False))
+    except ValueError:
+        return response
+
+
+def refresh_tokens(data):
+    """Replay: JWT trong response được đặt exp mới (token ghi lại đã hết hạn thì AuthSessionStore sẽ login lại mỗi test)"""
+    if isinstance(data, dict):
+        return {
+            key: _with_fresh_exp(value) if TOKEN_FIELD.search(key) and _is_jwt(value) else refresh_tokens(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [refresh_tokens(item) for item in data]
+    return data
+
+
+def normalize_body(content_type, raw):
+    """Body dạng so sánh được giữa các lần chạy (JSON sort key, form sort field, multipart bỏ boundary)"""
+    if not raw:
+        return ""
+    content_type = content_type or ""
+    if content_type.startswith("application/json"):
+        try:
+            return json.dumps(redact(json.loads(raw)), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            pass
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        fields = parse_qsl(raw.decode("utf-8"), keep_blank_values=True)
+        return urlencode(sorted((name, redact_field(name, value)) for name, value in fields))
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + raw
+        )
+        fields = []
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            # File chỉ so theo tên file, không so nội dung
+            value = f"<file:{part.get_filename()}>" if part.get_filename() else part.get_content().strip()
+            fields.append((name, redact_field(name or "", value)))
+        return urlencode(sorted(fields))
+    return raw.decode("utf-8", errors="replace")
+
+
+def normalize_path(url):
+    """Path + query đã sort (bỏ origin, che query bí mật)"""
+    parsed = urlparse(url)
+    fields = parse_qsl(parsed.query, keep_blank_values=True)
+    query = urlencode(sorted((name, redact_field(name, value)) for name, value in fields))
+    return f"{parsed.path}?{query}" if query else parsed.path
+
+
+def cassette_path(nodeid):
+    """tests/test_interactions.py::TestVideoInteractions::test_I03 → <CASSETTE_DIR>/test_interactions/TestVideoInteractions.test_I03.json"""
+    module, _, name = nodeid.partition("::")
+    module = os.path.splitext(os.path.basename(module))[0]
+    name = re.sub(r"[^\w.-]+", "_", name.replace("::", "."))
+    return os.path.join(Config.CASSETTE_DIR, module, f"{name}.json")
+
+
+class Cassette:
+    """Các cặp request/response của một test, đọc/ghi từ file JSON gọn"""
+
+    def __init__(self, path, match_on):
+        self.path = path
+        self.match_on = match_on
+        self.interactions = []
+        self._used = set()
+
+    def key(self, request):
+        return tuple(request[field] for field in self.match_on)
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.interactions = json.load(f)["interactions"]
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"interactions": self.interactions}, f, ensure_ascii=False, separators=(",", ":"))
+
+    def add(self, request, response, unique=False):
+        """Thêm một cặp; unique=True thay thế cặp cũ cùng key (dùng cho cassette chung)"""
+        if unique:
+            self.interactions = [i for i in self.interactions if self.key(i["request"]) != self.key(request)]
+        self.interactions.append({"request": request, "response": response})
+
+    def find(self, request):
+        """Cặp khớp chưa dùng đầu tiên; nếu đã dùng hết thì lặp lại cặp khớp cuối cùng"""
+        key = self.key(request)
+        last = None
+        for index, interaction in enumerate(self.interactions):
+            if self.key(interaction["request"]) != key:
+                continue
+            if index not in self._used:
+                self._used.add(index)
+                return interaction["response"]
+            last = interaction["response"]
+        return last
+
+
+class CassetteRequestHandler(BaseHTTPRequestHandler):
+    """Proxy record (chuyển tiếp lên backend thật) / replay (trả từ cassette)"""
+
+    server_version = "TopTopCassette/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._send_cors()
+        self.end_headers()
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _send_cors(self):
+        self.send_header("Access-Control-Allow-Origin", self.headers.get("Origin") or "*")
+        for key, value in CORS_HEADERS.items():
+            self.send_header(key, value)
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        request = {
+            "method": method,
+            "path": normalize_path(self.path),
+            "body": normalize_body(self.headers.get("Content-Type"), raw),
+        }
+        proxy = self.server.proxy
+        if self.headers.get(UNRECORDED_HEADER):
+            response = proxy.forward(method, self.path, raw, self.headers) if proxy.mode == "record" else {
+                "status": 200, "content_type": "application/json", "body": "{}",
+            }
+        elif proxy.mode == "record":
+            response = proxy.forward(method, self.path, raw, self.headers)
+            proxy.record(request, redact_response(response))
+        else:
+            response = proxy.replay(request)
+        self._respond(response)
+
+    def _respond(self, response):
+        if "body_b64" in response:
+            body = base64.b64decode(response["body_b64"])
+        else:
+            body = response.get("body", "").encode("utf-8")
+        self.send_response(response["status"])
+        self._send_cors()
+        if response.get("content_type"):
+            self.send_header("Content-Type", response["content_type"])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CassetteProxy:
+    """
+    Proxy giữa browser và backend cho chế độ cassette (--cassette record|replay).
+    - record: chuyển tiếp request lên backend thật, ghi các cặp request/response vào cassette của test
+    - replay: trả response từ cassette ngay trong process; request không có trong cassette bị báo lỗi
+    Request đăng nhập / users/me (Config.CASSETTE_SHARED_PATHS) nằm trong cassette chung _shared.json
+    vì chỉ test đầu tiên của session mới login.
+    """
+
+    def __init__(self, mode, match_on=None, port=None, upstream=None):
+        self.mode = mode
+        self.match_on = tuple(match_on or Config.CASSETTE_MATCH_ON)
+        self.port = port or Config.CASSETTE_PORT
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.upstream = (upstream or Config.API_BASE_URL).rstrip("/")
+        self.shared = Cassette(os.path.join(Config.CASSETTE_DIR, "_shared.json"), self.match_on).load()
+        self.cassette = None
+        self.misses = []
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0, "cassettes": 0}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), CassetteRequestHandler)
+        self._server.daemon_threads = True
+        self._server.proxy = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"📼 Cassette {self.mode}: {self.url} → {self.upstream}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.mode == "record":
+            # Gộp với file hiện có (worker khác có thể đã ghi login của account khác)
+            merged = Cassette(self.shared.path, self.match_on).load()
+            for interaction in self.shared.interactions:
+                merged.add(interaction["request"], interaction["response"], unique=True)
+            merged.save()
+
+    def redirect_script(self):
+        """Script chuyển request của app sang proxy"""
+        return REDIRECT_API_SCRIPT % {"upstream": json.dumps(self.upstream), "stub": json.dumps(self.url)}
+
+    # ---------- vòng đời cassette theo test ----------
+
+    def use_cassette(self, nodeid):
+        with self._lock:
+            self.cassette = Cassette(cassette_path(nodeid), self.match_on)
+            if self.mode == "replay":
+                self.cassette.load()
+            self.misses = []
+            self.stats["cassettes"] += 1
+
+    def take_misses(self):
+        """Request không khớp (replay) kể từ lần gọi trước"""
+        with self._lock:
+            misses, self.misses = self.misses, []
+        return misses
+
+    def eject(self):
+        """Kết thúc cassette của test; trả về danh sách request không khớp (replay)"""
+        with self._lock:
+            cassette, self.cassette = self.cassette, None
+            misses, self.misses = self.misses, []
+        if self.mode == "record" and cassette is not None:
+            cassette.save()
+        return misses
+
+    def _is_shared(self, request):
+        return request["path"].split("?")[0] in Config.CASSETTE_SHARED_PATHS
+
+    # ---------- record / replay ----------
+
+    def forward(self, method, path, raw, headers):
+        """Gửi request lên backend thật; trả về response gốc (chưa che) dạng lưu được"""
+        forward_headers = {k: headers[k] for k in FORWARD_HEADERS if headers.get(k)}
+        request = Request(f"{self.upstream}{path}", data=raw or None, headers=forward_headers, method=method)
+        try:
+            with urlopen(request, timeout=60) as response:
+                status, content_type, body = response.status, response.headers.get("Content-Type"), response.read()
+        except HTTPError as e:
+            status, content_type, body = e.code, e.headers.get("Content-Type"), e.read()
+        stored = {"status": status, "content_type": content_type}
+        try:
+            stored["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            stored["body_b64"] = base64.b64encode(body).decode("ascii")
+        return stored
+
+    def record(self, request, response):
+        with self._lock:
+            self.stats["recorded"] += 1
+            if self._is_shared(request):
+                self.shared.add(request, response, unique=True)
+            elif self.cassette is not None:
+                self.cassette.add(request, response)
+
+    def replay(self, request):
+        with self._lock:
+            response = self.cassette.find(request) if self.cassette is not None else None
+            if response is None and self._is_shared(request):
+                response = self.shared.find(request)
+            if response is not None:
+                self.stats["replayed"] += 1
+                return self._fresh(response)
+            self.stats["missed"] += 1
+            self.misses.append(request)
+        print(f"❌ Cassette miss: {request['method']} {request['path']}")
+        return {
+            "status": 599,
+            "content_type": "application/json",
+            "body": json.dumps({"detail": f"cassette miss: {request['method']} {request['path']}"}),
+        }
+
+    @staticmethod
+    def _fresh(response):
+        if "body" not in response or not (response.get("content_type") or "").startswith("application/json"):
+            return response
+        try:
+            return dict(response, body=json.dumps(refresh_tokens(json.loads(response["body"])), ensure_ascii=False))
+        except ValueError:
+            return response
+
+    def summary_lines(self):
+        return [
+            f"mode {self.mode}, match on {'+'.join(self.match_on)}, cassettes {self.stats['cassettes']}",
+            f"recorded {self.stats['recorded']}, replayed {self.stats['replayed']}, missed {self.stats['missed']}",
+        ]
@@ -0,0 +1,238 @@
+# Chrome performance trace cho test chậm, chỉ bật theo yêu cầu:
+# - test có marker chrome_trace, hoặc
+# - test đã vượt time budget ở lần chạy trước (lưu trong pytest cache) được trace tự động khi chạy lại.
+# Test được trace dùng browser riêng bật tracing của chromedriver (create_driver(trace=True));
+# các test khác dùng browser trong pool như bình thường nên không tốn gì khi không trace.
+# Trace được lưu dạng .json.gz (mở bằng Chrome DevTools > Performance hoặc ui.perfetto.dev)
+# và tóm tắt long task, layout (forced layout = layout thrashing) và thời gian script theo file.
+from datetime import datetime
+from html import escape
+from pytest_html import extras
+from selenium.common.exceptions import WebDriverException
+from tests.config import Config
+import gzip
+import json
+import os
+import pytest
+import re
+
+CACHE_KEY = "chrome_trace/slow_tests"
+SCRIPT_EVENTS = {"EvaluateScript", "FunctionCall", "v8.compile", "v8.compileModule", "TimerFire", "EventDispatch"}
+LONG_TASK_MS = 50
+
+
+def read_events(driver):
+    """Trace event mà chromedriver thu được kể từ lần đọc trước"""
+    events = []
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        if message.get("method") == "Tracing.dataCollected":
+            events.append(message["params"])
+    return events
+
+
+def save(events, name):
+    """Ghi trace (định dạng Trace Event của Chrome) vào Config.CHROME_TRACE_DIR; trả về đường dẫn"""
+    safe_name = re.sub(r"[^\w.-]+", "_", name)
+    path = os.path.join(Config.CHROME_TRACE_DIR, f"{safe_name}_{Config.TIMESTAMP}.json.gz")
+    os.makedirs(Config.CHROME_TRACE_DIR, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"traceEvents": events}, f)
+    return path
+
+
+def _main_threads(events):
+    """(pid, tid) của main thread renderer (CrRendererMain)"""
+    return {
+        (event["pid"], event["tid"]) for event in events
+        if event.get("ph") == "M" and event.get("name") == "thread_name"
+        and event.get("args", {}).get("name") == "CrRendererMain"
+    }
+
+
+def _script_url(event):
+    data = event.get("args", {}).get("data") or {}
+    return data.get("url") or data.get("fileName") or event["name"]
+
+
+def summarize(events, top=None):
+    """
+    Tóm tắt trace trên main thread renderer:
+    long tasks (RunTask > 50ms, kèm event con tốn nhiều nhất), layout (forced = gọi đồng bộ từ JS),
+    thời gian script theo file (không cộng trùng event lồng nhau).
+    """
+    top = top or Config.CHROME_TRACE_TOP
+    main = _main_threads(events)
+    complete = sorted(
+        (e for e in events if e.get("ph") == "X" and "dur" in e and (not main or (e["pid"], e["tid"]) in main)),
+        key=lambda e: (e["pid"], e["tid"], e["ts"], -e["dur"]),
+    )
+
+    tasks = [e for e in complete if e["name"] == "RunTask" and e["dur"] / 1000 > LONG_TASK_MS]
+    long_tasks = []
+    for task in sorted(tasks, key=lambda e: -e["dur"])[:top]:
+        end = task["ts"] + task["dur"]
+        children = [
+            e for e in complete
+            if e is not task and (e["pid"], e["tid"]) == (task["pid"], task["tid"])
+            and task["ts"] <= e["ts"] and e["ts"] + e["dur"] <= end and e["name"] != "RunTask"
+        ]
+        heaviest = max(children, key=lambda e: e["dur"], default=None)
+        long_tasks.append({
+            "ms": round(task["dur"] / 1000, 1),
+            "heaviest": f"{heaviest['name']} {_script_url(heaviest) if heaviest['name'] in SCRIPT_EVENTS else ''}".strip()
+            if heaviest else None,
+        })
+
+    layouts = [e for e in complete if e["name"] == "Layout"]
+    forced = [e for e in layouts if (e.get("args", {}).get("beginData") or {}).get("stackTrace")]
+    style = [e for e in complete if e["name"] in ("UpdateLayoutTree", "RecalculateStyles")]
+
+    scripts, open_until = {}, {}
+    for event in complete:
+        if event["name"] not in SCRIPT_EVENTS:
+            continue
+        thread = (event["pid"], event["tid"])
+        if event["ts"] < open_until.get(thread, 0):
+            continue  # Nằm trong một event script đã được tính
+        open_until[thread] = event["ts"] + event["dur"]
+        url = _script_url(event)
+        scripts[url] = scripts.get(url, 0.0) + event["dur"] / 1000
+
+    return {
+        "events": len(events),
+        "long_tasks": {"count": len(tasks), "total_ms": round(sum(e["dur"] for e in tasks) / 1000, 1), "top": long_tasks},
+        "layout": {
+            "count": len(layouts),
+            "total_ms": round(sum(e["dur"] for e in layouts) / 1000, 1),
+            "forced": len(forced),
+            "forced_ms": round(sum(e["dur"] for e in forced) / 1000, 1),
+            "style_recalc_ms": round(sum(e["dur"] for e in style) / 1000, 1),
+        },
+        "scripts": [
+            {"url": url, "ms": round(ms, 1)}
+            for url, ms in sorted(scripts.items(), key=lambda item: -item[1])[:top]
+        ],
+    }
+
+
+def summary_html(path, summary, report_dir=None):
+    """Bảng tóm tắt trace cho pytest-html (link tới file trace)"""
+    href = os.path.relpath(path, report_dir).replace(os.sep, "/") if report_dir else path
+    tasks = "".join(
+        f"<li>{task['ms']}ms {escape(task['heaviest'] or '')}</li>" for task in summary["long_tasks"]["top"]
+    )
+    scripts = "".join(f"<li>{script['ms']}ms {escape(script['url'])}</li>" for script in summary["scripts"])
+    layout = summary["layout"]
+    return (
+        f'<div><b>Chrome trace</b>: <a href="{escape(href)}">{escape(os.path.basename(path))}</a>'
+        f"<p>Long tasks: {summary['long_tasks']['count']} ({summary['long_tasks']['total_ms']}ms)</p><ul>{tasks}</ul>"
+        f"<p>Layout: {layout['count']} ({layout['total_ms']}ms), forced {layout['forced']} ({layout['forced_ms']}ms), "
+        f"style recalc {layout['style_recalc_ms']}ms</p>"
+        f"<p>Script:</p><ul>{scripts}</ul></div>"
+    )
+
+
+def time_budget(item):
+    """Time budget (giây) của phase call: marker time_budget(seconds) > Config.TEST_TIME_BUDGET"""
+    marker = item.get_closest_marker("time_budget")
+    return marker.args[0] if marker is not None else Config.TEST_TIME_BUDGET
+
+
+def find_driver(item):
+    return next((value for value in item.funcargs.values() if hasattr(value, "get_log")), None)
+
+
+class ChromeTracePlugin:
+    """
+    Plugin pytest (--chrome-trace auto|all): quyết định test nào được trace (driver fixture gọi wants_trace),
+    đọc trace cuối phase call, ghi test vượt time budget vào pytest cache để lần chạy lại trace tự động.
+    """
+
+    def __init__(self, config, mode="auto"):
+        self.config = config
+        self.mode = mode
+        cache = getattr(config, "cache", None)
+        self.slow_tests = cache.get(CACHE_KEY, {}) if cache is not None else {}
+        self.durations = {}
+        self.traces = []
+        self.new_slow = []
+
+    def wants_trace(self, item):
+        if self.mode == "all" or item.get_closest_marker("chrome_trace") is not None:
+            return True
+        return item.nodeid in self.slow_tests
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_call(self, item):
+        driver = find_driver(item)
+        if driver is not None and getattr(driver, "_chrome_trace", False):
+            # Bỏ phần khởi động browser / login trong setup: trace chỉ gồm thân test
+            try:
+                read_events(driver)
+            except WebDriverException:
+                pass
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        if report.when != "call":
+            return
+        budget = time_budget(item)
+        report.user_properties.append(("time_budget", budget))
+        driver = find_driver(item)
+        if driver is None or not getattr(driver, "_chrome_trace", False):
+            return
+        try:
+            events = read_events(driver)
+        except WebDriverException as e:
+            print(f"⚠️  Could not read Chrome trace: {e}")
+            return
+        path = save(events, item.name)
+        summary = summarize(events)
+        report.user_properties.append(("chrome_trace", {"path": path, "summary": summary}))
+        html_path = getattr(item.config.option, "htmlpath", None)
+        report_dir = os.path.dirname(os.path.abspath(html_path)) if html_path else None
+        report.extras = getattr(report, "extras", []) + [extras.html(summary_html(path, summary, report_dir))]
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "call":
+            return
+        properties = dict(report.user_properties)
+        self.durations[report.nodeid] = (report.duration, properties.get("time_budget"))
+        if "chrome_trace" in properties:
+            self.traces.append(dict(properties["chrome_trace"], test=report.nodeid, duration=report.duration))
+
+    def pytest_sessionfinish(self, session):
+        cache = getattr(self.config, "cache", None)
+        if hasattr(self.config, "workerinput") or cache is None:
+            return
+        slow_tests = dict(self.slow_tests)
+        for nodeid, (duration, budget) in self.durations.items():
+            if budget is not None and duration > budget:
+                slow_tests[nodeid] = {
+                    "duration": round(duration, 2), "budget": budget,
+                    "recorded": datetime.now().isoformat(timespec="seconds"),
+                }
+            else:
+                # Chạy lại trong budget: lần sau không cần trace nữa
+                slow_tests.pop(nodeid, None)
+        self.new_slow = sorted(set(slow_tests) - set(self.slow_tests))
+        cache.set(CACHE_KEY, slow_tests)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.traces and not self.new_slow:
+            return
+        terminalreporter.section("chrome traces")
+        for trace in self.traces:
+            summary = trace["summary"]
+            terminalreporter.write_line(f"{trace['test']} ({trace['duration']:.2f}s) → {trace['path']}")
+            terminalreporter.write_line(
+                f"  long tasks {summary['long_tasks']['count']} ({summary['long_tasks']['total_ms']}ms), "
+                f"layout {summary['layout']['count']} ({summary['layout']['total_ms']}ms, "
+                f"forced {summary['layout']['forced']}), "
+                f"top script: {summary['scripts'][0]['url'] if summary['scripts'] else '-'}"
+            )
+        for nodeid in self.new_slow:
+            terminalreporter.write_line(f"🐢 {nodeid} vượt time budget: lần chạy sau sẽ được trace tự động")
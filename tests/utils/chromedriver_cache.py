@@ -0,0 +1,116 @@
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+from tests.config import Config
+import json
+import os
+import time
+
+# Version Chrome + đường dẫn đã resolve trong process hiện tại (tránh chạy lại mỗi test)
+_chrome_major = None
+_resolved = {}
+
+# Thống kê để in cuối session
+stats = {
+    "source": None,         # memory | disk | network | env
+    "lookups": 0,
+    "lookup_time": 0.0,
+    "install_time": None,   # thời gian ChromeDriverManager().install() lúc pin
+}
+
+
+def _cache_file():
+    return os.path.join(Config.DRIVER_CACHE_DIR, "chromedriver.json")
+
+
+def _load_cache():
+    try:
+        with open(_cache_file(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache):
+    os.makedirs(Config.DRIVER_CACHE_DIR, exist_ok=True)
+    tmp_path = _cache_file() + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, _cache_file())
+
+
+def get_chrome_major_version():
+    """Lấy major version của Chrome đã cài (chỉ đọc local, không dùng mạng); None nếu không xác định được"""
+    try:
+        version = OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception:
+        version = None
+    return version.split(".")[0] if version else None
+
+
+def resolve_chromedriver(refresh=False):
+    """
+    Trả về đường dẫn chromedriver đã pin cho Chrome major version hiện tại.
+    Chỉ gọi ChromeDriverManager().install() (cần mạng) khi chưa có cache hoặc refresh=True.
+    """
+    start = time.perf_counter()
+    stats["lookups"] += 1
+    try:
+        override = os.environ.get("CHROMEDRIVER_PATH")
+        if override:
+            stats["source"] = "env"
+            return override
+
+        global _chrome_major
+        if refresh or _chrome_major is None:
+            _chrome_major = get_chrome_major_version()
+        major = _chrome_major
+        if not refresh and major in _resolved:
+            stats["source"] = stats["source"] or "memory"
+            return _resolved[major]
+
+        if major is None:
+            # Không biết version thì không pin được: pin theo key chung sẽ sống qua mọi lần nâng cấp Chrome
+            print("⚠️  Could not detect Chrome version, resolving chromedriver without pinning")
+            install_start = time.perf_counter()
+            path = ChromeDriverManager().install()
+            stats["source"] = "network"
+            stats["install_time"] = time.perf_counter() - install_start
+            _resolved[major] = path
+            return path
+
+        cache = _load_cache()
+        entry = cache.get(major)
+        if not refresh and entry and os.path.exists(entry["path"]):
+            stats["source"] = "disk"
+            stats["install_time"] = entry.get("install_time")
+            _resolved[major] = entry["path"]
+            return entry["path"]
+
+        install_start = time.perf_counter()
+        path = ChromeDriverManager().install()
+        install_time = time.perf_counter() - install_start
+        cache[major] = {"path": path, "install_time": round(install_time, 3)}
+        _save_cache(cache)
+
+        stats["source"] = "network"
+        stats["install_time"] = install_time
+        _resolved[major] = path
+        return path
+    finally:
+        stats["lookup_time"] += time.perf_counter() - start
+
+
+def summary_lines(stats=stats):
+    """Các dòng tóm tắt thời gian resolve chromedriver để in cuối session (stats: mặc định của process này)"""
+    if not stats["lookups"]:
+        return []
+    avg_lookup = stats["lookup_time"] / stats["lookups"]
+    lines = [
+        f"chromedriver source: {stats['source']} ({stats['lookups']} lookups, avg {avg_lookup * 1000:.1f}ms)",
+    ]
+    if stats["install_time"]:
+        saved = stats["install_time"] - avg_lookup
+        lines.append(
+            f"pinned install took {stats['install_time']:.2f}s; saved ~{saved:.2f}s per browser start"
+        )
+    return lines
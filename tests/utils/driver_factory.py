@@ -0,0 +1,263 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+from urllib.parse import urlparse
+from tests.config import Config
+from tests.utils.chromedriver_cache import resolve_chromedriver
+from tests.utils import wait_policy
+from functools import partial
+import threading
+import time
+
+# Các loại storage bị xóa giữa 2 test (CDP Storage.clearDataForOrigin); CDP không có loại cho sessionStorage
+RESET_STORAGE_TYPES = "local_storage,indexeddb,websql,cache_storage,service_workers"
+
+# sessionStorage gắn với tab: xóa bằng JS khi tab còn ở trang của app (trước khi về about:blank)
+CLEAR_SESSION_STORAGE_SCRIPT = "if (location.origin === arguments[0]) sessionStorage.clear();"
+
+# default: Chrome desktop như trước (Config.HEADLESS, maximized); fast: headless tối ưu tốc độ
+BROWSER_PROFILES = Config.BROWSER_PROFILES
+
+# Flag của profile fast: không throttle tab nền, không extension/sync, video tự play không cần click
+FAST_PROFILE_ARGUMENTS = (
+    "--headless=new",
+    "--autoplay-policy=no-user-gesture-required",
+    "--mute-audio",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-extensions",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--no-first-run",
+)
+
+
+def build_chrome_options(profile="default"):
+    """Tạo ChromeOptions dùng chung cho tất cả test module theo browser profile"""
+    if profile not in BROWSER_PROFILES:
+        raise ValueError(f"Unknown browser profile '{profile}', expected one of {BROWSER_PROFILES}")
+    options = webdriver.ChromeOptions()
+    if profile == "fast":
+        for argument in FAST_PROFILE_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_argument(f"--window-size={Config.WINDOW_SIZE}")
+    else:
+        if Config.HEADLESS:
+            options.add_argument("--headless")
+        options.add_argument("--start-maximized")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+
+    # Disable browser popups/notifications and password manager prompts
+    prefs = {
+        "profile.password_manager_leak_detection": False,
+        "profile.password_manager_enabled": False,
+        "credentials_enable_service": False,
+        "safebrowsing.enabled": False,
+        # Block site notification prompts completely
+        "profile.default_content_setting_values.notifications": 2,
+    }
+    if profile == "fast" and Config.FAST_PROFILE_BLOCK_IMAGES:
+        prefs["profile.managed_default_content_settings.images"] = 2
+    options.add_experimental_option("prefs", prefs)
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_argument("--disable-notifications")
+    options.add_argument("--no-default-browser-check")
+    options.add_argument("--disable-save-password-bubble")
+    options.add_argument("--disable-infobars")
+    return options
+
+
+def enable_tracing(options, categories=None):
+    """Bật tracing của chromedriver: trace event đọc qua driver.get_log('performance')"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {
+        "enableNetwork": False,
+        "enablePage": False,
+        "traceCategories": categories or Config.CHROME_TRACE_CATEGORIES,
+    })
+    return options
+
+
+def create_driver(profile="default", trace=False):
+    """Khởi động một Chrome driver mới; trace=True bật Chrome tracing (tests/utils/chrome_trace.py)"""
+    options = build_chrome_options(profile)
+    if trace:
+        enable_tracing(options)
+    driver = webdriver.Chrome(
+        service=Service(resolve_chromedriver()),
+        options=options
+    )
+    wait_policy.apply(driver)
+    driver._browser_profile = profile
+    driver._chrome_trace = trace
+    return driver
+
+
+def get_browser_memory_mb(driver):
+    """
+    Bộ nhớ browser: RSS của chromedriver + các process Chrome (cần psutil),
+    không có psutil thì dùng JS heap của trang hiện tại. Trả về (MB, nguồn) hoặc (None, None).
+    """
+    try:
+        import psutil
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / 2**20, "rss"
+    except ImportError:
+        pass
+    except Exception:
+        return None, None
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        heap = next(m["value"] for m in metrics if m["name"] == "JSHeapUsedSize")
+        return heap / 2**20, "js_heap"
+    except (WebDriverException, StopIteration, KeyError):
+        return None, None
+
+
+def add_new_document_script(driver, source):
+    """Đăng ký script chạy trước code của app trên mọi trang mới; bị gỡ khi reset browser"""
+    result = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": source})
+    if not hasattr(driver, "_new_document_scripts"):
+        driver._new_document_scripts = []
+    driver._new_document_scripts.append(result["identifier"])
+    return result["identifier"]
+
+
+def remove_new_document_script(driver, identifier):
+    """Gỡ một script đã đăng ký bằng add_new_document_script"""
+    driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": identifier})
+    driver._new_document_scripts.remove(identifier)
+
+
+def remove_new_document_scripts(driver):
+    """Gỡ toàn bộ script đã đăng ký bằng add_new_document_script"""
+    for identifier in list(getattr(driver, "_new_document_scripts", [])):
+        remove_new_document_script(driver, identifier)
+
+
+def reset_driver(driver):
+    """Đưa browser về trạng thái sạch: đóng tab phụ, xóa cookies + storage (kể cả sessionStorage), về about:blank"""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    remove_new_document_scripts(driver)
+
+    app_url = urlparse(Config.BASE_URL)
+    app_origin = f"{app_url.scheme}://{app_url.netloc}"
+    driver.execute_script(CLEAR_SESSION_STORAGE_SCRIPT, app_origin)
+
+    # Rời khỏi app trước để app không ghi lại localStorage sau khi xóa
+    driver.get("about:blank")
+
+    driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+        "origin": app_origin,
+        "storageTypes": RESET_STORAGE_TYPES,
+    })
+    # Network.clearBrowserCookies xóa cookies của mọi domain (kể cả API backend)
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    wait_policy.apply(driver)
+
+
+def pool_summary_lines(stats):
+    """Các dòng tóm tắt từ DriverPool.stats (của một pool hoặc cộng dồn từ nhiều worker)"""
+    started = stats.get("started", 0)
+    reused = stats.get("reused", 0)
+    avg_startup = stats.get("startup_time", 0.0) / started if started else 0.0
+    # Nếu không có pool, mỗi lần reuse sẽ là một lần khởi động browser mới
+    saved = reused * avg_startup - stats.get("reset_time", 0.0)
+    return [
+        f"browsers started: {started} (avg startup {avg_startup:.2f}s, total {stats.get('startup_time', 0.0):.2f}s)",
+        f"browsers reused:  {reused} (total reset {stats.get('reset_time', 0.0):.2f}s)",
+        f"discarded:        {stats.get('discarded', 0)}",
+        f"estimated time saved vs. one browser per test: {saved:.2f}s",
+    ]
+
+
+class DriverPool:
+    """
+    Pool các Chrome driver đã khởi động sẵn, dùng chung cho cả session.
+    Mỗi test mượn một browser (acquire) và trả lại sau khi xong (release);
+    browser được reset nhẹ thay vì quit + khởi động lại.
+    """
+
+    def __init__(self, size=None, factory=None, profile="default"):
+        self.size = size or Config.DRIVER_POOL_SIZE
+        self.profile = profile
+        self.factory = factory or partial(create_driver, profile)
+        self._idle = []
+        self._lock = threading.Lock()
+        self.stats = {
+            "started": 0,
+            "reused": 0,
+            "discarded": 0,
+            "startup_time": 0.0,
+            "reset_time": 0.0,
+        }
+
+    def create(self, **options):
+        """Khởi động browser mới (options truyền cho factory, vd. trace=True) và ghi nhận thời gian khởi động"""
+        start = time.perf_counter()
+        driver = self.factory(**options)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.stats["started"] += 1
+            self.stats["startup_time"] += elapsed
+        return driver
+
+    def acquire(self):
+        """Mượn một browser từ pool (khởi động mới nếu pool đang trống)"""
+        with self._lock:
+            driver = self._idle.pop() if self._idle else None
+            if driver is not None:
+                self.stats["reused"] += 1
+        return driver if driver is not None else self.create()
+
+    def release(self, driver):
+        """Reset browser và trả về pool; browser lỗi hoặc thừa sẽ bị quit"""
+        start = time.perf_counter()
+        try:
+            reset_driver(driver)
+        except WebDriverException as e:
+            print(f"⚠️  Browser reset failed, discarding: {e}")
+            self.discard(driver)
+            return
+        finally:
+            with self._lock:
+                self.stats["reset_time"] += time.perf_counter() - start
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(driver)
+                return
+        driver.quit()
+
+    def discard(self, driver):
+        """Bỏ browser khỏi pool (dùng cho test làm bẩn browser)"""
+        with self._lock:
+            self.stats["discarded"] += 1
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    def close(self):
+        """Quit toàn bộ browser còn trong pool"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+
+    def summary_lines(self):
+        """Các dòng tóm tắt thời gian khởi động / reset để in cuối session"""
+        return pool_summary_lines(self.stats)
@@ -0,0 +1,118 @@
+# Dựng báo cáo HTML "live" từ results.jsonl: chỉ đọc các dòng mới kể từ lần trước,
+# trang tự reload để xem lần chạy đang diễn ra.
+from html import escape
+import json
+import os
+import time
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8"/>
+{refresh}<title>TopTop tests - live</title>
+<style>
+body {{ font-family: Helvetica, Arial, sans-serif; font-size: 13px; }}
+table {{ border-collapse: collapse; width: 100%; }}
+td, th {{ border: 1px solid #e6e6e6; padding: 4px 8px; text-align: left; vertical-align: top; }}
+.passed {{ color: green; }} .failed, .error {{ color: red; }} .skipped {{ color: orange; }}
+.phases {{ color: #777; font-size: 11px; }}
+</style>
+</head>
+<body>
+<h1>TopTop tests {status}</h1>
+<p>{summary}</p>
+<table>
+<tr><th>#</th><th>Test</th><th>Kết quả</th><th>Thời gian</th><th>Worker</th><th>Phase</th><th>Screenshots</th></tr>
+{rows}
+</table>
+</body>
+</html>
+"""
+
+
+class LiveReportRenderer:
+    """Đọc tiếp results.jsonl từ vị trí đã đọc, thêm dòng mới vào bảng và ghi lại file HTML"""
+
+    def __init__(self, log_path, html_path, refresh_seconds=2):
+        self.log_path = log_path
+        self.html_path = html_path
+        self.refresh_seconds = refresh_seconds
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._rows = []
+        self._counts = {}
+        self.collected = None
+        self.finished = None
+
+    def _row(self, record):
+        phases = record.get("phases") or {}
+        top = sorted(phases.get("phases", {}).items(), key=lambda item: -item[1])[:3]
+        html_dir = os.path.dirname(os.path.abspath(self.html_path))
+        links = " ".join(
+            f'<a href="{escape(os.path.relpath(s["path"], html_dir))}" target="_blank">{escape(s["name"])}</a>'
+            for s in record.get("screenshots", [])
+        )
+        error = f'<div class="failed">{escape(record["error"])}</div>' if record.get("error") else ""
+        return (
+            f"<tr><td>{len(self._rows) + 1}</td><td>{escape(record['test'])}{error}</td>"
+            f"<td class=\"{record['outcome']}\">{record['outcome']}</td><td>{record['duration']:.2f}s</td>"
+            f"<td>{escape(record.get('worker') or '-')}</td>"
+            f"<td class=\"phases\">{', '.join(f'{name} {seconds:.2f}s' for name, seconds in top)}</td>"
+            f"<td>{links}</td></tr>"
+        )
+
+    def update(self):
+        """Đọc các dòng mới; trả về số test mới. Dòng chưa ghi xong (không có newline) để lần sau."""
+        if not os.path.exists(self.log_path):
+            return 0
+        if os.path.getsize(self.log_path) < self._offset:
+            # File bị ghi lại từ đầu (lần chạy mới)
+            self._reset()
+        with open(self.log_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+
+        added = 0
+        for line in complete.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            event = record.get("event")
+            if event == "collected":
+                self.collected = record["count"]
+            elif event == "session_finish":
+                self.finished = record
+            elif event == "test":
+                self._rows.append(self._row(record))
+                self._counts[record["outcome"]] = self._counts.get(record["outcome"], 0) + 1
+                added += 1
+        if added or self.finished:
+            self.write()
+        return added
+
+    def write(self):
+        done = len(self._rows)
+        progress = f"{done}/{self.collected}" if self.collected else str(done)
+        counts = ", ".join(f"{outcome} {count}" for outcome, count in sorted(self._counts.items()))
+        page = PAGE_TEMPLATE.format(
+            refresh="" if self.finished else f'<meta http-equiv="refresh" content="{self.refresh_seconds}"/>\n',
+            status="(xong)" if self.finished else "(đang chạy...)",
+            summary=f"{progress} tests. {counts}",
+            rows="\n".join(self._rows),
+        )
+        tmp_path = f"{self.html_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(page)
+        os.replace(tmp_path, self.html_path)
+
+    def watch(self, interval=1.0):
+        """Theo dõi log tới khi session kết thúc (dùng từ terminal khác trong lúc chạy test)"""
+        while True:
+            self.update()
+            if self.finished:
+                return self.finished
+            time.sleep(interval)
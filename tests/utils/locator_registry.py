@@ -0,0 +1,170 @@
+# Registry locator cho các element logic có nhiều cách tìm (vd. thông báo lỗi của form):
+# mỗi element khai báo danh sách strategy theo thứ tự ưu tiên, BasePage.locate đánh giá tất cả
+# trong một lệnh execute_script và dùng strategy đầu tiên khớp. Strategy thắng được nhớ lại
+# (cả giữa các lần chạy, qua Config.LOCATOR_REGISTRY_PATH) để lần sau được thử trước;
+# thống kê hit/miss của từng strategy được ghi vào JSON, báo cáo HTML và terminal.
+from datetime import datetime
+from html import escape
+from tests.config import Config
+import json
+import os
+import pytest
+
+_strategies = {}
+_winners = {}
+_lookups = None
+
+
+def register(name, *strategies):
+    """Khai báo element logic `name` với các strategy (By, value) theo thứ tự; trả về name để gán vào page object"""
+    _strategies[name] = tuple(tuple(strategy) for strategy in strategies)
+    return name
+
+
+def strategies(name):
+    return _strategies[name]
+
+
+def order(name):
+    """Thứ tự thử: strategy thắng lần trước (nếu có) rồi tới thứ tự khai báo"""
+    indexes = list(range(len(_strategies[name])))
+    winner = tuple(_winners.get(name) or ())
+    if winner in _strategies[name]:
+        index = _strategies[name].index(winner)
+        indexes.remove(index)
+        indexes.insert(0, index)
+    return indexes
+
+
+def record(name, winner, matched):
+    """Ghi nhận một lần tìm: winner = index strategy được dùng (-1 nếu không tìm thấy), matched = các index khớp"""
+    if winner >= 0:
+        # Nhớ theo (By, value) thay vì index để không lệch khi danh sách strategy thay đổi
+        _winners[name] = list(_strategies[name][winner])
+    if _lookups is not None:
+        _lookups.append({
+            "name": name, "strategies": [list(strategy) for strategy in _strategies[name]],
+            "winner": winner, "matched": list(matched),
+        })
+
+
+def load_winners(path=None):
+    """Nạp strategy thắng của lần chạy trước"""
+    try:
+        with open(path or Config.LOCATOR_REGISTRY_PATH, encoding="utf-8") as f:
+            _winners.update(json.load(f)["winners"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+
+def start():
+    global _lookups
+    _lookups = []
+
+
+def finish():
+    global _lookups
+    lookups, _lookups = _lookups, None
+    return lookups or []
+
+
+def aggregate(lookups):
+    """{name: {lookups, found, strategies: [{by, value, hits, misses, used}]}} từ danh sách lần tìm"""
+    stats = {}
+    for lookup in lookups:
+        name = lookup["name"]
+        if name not in stats:
+            stats[name] = {
+                "lookups": 0, "found": 0,
+                "strategies": [{"by": by, "value": value, "hits": 0, "misses": 0, "used": 0}
+                               for by, value in lookup["strategies"]],
+            }
+        entry = stats[name]
+        entry["lookups"] += 1
+        if lookup["winner"] >= 0:
+            entry["found"] += 1
+            entry["strategies"][lookup["winner"]]["used"] += 1
+        for index, strategy in enumerate(entry["strategies"]):
+            strategy["hits" if index in lookup["matched"] else "misses"] += 1
+    return stats
+
+
+def _strategy_label(strategy):
+    return f"{strategy['by']}={strategy['value']}"
+
+
+class LocatorRegistryPlugin:
+    """
+    Plugin pytest: process chạy test gửi các lần tìm của từng test qua report.user_properties
+    (hoạt động cả với xdist), process chính tổng hợp hit/miss và lưu strategy thắng cho lần chạy sau.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.lookups = []
+        self.winners = {}
+        self.stats = {}
+        load_winners()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        start()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_makereport(self, item, call):
+        if call.when == "teardown":
+            lookups = finish()
+            if lookups:
+                item.user_properties.append(("locator_lookups", lookups))
+        return None
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "teardown":
+            return
+        for key, value in report.user_properties:
+            if key == "locator_lookups":
+                self.lookups.extend(value)
+                self.winners.update({
+                    lookup["name"]: lookup["strategies"][lookup["winner"]] for lookup in value if lookup["winner"] >= 0
+                })
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.lookups:
+            return
+        self.stats = aggregate(self.lookups)
+        winners = dict(_winners, **self.winners)
+        os.makedirs(os.path.dirname(Config.LOCATOR_REGISTRY_PATH), exist_ok=True)
+        with open(Config.LOCATOR_REGISTRY_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "updated": datetime.now().isoformat(timespec="seconds"),
+                "winners": winners,
+                "stats": self.stats,
+            }, f, indent=2, ensure_ascii=False)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_html_results_summary(self, prefix, summary, postfix, session):
+        if not self.stats:
+            return
+        rows = "".join(
+            f"<tr><td>{escape(name)}</td><td>{escape(_strategy_label(strategy))}</td>"
+            f"<td>{strategy['used']}</td><td>{strategy['hits']}</td><td>{strategy['misses']}</td></tr>"
+            for name, entry in sorted(self.stats.items()) for strategy in entry["strategies"]
+        )
+        postfix.append(
+            "<h2>Locator registry (hit / miss theo strategy)</h2>"
+            "<table><tr><th>Element</th><th>Strategy</th><th>Used</th><th>Hits</th><th>Misses</th></tr>"
+            f"{rows}</table>"
+        )
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.stats:
+            return
+        terminalreporter.section("locator registry")
+        for name, entry in sorted(self.stats.items()):
+            terminalreporter.write_line(f"{name}: found {entry['found']}/{entry['lookups']}")
+            for strategy in entry["strategies"]:
+                terminalreporter.write_line(
+                    f"  used {strategy['used']:3d}  hit {strategy['hits']:3d}  miss {strategy['misses']:3d}  "
+                    f"{_strategy_label(strategy)}"
+                )
+        terminalreporter.write_line(f"winners: {Config.LOCATOR_REGISTRY_PATH}")
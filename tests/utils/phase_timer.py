@@ -0,0 +1,218 @@
+# Đo thời gian từng phase của mỗi test (driver startup, login, navigation, lệnh WebDriver,
+# explicit wait, screenshot), xuất JSON và so sánh với baseline.
+# Chỉ đo qua driver.execute đã bọc (instrument_driver) và các wait của page object
+# (BasePage.wait_*, wait_policy.ExplicitWait), không patch time.sleep / WebDriverWait.
+from contextlib import contextmanager
+from datetime import datetime
+from selenium.webdriver.remote.command import Command
+from tests.config import Config
+import pytest
+import json
+import os
+import threading
+import time
+
+PHASES = ("driver_startup", "login", "navigation", "webdriver", "explicit_wait", "screenshot", "driver_reset")
+NAVIGATION_COMMANDS = {Command.GET, Command.GO_BACK, Command.GO_FORWARD, Command.REFRESH}
+SCREENSHOT_COMMANDS = {Command.SCREENSHOT, Command.ELEMENT_SCREENSHOT}
+
+_current = None
+_depth = 0
+_main_thread = threading.main_thread()
+
+
+def start(nodeid):
+    global _current, _depth
+    _current = {"test": nodeid, "start": time.perf_counter(), "phases": {}, "commands": 0, "commands_saved": 0}
+    _depth = 0
+
+
+def finish():
+    """Kết thúc test hiện tại; trả về {total, phases, commands, commands_saved} (phase 'other' = phần còn lại)"""
+    global _current
+    if _current is None:
+        return None
+    data, _current = _current, None
+    total = time.perf_counter() - data["start"]
+    phases = {name: round(seconds, 4) for name, seconds in data["phases"].items()}
+    phases["other"] = round(max(0.0, total - sum(data["phases"].values())), 4)
+    return {"total": round(total, 4), "phases": phases, "commands": data["commands"],
+            "commands_saved": data["commands_saved"]}
+
+
+def _recording():
+    return _current is not None and threading.current_thread() is _main_thread
+
+
+def count_saved_commands(count):
+    """Ghi nhận số lệnh WebDriver tránh được (vd. BasePage.snapshot thay cho đọc từng element)"""
+    if _recording():
+        _current["commands_saved"] += count
+
+
+@contextmanager
+def phase(name):
+    """Cộng thời gian vào phase; phase lồng bên trong phase khác được tính cho phase ngoài cùng"""
+    global _depth
+    if not _recording() or _depth:
+        yield
+        return
+    _depth += 1
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        _depth -= 1
+        if _current is not None:
+            _current["phases"][name] = _current["phases"].get(name, 0.0) + time.perf_counter() - begin
+
+
+def _classify(command):
+    if command in NAVIGATION_COMMANDS:
+        return "navigation"
+    if command in SCREENSHOT_COMMANDS:
+        return "screenshot"
+    return "webdriver"
+
+
+def instrument_driver(driver):
+    """Bọc driver.execute để đo mọi lệnh WebDriver (WebElement cũng đi qua driver.execute)"""
+    if getattr(driver, "_phase_instrumented", False):
+        return driver
+    original = driver.execute
+
+    def execute(driver_command, params=None):
+        if _recording():
+            _current["commands"] += 1
+        with phase(_classify(driver_command)):
+            return original(driver_command, params)
+
+    driver.execute = execute
+    driver._phase_instrumented = True
+    return driver
+
+
+def compare(current, baseline, threshold, min_seconds):
+    """
+    Các test có total hoặc phase chậm hơn baseline quá threshold (tỉ lệ)
+    và quá min_seconds (bỏ qua dao động nhỏ).
+    """
+    regressions = []
+    for nodeid, data in sorted(current.items()):
+        base = baseline.get(nodeid)
+        if base is None:
+            continue
+        pairs = [("total", data["total"], base["total"])]
+        for name in sorted(set(data["phases"]) | set(base["phases"])):
+            pairs.append((name, data["phases"].get(name, 0.0), base["phases"].get(name, 0.0)))
+        for name, new, old in pairs:
+            delta = new - old
+            if delta > min_seconds and (old == 0 or delta / old > threshold):
+                regressions.append({"test": nodeid, "phase": name, "baseline": old, "current": new})
+    return regressions
+
+
+def load_report(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["tests"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_report(path, tests, regressions=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "phases": list(PHASES) + ["other"],
+            "tests": tests,
+            "regressions": regressions or [],
+        }, f, indent=2, ensure_ascii=False)
+
+
+class PhaseTimingPlugin:
+    """
+    Plugin pytest: đo phase trong process chạy test, gửi kết quả qua report.user_properties
+    (hoạt động cả với xdist), process chính ghi JSON và so sánh baseline cuối session.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.results = {}
+        self.outcomes = {}
+        self.regressions = []
+        self.baseline = None
+        self.baseline_path = config.getoption("--phase-baseline") or Config.PHASE_BASELINE_PATH
+        threshold = config.getoption("--phase-threshold")
+        self.threshold = Config.PHASE_REGRESSION_THRESHOLD if threshold is None else threshold
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        start(item.nodeid)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_makereport(self, item, call):
+        if call.when != "teardown":
+            return None
+        data = finish()
+        if data is not None:
+            item.user_properties.append(("phase_timings", data))
+        return None
+
+    def pytest_runtest_logreport(self, report):
+        if report.when == "call" or (report.when == "setup" and report.outcome != "passed"):
+            self.outcomes[report.nodeid] = report.outcome
+        if report.when == "teardown":
+            for key, value in report.user_properties:
+                if key == "phase_timings":
+                    self.results[report.nodeid] = dict(value, outcome=self.outcomes.get(report.nodeid))
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.results:
+            return
+        self.baseline = baseline = load_report(self.baseline_path)
+        if baseline is not None:
+            self.regressions = compare(self.results, baseline, self.threshold, Config.PHASE_REGRESSION_MIN_SECONDS)
+        write_report(Config.PHASE_REPORT_PATH, self.results, self.regressions)
+        if self.config.getoption("--phase-save-baseline"):
+            write_report(self.baseline_path, self.results)
+        if self.regressions and self.config.getoption("--phase-gate") and session.exitstatus == 0:
+            session.exitstatus = 1
+
+    def command_lines(self):
+        """Số lệnh WebDriver của các test dùng snapshot: số lệnh tránh được, so với baseline nếu có"""
+        lines = []
+        for nodeid, data in sorted(self.results.items()):
+            saved = data.get("commands_saved", 0)
+            if not saved:
+                continue
+            line = f"🔽 {nodeid}: {data['commands']} commands, ~{saved} avoided by snapshot " \
+                   f"({-saved / (data['commands'] + saved) * 100:.0f}%)"
+            base = (self.baseline or {}).get(nodeid)
+            if base is not None and base.get("commands"):
+                line += f", baseline {base['commands']} → {data['commands']}"
+            lines.append(line)
+        return lines
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.results:
+            return
+        terminalreporter.section("phase timings")
+        totals = {}
+        for data in self.results.values():
+            for name, seconds in data["phases"].items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        grand_total = sum(data["total"] for data in self.results.values())
+        for name, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+            share = seconds / grand_total * 100 if grand_total else 0
+            terminalreporter.write_line(f"{name:<15} {seconds:8.2f}s  {share:5.1f}%")
+        terminalreporter.write_line(f"report: {Config.PHASE_REPORT_PATH}")
+        for line in self.command_lines():
+            terminalreporter.write_line(line)
+        for regression in self.regressions:
+            terminalreporter.write_line(
+                f"⚠️  REGRESSION {regression['test']} [{regression['phase']}] "
+                f"{regression['baseline']:.2f}s → {regression['current']:.2f}s",
+                red=True,
+            )
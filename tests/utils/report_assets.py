@@ -0,0 +1,96 @@
+# Screenshot trong báo cáo HTML.
+# - external (mặc định): ảnh được copy vào assets/screenshots/ cạnh report, thumbnail sinh song song
+#   bằng process pool; report chỉ tải thumbnail (lazy), ảnh gốc chỉ tải khi click.
+# - self-contained (--self-contained-html): ảnh nhúng base64 vào report để gửi đi một file duy nhất.
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from pytest_html import extras
+from tests.config import Config
+import base64
+import os
+import shutil
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow không bắt buộc: không có thì dùng ảnh gốc (thu nhỏ bằng CSS) làm thumbnail
+    Image = None
+
+
+def make_thumbnail(source, target, width):
+    """Thumbnail rộng tối đa width px (chạy trong process pool)"""
+    with Image.open(source) as image:
+        image.thumbnail((width, width * 10))
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        image.save(tmp_path, format="PNG", optimize=True)
+    os.replace(tmp_path, target)
+    return target
+
+
+class ReportAssets:
+    """Tạo extra cho pytest-html từ screenshot trong store theo chế độ của report"""
+
+    def __init__(self, report_path, self_contained=False):
+        self.report_dir = os.path.dirname(os.path.abspath(report_path))
+        self.assets_dir = os.path.join(self.report_dir, Config.REPORT_SCREENSHOT_DIR)
+        self.self_contained = self_contained
+        self._executor = None
+        self._futures = []
+        self._submitted = set()
+        self.stats = {"images": 0, "thumbnails": 0}
+
+    def _thumbnail(self, full_path):
+        if Image is None:
+            return full_path
+        thumb_path = full_path[:-len(".png")] + ".thumb.png"
+        if thumb_path not in self._submitted and not os.path.exists(thumb_path):
+            self._submitted.add(thumb_path)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=Config.REPORT_THUMBNAIL_WORKERS)
+            self._futures.append(
+                self._executor.submit(make_thumbnail, full_path, thumb_path, Config.REPORT_THUMBNAIL_WIDTH)
+            )
+            self.stats["thumbnails"] += 1
+        return thumb_path
+
+    def extra_for(self, blob_path):
+        """Extra pytest-html cho một screenshot (blob trong screenshot store)"""
+        name = os.path.basename(blob_path)
+        self.stats["images"] += 1
+        if self.self_contained:
+            with open(blob_path, "rb") as f:
+                return extras.image(base64.b64encode(f.read()).decode("ascii"), name=name)
+
+        # Blob content-addressed: cùng tên = cùng nội dung, chỉ copy một lần
+        full_path = os.path.join(self.assets_dir, name)
+        if not os.path.exists(full_path):
+            os.makedirs(self.assets_dir, exist_ok=True)
+            tmp_path = f"{full_path}.{os.getpid()}.tmp"
+            shutil.copyfile(blob_path, tmp_path)
+            os.replace(tmp_path, full_path)
+        thumb_path = self._thumbnail(full_path)
+
+        full_src = escape(os.path.relpath(full_path, self.report_dir).replace(os.sep, "/"))
+        thumb_src = escape(os.path.relpath(thumb_path, self.report_dir).replace(os.sep, "/"))
+        return extras.html(
+            f'<a href="{full_src}" target="_blank">'
+            f'<img src="{thumb_src}" loading="lazy" width="{Config.REPORT_THUMBNAIL_WIDTH}" alt="{escape(name)}"/>'
+            f"</a>"
+        )
+
+    def close(self):
+        """Đợi các thumbnail sinh xong"""
+        for future in self._futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️  Could not create thumbnail: {e}")
+        self._futures = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def summary_lines(self):
+        if self.self_contained:
+            return [f"self-contained: {self.stats['images']} screenshots embedded"]
+        thumbnails = f"{self.stats['thumbnails']} thumbnails" if Image is not None else "no Pillow, full images as thumbnails"
+        return [f"external: {self.stats['images']} screenshots in {self.assets_dir} ({thumbnails})"]
@@ -0,0 +1,84 @@
+# Ghi kết quả từng test ra JSONL ngay khi test kết thúc (outcome, phase timings, screenshot),
+# để theo dõi lần chạy đang diễn ra (xem tests/utils/live_report.py).
+from datetime import datetime
+from tests.config import Config
+from tests.utils.live_report import LiveReportRenderer
+import json
+import os
+import pytest
+
+
+class ResultsLogPlugin:
+    """
+    Plugin pytest: process chính (cả khi chạy xdist) append một dòng JSON cho mỗi test ở teardown.
+    Dòng đầu / cuối là sự kiện session_start / session_finish.
+    """
+
+    def __init__(self, config, path=None, live_report=None):
+        self.config = config
+        self.path = path or Config.RESULTS_LOG_PATH
+        self.renderer = LiveReportRenderer(self.path, live_report) if live_report else None
+        self.outcomes = {}
+        self.collected_reported = False
+
+    def _append(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self.renderer is not None:
+            self.renderer.update()
+
+    def pytest_sessionstart(self, session):
+        if hasattr(self.config, "workerinput"):
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        open(self.path, "w", encoding="utf-8").close()
+        self._append({"event": "session_start", "time": datetime.now().isoformat(timespec="seconds")})
+
+    def pytest_collection_finish(self, session):
+        if not hasattr(self.config, "workerinput") and session.items:
+            self._append({"event": "collected", "count": len(session.items)})
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_node_collection_finished(self, node, ids):
+        # xdist: process chính không tự collect, lấy số test từ worker đầu tiên
+        if not self.collected_reported:
+            self.collected_reported = True
+            self._append({"event": "collected", "count": len(ids)})
+
+    def pytest_runtest_logreport(self, report):
+        if hasattr(self.config, "workerinput"):
+            return
+        if report.when == "call" or (report.when == "setup" and report.outcome != "passed"):
+            self.outcomes[report.nodeid] = report
+        if report.when == "teardown" and report.failed:
+            # Lỗi ở teardown (vd. fixture dọn dẹp) được ưu tiên ghi lại
+            self.outcomes[report.nodeid] = report
+        if report.when != "teardown":
+            return
+
+        result = self.outcomes.pop(report.nodeid, report)
+        properties = dict(report.user_properties)
+        record = {
+            "event": "test",
+            "test": report.nodeid,
+            "outcome": result.outcome,
+            "when": result.when,
+            "duration": round(result.duration, 3),
+            "worker": getattr(report, "node", None) and report.node.gateway.id,
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "phases": properties.get("phase_timings"),
+            "screenshots": [
+                {"name": entry["name"], "blob": entry["blob"], "path": entry["path"]}
+                for entry in properties.get("screenshots", [])
+            ],
+        }
+        if result.failed and result.longrepr:
+            crash = getattr(result.longrepr, "reprcrash", None)
+            record["error"] = crash.message if crash is not None else str(result.longrepr).strip().splitlines()[-1]
+        self._append(record)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if hasattr(self.config, "workerinput"):
+            return
+        self._append({"event": "session_finish", "exitstatus": int(exitstatus),
+                      "time": datetime.now().isoformat(timespec="seconds")})
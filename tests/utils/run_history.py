@@ -0,0 +1,191 @@
+# Lịch sử các lần chạy trong SQLite (Config.RUN_HISTORY_DB): outcome, thời gian, lỗi của từng test theo run,
+# dùng để tìm test flaky, test chậm nhất / xu hướng p95 và test chậm đi kể từ một commit.
+from contextlib import closing
+from datetime import datetime
+from tests.config import Config
+from tests.utils.stats import percentile
+import json
+import os
+import sqlite3
+import subprocess
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT,
+    finished TEXT,
+    git_commit TEXT,
+    exitstatus INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    test TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL,
+    message TEXT,
+    PRIMARY KEY (run_id, test)
+);
+CREATE INDEX IF NOT EXISTS results_test ON results(test);
+"""
+
+
+def connect(path=None):
+    path = path or Config.RUN_HISTORY_DB
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def resolve_commit(ref="HEAD"):
+    """Hash commit của ref (HEAD, tên branch, tag, prefix...); None nếu không có git / ref không tồn tại"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--verify", f"{ref}^{{commit}}"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def record_run(results_log_path, exitstatus=None, commit=None, db_path=None):
+    """Ghi một lần chạy từ results.jsonl (tests/utils/results_log.py) vào history; trả về id của run"""
+    started, results = None, []
+    with open(results_log_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("event") == "session_start":
+                started = record["time"]
+            elif record.get("event") == "test":
+                results.append((record["test"], record["outcome"], record.get("duration"), record.get("error")))
+    if not results:
+        return None
+
+    with closing(connect(db_path)) as connection, connection:
+        run_id = connection.execute(
+            "INSERT INTO runs (started, finished, git_commit, exitstatus) VALUES (?, ?, ?, ?)",
+            (started, datetime.now().isoformat(timespec="seconds"), commit or resolve_commit(), exitstatus),
+        ).lastrowid
+        connection.executemany(
+            "INSERT OR REPLACE INTO results (run_id, test, outcome, duration, message) VALUES (?, ?, ?, ?, ?)",
+            [(run_id, *result) for result in results],
+        )
+    return run_id
+
+
+def _history(connection, runs):
+    """{test: [(run_id, outcome, duration), ...]} trong `runs` lần chạy gần nhất, cũ → mới"""
+    rows = connection.execute(
+        "SELECT run_id, test, outcome, duration FROM results "
+        "WHERE run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?) ORDER BY run_id",
+        (runs,),
+    ).fetchall()
+    history = {}
+    for run_id, test, outcome, duration in rows:
+        history.setdefault(test, []).append((run_id, outcome, duration))
+    return history
+
+
+def flaky_tests(runs=20, min_flips=2, db_path=None):
+    """Test đổi qua lại passed ↔ failed ít nhất min_flips lần trong `runs` lần chạy gần nhất"""
+    with closing(connect(db_path)) as connection:
+        history = _history(connection, runs)
+    flaky = []
+    for test, entries in history.items():
+        outcomes = [outcome for _, outcome, _ in entries if outcome in ("passed", "failed")]
+        flips = sum(1 for previous, current in zip(outcomes, outcomes[1:]) if previous != current)
+        if flips >= min_flips:
+            flaky.append({
+                "test": test, "flips": flips, "runs": len(outcomes),
+                "failures": outcomes.count("failed"), "last": outcomes[-1],
+            })
+    return sorted(flaky, key=lambda item: (-item["flips"], item["test"]))
+
+
+def slowest_tests(runs=20, limit=10, db_path=None):
+    """
+    Test chậm nhất theo p95 thời gian trong `runs` lần chạy gần nhất,
+    kèm p95 của nửa cũ / nửa mới của cửa sổ để thấy xu hướng.
+    """
+    with closing(connect(db_path)) as connection:
+        history = _history(connection, runs)
+    stats = []
+    for test, entries in history.items():
+        durations = [duration for _, outcome, duration in entries if outcome != "skipped" and duration is not None]
+        if not durations:
+            continue
+        half = len(durations) // 2
+        stats.append({
+            "test": test,
+            "runs": len(durations),
+            "p50": percentile(durations, 0.5),
+            "p95": percentile(durations, 0.95),
+            "p95_previous": percentile(durations[:half], 0.95) if half else None,
+            "p95_recent": percentile(durations[half:], 0.95) if half else None,
+        })
+    return sorted(stats, key=lambda item: -item["p95"])[:limit]
+
+
+def slower_since(commit, threshold=None, min_seconds=None, db_path=None):
+    """
+    Test có thời gian trung bình từ run đầu tiên của `commit` (ref git hoặc prefix hash) trở đi
+    chậm hơn các run trước đó quá threshold (tỉ lệ) và quá min_seconds.
+    """
+    commit = resolve_commit(commit) or commit
+    threshold = Config.PHASE_REGRESSION_THRESHOLD if threshold is None else threshold
+    min_seconds = Config.PHASE_REGRESSION_MIN_SECONDS if min_seconds is None else min_seconds
+    with closing(connect(db_path)) as connection:
+        first = connection.execute(
+            "SELECT MIN(id) FROM runs WHERE git_commit LIKE ?", (f"{commit}%",)
+        ).fetchone()[0]
+        if first is None:
+            return None
+        rows = connection.execute(
+            "SELECT test, run_id >= ? AS after, AVG(duration) FROM results "
+            "WHERE outcome != 'skipped' AND duration IS NOT NULL GROUP BY test, after",
+            (first,),
+        ).fetchall()
+    averages = {}
+    for test, after, average in rows:
+        averages.setdefault(test, {})["after" if after else "before"] = average
+    slower = []
+    for test, data in averages.items():
+        if "before" not in data or "after" not in data:
+            continue
+        before, after = data["before"], data["after"]
+        delta = after - before
+        if delta > min_seconds and (before == 0 or delta / before > threshold):
+            slower.append({"test": test, "before": before, "after": after, "change": delta / before if before else None})
+    return sorted(slower, key=lambda item: -(item["after"] - item["before"]))
+
+
+def summary_lines(runs=20, limit=10, since=None, db_path=None):
+    """Tóm tắt cho `run_tests.py history`"""
+    with closing(connect(db_path)) as connection:
+        total_runs = connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+    lines = [f"📚 {total_runs} runs in {db_path or Config.RUN_HISTORY_DB} (window: last {runs})"]
+
+    flaky = flaky_tests(runs, db_path=db_path)
+    lines.append(f"\n🔁 Flaky tests ({len(flaky)}):")
+    for item in flaky:
+        lines.append(f"  {item['test']}: {item['flips']} flips, {item['failures']}/{item['runs']} failed, last {item['last']}")
+
+    lines.append("\n🐢 Slowest tests (p95):")
+    for item in slowest_tests(runs, limit, db_path=db_path):
+        trend = ""
+        if item["p95_previous"]:
+            trend = f"  trend {item['p95_previous']:.2f}s → {item['p95_recent']:.2f}s " \
+                    f"({(item['p95_recent'] - item['p95_previous']) / item['p95_previous'] * 100:+.0f}%)"
+        lines.append(f"  {item['p95']:7.2f}s p95  {item['p50']:7.2f}s p50  {item['test']}{trend}")
+
+    if since:
+        slower = slower_since(since, db_path=db_path)
+        if slower is None:
+            lines.append(f"\n⚠️  No runs recorded for commit {since}")
+        else:
+            lines.append(f"\n📈 Slower since {since} ({len(slower)}):")
+            for item in slower:
+                change = f" ({item['change'] * 100:+.0f}%)" if item["change"] is not None else ""
+                lines.append(f"  {item['test']}: {item['before']:.2f}s → {item['after']:.2f}s{change}")
+    return lines
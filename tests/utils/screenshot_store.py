@@ -0,0 +1,340 @@
+# Kho screenshot theo nội dung (content-addressed): mỗi frame giống nhau chỉ lưu một blob,
+# mỗi lần chạy có một manifest map tên screenshot/test → blob.
+# Giải mã / nén / ghi file chạy trên thread nền (submit), test chạy tiếp ngay sau khi chụp.
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from tests.config import Config
+import base64
+import glob
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Tên file screenshot cũ: <name>_<YYYYmmdd>_<HHMMSS>.png
+LEGACY_NAME = re.compile(r"^(?P<name>.+)_(?P<ts>\d{8}_\d{6})\.png$")
+
+# Policy chụp (Config.SCREENSHOT_POLICY / --screenshot-policy):
+# - always: mọi bước take_screenshot đều được ghi
+# - on-failure: không chụp các bước, chỉ chụp trạng thái lúc test fail
+# - on-failure-last-step: chỉ giữ (chưa giải mã / ghi) bước cuối, ghi ra khi test fail, kèm trạng thái lúc fail
+POLICIES = ("always", "on-failure", "on-failure-last-step")
+policy = "always"
+
+# Id chung của lần chạy: process chính truyền cho các worker xdist (conftest pytest_configure_node)
+run_group = Config.TIMESTAMP
+current_test = None
+_last_step = None
+_lock = threading.Lock()
+_manifest = None
+_executor = None
+_pending = []
+_sequence = 0
+registry = {}  # nodeid → các entry manifest (kèm "path") của lần chạy hiện tại
+stats = {"saved": 0, "deduplicated": 0, "raw_bytes": 0, "written_bytes": 0, "skipped": 0}
+
+
+def _png_chunks(data):
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        yield chunk_type, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def _png_chunk(chunk_type, body):
+    return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(">I", zlib.crc32(chunk_type + body) & 0xFFFFFFFF)
+
+
+def _decode(png):
+    """(IHDR, dữ liệu pixel đã giải nén) của PNG; None nếu không đọc được"""
+    if not png.startswith(PNG_SIGNATURE):
+        return None
+    try:
+        chunks = list(_png_chunks(png))
+        header = next(body for chunk_type, body in chunks if chunk_type == b"IHDR")
+        pixels = zlib.decompress(b"".join(body for chunk_type, body in chunks if chunk_type == b"IDAT"))
+    except (StopIteration, struct.error, zlib.error):
+        return None
+    return header, pixels
+
+
+def content_hash(png):
+    """Hash theo pixel (không phụ thuộc mức nén) để frame giống nhau có cùng blob"""
+    decoded = _decode(png)
+    if decoded is None:
+        return hashlib.sha256(png).hexdigest()
+    header, pixels = decoded
+    return hashlib.sha256(header + pixels).hexdigest()
+
+
+def recompress(png, level=9):
+    """Nén lại IDAT với zlib level cao nhất (lossless); giữ bản gốc nếu không nhỏ hơn"""
+    decoded = _decode(png)
+    if decoded is None:
+        return png
+    _, pixels = decoded
+    out, idat_written = [PNG_SIGNATURE], False
+    for chunk_type, body in _png_chunks(png):
+        if chunk_type == b"IDAT":
+            if not idat_written:
+                out.append(_png_chunk(b"IDAT", zlib.compress(pixels, level)))
+                idat_written = True
+            continue
+        out.append(_png_chunk(chunk_type, body))
+    result = b"".join(out)
+    return result if len(result) < len(png) else png
+
+
+def run_id():
+    """Id manifest của process này: run_group + worker (mỗi worker xdist có manifest riêng)"""
+    return f"{run_group}_{os.environ.get('PYTEST_XDIST_WORKER', 'main')}"
+
+
+def _blob_path(digest):
+    return os.path.join(Config.SCREENSHOT_STORE_DIR, "blobs", digest[:2], f"{digest}.png")
+
+
+def _manifest_dir():
+    return os.path.join(Config.SCREENSHOT_STORE_DIR, "runs")
+
+
+def write_manifest():
+    """Ghi manifest của lần chạy ra file một lần (cuối session); save() chỉ thêm entry trong bộ nhớ"""
+    with _lock:
+        if _manifest is None:
+            return None
+        manifest = dict(_manifest, screenshots=list(_manifest["screenshots"]))
+    os.makedirs(_manifest_dir(), exist_ok=True)
+    path = os.path.join(_manifest_dir(), f"{manifest['run']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def _new_manifest(run, group=None):
+    return {
+        "run": run,
+        "run_group": group or run_group,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "screenshots": [],
+    }
+
+
+def _group_of(manifest):
+    """Lần chạy của manifest; manifest cũ chưa có run_group thì bỏ hậu tố worker của run"""
+    return manifest.get("run_group") or manifest["run"].rsplit("_", 1)[0]
+
+
+def save(png, name, test=None, masks=None, sequence=None):
+    """Lưu screenshot vào store; masks: vùng [x, y, w, h] (pixel ảnh) bỏ qua khi so sánh visual. Trả về đường dẫn blob"""
+    global _manifest
+    digest = content_hash(png)
+    path = _blob_path(digest)
+    written = 0
+    if not os.path.exists(path):
+        data = recompress(png) if Config.SCREENSHOT_RECOMPRESS else png
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        written = len(data)
+
+    with _lock:
+        stats["saved"] += 1
+        stats["raw_bytes"] += len(png)
+        if written:
+            stats["written_bytes"] += written
+        else:
+            stats["deduplicated"] += 1
+
+        test = test or current_test
+        entry = {
+            "name": name,
+            "test": test,
+            "blob": os.path.relpath(path, Config.SCREENSHOT_STORE_DIR),
+            "sha256": digest,
+            "taken": datetime.now().isoformat(timespec="seconds"),
+        }
+        if masks:
+            entry["masks"] = masks
+        if test:
+            registry.setdefault(test, []).append(dict(entry, path=path, sequence=sequence))
+        if _manifest is None:
+            _manifest = _new_manifest(run_id())
+        _manifest["screenshots"].append(entry)
+    return path
+
+
+def _save_capture(capture, name, test, masks, sequence):
+    png = base64.b64decode(capture) if isinstance(capture, str) else capture
+    return save(png, name, test, masks, sequence)
+
+
+def submit(capture, name, test=None, masks=None):
+    """
+    Giao capture (PNG base64 từ driver.get_screenshot_as_base64 hoặc bytes) cho thread nền
+    giải mã, nén và ghi; trả về Future của đường dẫn blob. Test gắn theo test đang chạy lúc chụp.
+    """
+    global _executor, _sequence
+    with _lock:
+        _sequence += 1
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.SCREENSHOT_WRITER_THREADS, thread_name_prefix="screenshot-writer"
+            )
+        future = _executor.submit(_save_capture, capture, name, test or current_test, masks, _sequence)
+        _pending.append((name, future))
+    return future
+
+
+def start_test(nodeid):
+    """Bắt đầu test mới: gắn screenshot với test, bỏ bước cuối còn giữ của test trước"""
+    global current_test, _last_step
+    with _lock:
+        current_test = nodeid
+        _last_step = None
+
+
+def wants_capture():
+    """Bước hiện tại có cần lấy ảnh từ driver không (on-failure: không, tiết kiệm cả lệnh chụp)"""
+    if policy == "on-failure":
+        with _lock:
+            stats["skipped"] += 1
+        return False
+    return True
+
+
+def capture_step(capture, name, masks=None):
+    """Screenshot của một bước test theo policy"""
+    global _last_step
+    if policy == "always":
+        return submit(capture, name, masks=masks)
+    with _lock:
+        if _last_step is not None:
+            stats["skipped"] += 1
+        _last_step = (capture, name, masks, current_test)
+    return None
+
+
+def finish_test(failed):
+    """
+    Kết thúc test: test fail thì ghi bước cuối đang giữ (on-failure-last-step).
+    Trả về True nếu cần chụp thêm trạng thái lúc fail (policy khác always).
+    """
+    global _last_step
+    with _lock:
+        last, _last_step = _last_step, None
+        if last is not None and not failed:
+            stats["skipped"] += 1
+    if failed and last is not None:
+        capture, name, masks, test = last
+        submit(capture, name, test=test, masks=masks)
+    return failed and policy != "always"
+
+
+def flush():
+    """Đợi mọi screenshot đang ghi xong; trả về danh sách đường dẫn blob"""
+    with _lock:
+        pending = _pending[:]
+        del _pending[:]
+    paths = []
+    for name, future in pending:
+        try:
+            paths.append(future.result())
+        except Exception as e:
+            print(f"⚠️  Could not save screenshot '{name}': {e}")
+    return paths
+
+
+def entries_for(nodeid):
+    """Entry manifest (name, blob, masks, path...) các screenshot của test trong lần chạy này; gọi sau flush()"""
+    with _lock:
+        # Theo thứ tự chụp (thread nền có thể ghi xong không theo thứ tự)
+        return sorted(registry.get(nodeid, []), key=lambda entry: entry["sequence"] or 0)
+
+
+def screenshots_for(nodeid):
+    """Đường dẫn screenshot của test trong lần chạy này (không quét thư mục); gọi sau flush()"""
+    return [entry["path"] for entry in entries_for(nodeid)]
+
+
+def load_manifests():
+    """Manifest của các lần chạy, mới nhất trước"""
+    manifests = []
+    for path in glob.glob(os.path.join(_manifest_dir(), "*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            continue
+        manifest["_path"] = path
+        manifests.append(manifest)
+    return sorted(manifests, key=lambda m: m.get("created", ""), reverse=True)
+
+
+def prune(max_age_days=None, keep_runs=None):
+    """
+    Xóa manifest cũ hơn max_age_days hoặc ngoài keep_runs lần chạy gần nhất,
+    rồi xóa các blob không còn manifest nào tham chiếu. Trả về (số run, số blob) đã xóa.
+    """
+    max_age_days = Config.SCREENSHOT_RETENTION_DAYS if max_age_days is None else max_age_days
+    keep_runs = Config.SCREENSHOT_KEEP_RUNS if keep_runs is None else keep_runs
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec="seconds")
+
+    manifests = load_manifests()
+    # Các worker của cùng một lần chạy tính là một run
+    runs = []
+    for manifest in manifests:
+        run = _group_of(manifest)
+        if run not in runs:
+            runs.append(run)
+    kept_runs = set(runs[:keep_runs])
+
+    removed_runs, referenced = 0, set()
+    for manifest in manifests:
+        if _group_of(manifest) not in kept_runs or manifest.get("created", "") < cutoff:
+            os.remove(manifest["_path"])
+            removed_runs += 1
+        else:
+            referenced.update(s["blob"] for s in manifest["screenshots"])
+
+    removed_blobs = 0
+    for path in glob.glob(os.path.join(Config.SCREENSHOT_STORE_DIR, "blobs", "*", "*.png")):
+        if os.path.relpath(path, Config.SCREENSHOT_STORE_DIR) not in referenced:
+            os.remove(path)
+            removed_blobs += 1
+    return removed_runs, removed_blobs
+
+
+def migrate_legacy():
+    """Chuyển các file <name>_<timestamp>.png cũ trong SCREENSHOT_DIR vào store (manifest 'legacy')"""
+    global _manifest
+    _manifest = _new_manifest(f"legacy_{run_id()}", group=f"legacy_{run_group}")
+    migrated = 0
+    for path in sorted(glob.glob(os.path.join(Config.SCREENSHOT_DIR, "*.png"))):
+        match = LEGACY_NAME.match(os.path.basename(path))
+        if match is None:
+            continue
+        with open(path, "rb") as f:
+            save(f.read(), match.group("name"), test=None)
+        os.remove(path)
+        migrated += 1
+    write_manifest()
+    _manifest = None
+    return migrated
+
+
+def summary_lines():
+    if not stats["saved"] and not stats["skipped"]:
+        return []
+    return [
+        f"screenshots ({policy}): {stats['saved']} saved, {stats['deduplicated']} deduplicated, "
+        f"{stats['skipped']} skipped by policy, "
+        f"{stats['written_bytes'] / 2**20:.1f}MB written (raw {stats['raw_bytes'] / 2**20:.1f}MB)",
+    ]
@@ -0,0 +1,12 @@
+# Hàm thống kê dùng chung cho các báo cáo (run history, web vitals), không phụ thuộc module nào khác.
+
+
+def percentile(values, fraction):
+    """Percentile nội suy tuyến tính; None nếu không có giá trị"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
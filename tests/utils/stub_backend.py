@@ -0,0 +1,633 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from urllib.request import Request, urlopen
+from urllib.error import URLError
+from email.parser import BytesParser
+from email.policy import HTTP
+from datetime import datetime, timezone
+from tests.config import Config
+from tests.utils import account_pool
+import base64
+import copy
+import json
+import os
+import re
+import threading
+import time
+
+# Script chuyển request của app từ backend thật sang stub (chạy trước code của app)
+REDIRECT_API_SCRIPT = """
+(function () {
+    var upstream = %(upstream)s, stub = %(stub)s;
+    function rewrite(url) {
+        url = String(url);
+        return url.indexOf(upstream) === 0 ? stub + url.slice(upstream.length) : url;
+    }
+    var open = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        var args = Array.prototype.slice.call(arguments);
+        args[1] = rewrite(url);
+        return open.apply(this, args);
+    };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function (input, init) {
+            if (typeof input === 'string') input = rewrite(input);
+            return originalFetch.call(this, input, init);
+        };
+    }
+})();
+"""
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "Authorization, Content-Type, X-Skip-Auth-Redirect",
+    "Access-Control-Allow-Credentials": "true",
+}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _make_token(user_id, lifetime=24 * 3600):
+    """Token dạng JWT (không ký) để AuthSessionStore đọc được claim exp"""
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    payload = {"sub": str(user_id), "exp": int(time.time()) + lifetime}
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(payload)}.stub"
+
+
+def _user_id_from_token(token):
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))["sub"])
+    except (IndexError, ValueError, KeyError):
+        return None
+
+
+class BadRequest(Exception):
+    """Body của request không đọc được: handler trả 400 thay vì lỗi trong thread"""
+
+
+class StubState:
+    """Dữ liệu in-memory của stub: users, videos, comments, likes, bookmarks, follows"""
+
+    def __init__(self, media_url):
+        self.media_url = media_url
+        self.lock = threading.RLock()
+        self._seed = self._build_seed()
+        self.reset()
+
+    def _build_seed(self):
+        """Dữ liệu gốc: account test (Config + account pool) và một creator có sẵn vài video"""
+        users, videos = {}, {}
+        seed_accounts = [
+            {"email": Config.TEST_EMAIL_2, "password": Config.TEST_PASSWORD_2,
+             "username": Config.TEST_USERNAME_2, "full_name": Config.TEST_FULLNAME_2},
+        ] + account_pool.load_accounts()
+        seed_accounts.append({"email": "creator@toptop.local", "password": "creator123",
+                              "username": "toptop_creator", "full_name": "TopTop Creator"})
+        for account in seed_accounts:
+            if any(u["email"] == account["email"] for u in users.values()):
+                continue
+            user_id = len(users) + 1
+            users[user_id] = {
+                "id": user_id,
+                "email": account["email"],
+                "username": account.get("username") or account["email"].split("@")[0],
+                "password": account["password"],
+                "full_name": account.get("full_name") or account.get("username") or "",
+                "avatar_url": None,
+                "role": "user",
+                "status": "active",
+                "created_at": _now(),
+            }
+        creator_id = len(users)
+        for index in range(1, 4):
+            videos[index] = {
+                "id": index,
+                "owner_id": creator_id,
+                "title": f"Stub video {index}",
+                "description": f"Video mẫu {index} của stub backend #toptop",
+                "visibility": "public",
+                "url": self.media_url,
+                "thumb_url": None,
+                "duration_sec": 10,
+                "view_count": 0,
+                "created_at": _now(),
+            }
+        return {"users": users, "videos": videos}
+
+    def reset(self, email=None):
+        """Reset toàn bộ dữ liệu, hoặc chỉ dữ liệu của một account (likes, bookmarks, follows, comments, uploads)"""
+        with self.lock:
+            if email is None:
+                self.users = copy.deepcopy(self._seed["users"])
+                self.videos = copy.deepcopy(self._seed["videos"])
+                self.comments = {}
+                self.likes, self.bookmarks, self.follows = set(), set(), set()
+                return
+            user = self.find_user(email=email)
+            if user is None:
+                return
+            uid = user["id"]
+            self.likes = {like for like in self.likes if like[0] != uid}
+            self.bookmarks = {b for b in self.bookmarks if b[0] != uid}
+            self.follows = {f for f in self.follows if f[0] != uid}
+            self.comments = {cid: c for cid, c in self.comments.items() if c["user_id"] != uid}
+            self.videos = {vid: v for vid, v in self.videos.items()
+                           if v["owner_id"] != uid or vid in self._seed["videos"]}
+
+    def find_user(self, email=None, username=None):
+        for user in self.users.values():
+            if (email is not None and user["email"] == email) or \
+                    (username is not None and user["username"] == username):
+                return user
+        return None
+
+    def public_user(self, user, viewer_id=None):
+        data = {k: v for k, v in user.items() if k != "password"}
+        data["followers_count"] = sum(1 for f in self.follows if f[1] == user["id"])
+        data["following_count"] = sum(1 for f in self.follows if f[0] == user["id"])
+        data["videos_count"] = sum(1 for v in self.videos.values() if v["owner_id"] == user["id"])
+        data["is_following"] = (viewer_id, user["id"]) in self.follows
+        return data
+
+    def video_view(self, video, viewer_id=None):
+        owner = self.users[video["owner_id"]]
+        data = dict(video)
+        data.update({
+            "username": owner["username"],
+            "full_name": owner["full_name"],
+            "avatar_url": owner["avatar_url"],
+            "owner": self.public_user(owner, viewer_id),
+            "likes_count": sum(1 for like in self.likes if like[1] == video["id"]),
+            "comments_count": sum(1 for c in self.comments.values() if c["video_id"] == video["id"]),
+            "is_liked": (viewer_id, video["id"]) in self.likes if viewer_id else None,
+            "is_bookmarked": (viewer_id, video["id"]) in self.bookmarks if viewer_id else False,
+            "is_following": (viewer_id, video["owner_id"]) in self.follows if viewer_id else False,
+        })
+        return data
+
+    def comment_view(self, comment):
+        user = self.users[comment["user_id"]]
+        data = dict(comment)
+        data.update({"username": user["username"], "full_name": user["full_name"],
+                     "avatar_url": user["avatar_url"], "status": "visible"})
+        return data
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Các endpoint /api/v1 mà src/api/*.api.ts gọi trong suite"""
+
+    server_version = "TopTopStub/1.0"
+
+    # (method, regex path) → tên hàm xử lý
+    ROUTES = [
+        ("POST", r"/api/v1/auth/login", "login"),
+        ("POST", r"/api/v1/auth/register", "register"),
+        ("GET", r"/api/v1/auth/test-token", "me"),
+        ("GET", r"/api/v1/users/me", "me"),
+        ("GET", r"/api/v1/users/(\d+)", "get_user"),
+        ("GET", r"/api/v1/videos/", "list_videos"),
+        ("POST", r"/api/v1/videos/", "upload_video"),
+        ("GET", r"/api/v1/videos/following/feed", "following_feed"),
+        ("GET", r"/api/v1/videos/user/(\d+)", "user_videos"),
+        ("GET", r"/api/v1/videos/(\d+)", "get_video"),
+        ("GET", r"/api/v1/comments/video/(\d+)", "list_comments"),
+        ("POST", r"/api/v1/comments/", "create_comment"),
+        ("POST", r"/api/v1/social/likes/(\d+)", "like"),
+        ("DELETE", r"/api/v1/social/likes/(\d+)", "unlike"),
+        ("POST", r"/api/v1/social/bookmarks/(\d+)", "bookmark"),
+        ("DELETE", r"/api/v1/social/bookmarks/(\d+)", "unbookmark"),
+        ("GET", r"/api/v1/social/bookmarks/my", "my_bookmarks"),
+        ("POST", r"/api/v1/social/follow/(\d+)", "follow"),
+        ("DELETE", r"/api/v1/social/unfollow/(\d+)", "unfollow"),
+        ("GET", r"/api/v1/social/followers/(\d+)", "followers"),
+        ("GET", r"/api/v1/social/following/(\d+)", "following"),
+        ("GET", r"/api/v1/follows/following", "my_following"),
+        ("GET", r"/api/v1/follows/followers", "my_followers"),
+        ("POST", r"/__stub/reset", "stub_reset"),
+        ("POST", r"/__stub/config", "stub_config"),
+        ("GET", r"/__stub/health", "stub_health"),
+        ("GET", r"/__stub/media/video.mp4", "stub_media"),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def stub(self):
+        return self.server.stub
+
+    @property
+    def state(self):
+        return self.server.stub.state
+
+    # ---------- plumbing ----------
+
+    def _dispatch(self, method):
+        path = urlparse(self.path).path
+        self._query = parse_qs(urlparse(self.path).query)
+        if not path.startswith("/__stub/") and self.stub.latency:
+            time.sleep(self.stub.latency)
+        for route_method, pattern, name in self.ROUTES:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                self.stub.count(f"{method} {name}")
+                try:
+                    return getattr(self, name)(*[int(g) for g in match.groups()])
+                except BadRequest as e:
+                    return self._send({"detail": str(e)}, 400)
+        self.stub.count(f"{method} (unhandled) {path}")
+        if method == "GET" and path.startswith("/api/v1/"):
+            # Endpoint phụ (notifications, messages, ...) không cần cho suite → trả về rỗng
+            return self._send([])
+        return self._send({"detail": "Not Found"}, 404)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._send_cors()
+        self.end_headers()
+
+    def _send_cors(self):
+        self.send_header("Access-Control-Allow-Origin", self.headers.get("Origin") or "*")
+        for key, value in CORS_HEADERS.items():
+            self.send_header(key, value)
+
+    def _send(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self._send_cors()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return {k: v[0] for k, v in parse_qs(raw.decode("utf-8")).items()}
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + raw
+            )
+            fields = {}
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if part.get_filename():
+                    fields[name] = part.get_filename()
+                else:
+                    fields[name] = part.get_content().strip()
+            return fields
+        if content_type.startswith("application/json"):
+            try:
+                return json.loads(raw or b"{}")
+            except ValueError as e:
+                raise BadRequest(f"Invalid JSON body: {e}")
+        # Body kiểu khác (text/plain, octet-stream...) không endpoint nào cần
+        return {}
+
+    def _viewer_id(self):
+        auth = self.headers.get("Authorization", "")
+        if not auth.startswith("Bearer "):
+            return None
+        user_id = _user_id_from_token(auth[len("Bearer "):])
+        return user_id if user_id in self.state.users else None
+
+    def _require_viewer(self):
+        viewer_id = self._viewer_id()
+        if viewer_id is None:
+            self._send({"detail": "Not authenticated"}, 401)
+        return viewer_id
+
+    def _paginate(self, items):
+        skip = int(self._query.get("skip", [0])[0])
+        limit = int(self._query.get("limit", [200])[0])
+        return items[skip:skip + limit]
+
+    # ---------- auth ----------
+
+    def login(self):
+        form = self._body()
+        with self.state.lock:
+            user = self.state.find_user(email=form.get("username"))
+            if user is None or user["password"] != form.get("password"):
+                return self._send({"detail": "Incorrect email or password"}, 401)
+            return self._send({
+                "access_token": _make_token(user["id"]),
+                "token_type": "bearer",
+                "user": self.state.public_user(user),
+            })
+
+    def register(self):
+        data = self._body()
+        with self.state.lock:
+            if self.state.find_user(email=data.get("email")):
+                return self._send({"detail": "Email already registered"}, 400)
+            if self.state.find_user(username=data.get("username")):
+                return self._send({"detail": "Username already taken"}, 400)
+            user_id = max(self.state.users) + 1
+            self.state.users[user_id] = {
+                "id": user_id,
+                "email": data.get("email"),
+                "username": data.get("username"),
+                "password": data.get("password"),
+                "full_name": data.get("fullName") or data.get("full_name") or "",
+                "avatar_url": None,
+                "role": "user",
+                "status": "active",
+                "created_at": _now(),
+            }
+            return self._send(self.state.public_user(self.state.users[user_id]), 201)
+
+    def me(self):
+        viewer_id = self._require_viewer()
+        if viewer_id is not None:
+            with self.state.lock:
+                self._send(self.state.public_user(self.state.users[viewer_id], viewer_id))
+
+    def get_user(self, user_id):
+        with self.state.lock:
+            user = self.state.users.get(user_id)
+            if user is None:
+                return self._send({"detail": "User not found"}, 404)
+            return self._send(self.state.public_user(user, self._viewer_id()))
+
+    # ---------- videos ----------
+
+    def _visible_videos(self, viewer_id, owner_id=None):
+        videos = sorted(self.state.videos.values(), key=lambda v: v["id"], reverse=True)
+        return [
+            self.state.video_view(v, viewer_id) for v in videos
+            if (owner_id is None or v["owner_id"] == owner_id)
+            and (v["visibility"] == "public" or v["owner_id"] == viewer_id)
+        ]
+
+    def list_videos(self):
+        with self.state.lock:
+            self._send(self._paginate(self._visible_videos(self._viewer_id())))
+
+    def following_feed(self):
+        viewer_id = self._require_viewer()
+        if viewer_id is None:
+            return
+        with self.state.lock:
+            followees = {f[1] for f in self.state.follows if f[0] == viewer_id}
+            videos = [v for v in self._visible_videos(viewer_id) if v["owner_id"] in followees]
+            self._send(self._paginate(videos))
+
+    def user_videos(self, user_id):
+        with self.state.lock:
+            self._send(self._paginate(self._visible_videos(self._viewer_id(), owner_id=user_id)))
+
+    def get_video(self, video_id):
+        with self.state.lock:
+            video = self.state.videos.get(video_id)
+            if video is None:
+                return self._send({"detail": "Video not found"}, 404)
+            self._send(self.state.video_view(video, self._viewer_id()))
+
+    def upload_video(self):
+        viewer_id = self._require_viewer()
+        if viewer_id is None:
+            return
+        form = self._body()
+        if not form.get("title"):
+            return self._send({"detail": "Title is required"}, 422)
+        with self.state.lock:
+            video_id = max(self.state.videos, default=0) + 1
+            self.state.videos[video_id] = {
+                "id": video_id,
+                "owner_id": viewer_id,
+                "title": form["title"],
+                "description": form.get("description", ""),
+                "visibility": form.get("visibility") or "public",
+                "url": self.stub.media_url,
+                "thumb_url": None,
+                "duration_sec": 10,
+                "view_count": 0,
+                "created_at": _now(),
+            }
+            self._send(self.state.video_view(self.state.videos[video_id], viewer_id), 201)
+
+    # ---------- comments ----------
+
+    def list_comments(self, video_id):
+        with self.state.lock:
+            comments = sorted(
+                (c for c in self.state.comments.values() if c["video_id"] == video_id),
+                key=lambda c: c["id"], reverse=True
+            )
+            self._send([self.state.comment_view(c) for c in comments])
+
+    def create_comment(self):
+        viewer_id = self._require_viewer()
+        if viewer_id is None:
+            return
+        data = self._body()
+        video_id = data.get("videoId") or data.get("video_id")
+        content = (data.get("content") or "").strip()
+        if not content:
+            return self._send({"detail": "Content is required"}, 422)
+        with self.state.lock:
+            if video_id not in self.state.videos:
+                return self._send({"detail": "Video not found"}, 404)
+            comment_id = max(self.state.comments, default=0) + 1
+            self.state.comments[comment_id] = {
+                "id": comment_id,
+                "video_id": video_id,
+                "user_id": viewer_id,
+                "content": content,
+                "created_at": _now(),
+            }
+            self._send(self.state.comment_view(self.state.comments[comment_id]), 201)
+
+    # ---------- social ----------
+
+    def _toggle(self, collection, target_id, add, exists):
+        viewer_id = self._require_viewer()
+        if viewer_id is None:
+            return
+        with self.state.lock:
+            if not exists(target_id):
+                return self._send({"detail": "Not found"}, 404)
+            pair = (viewer_id, target_id)
+            if add:
+                collection.add(pair)
+            else:
+                collection.discard(pair)
+            self._send({"success": True})
+
+    def like(self, video_id):
+        self._toggle(self.state.likes, video_id, True, lambda vid: vid in self.state.videos)
+
+    def unlike(self, video_id):
+        self._toggle(self.state.likes, video_id, False, lambda vid: vid in self.state.videos)
+
+    def bookmark(self, video_id):
+        self._toggle(self.state.bookmarks, video_id, True, lambda vid: vid in self.state.videos)
+
+    def unbookmark(self, video_id):
+        self._toggle(self.state.bookmarks, video_id, False, lambda vid: vid in self.state.videos)
+
+    def follow(self, user_id):
+        self._toggle(self.state.follows, user_id, True, lambda uid: uid in self.state.users)
+
+    def unfollow(self, user_id):
+        self._toggle(self.state.follows, user_id, False, lambda uid: uid in self.state.users)
+
+    def my_bookmarks(self):
+        viewer_id = self._require_viewer()
+        if viewer_id is None:
+            return
+        with self.state.lock:
+            videos = [self.state.video_view(self.state.videos[b[1]], viewer_id)
+                      for b in self.state.bookmarks if b[0] == viewer_id and b[1] in self.state.videos]
+            self._send({"videos": videos, "total": len(videos)})
+
+    def followers(self, user_id):
+        with self.state.lock:
+            users = [self.state.public_user(self.state.users[f[0]]) for f in self.state.follows if f[1] == user_id]
+            self._send({"followers": users, "total": len(users)})
+
+    def following(self, user_id):
+        with self.state.lock:
+            users = [self.state.public_user(self.state.users[f[1]]) for f in self.state.follows if f[0] == user_id]
+            self._send({"following": users, "total": len(users)})
+
+    def my_following(self):
+        viewer_id = self._require_viewer()
+        if viewer_id is not None:
+            with self.state.lock:
+                self._send([{"followerId": viewer_id, "followeeId": f[1]}
+                            for f in self.state.follows if f[0] == viewer_id])
+
+    def my_followers(self):
+        viewer_id = self._require_viewer()
+        if viewer_id is not None:
+            with self.state.lock:
+                self._send([{"followerId": f[0], "followeeId": viewer_id}
+                            for f in self.state.follows if f[1] == viewer_id])
+
+    # ---------- điều khiển stub ----------
+
+    def stub_reset(self):
+        data = self._body()
+        self.state.reset(email=data.get("email"))
+        self._send({"reset": data.get("email") or "all"})
+
+    def stub_config(self):
+        data = self._body()
+        if "latency" in data:
+            self.stub.latency = float(data["latency"])
+        self._send({"latency": self.stub.latency})
+
+    def stub_health(self):
+        self._send({"status": "ok", "stub": True})
+
+    def stub_media(self):
+        # Video mẫu cho feed (file upload của suite)
+        if not os.path.exists(Config.TEST_VIDEO_PATH):
+            return self._send({"detail": "Not Found"}, 404)
+        with open(Config.TEST_VIDEO_PATH, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self._send_cors()
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubBackend:
+    """
+    Backend giả cho /api/v1 chạy trong process test (thread riêng).
+    Browser được chuyển hướng request từ Config.API_BASE_URL sang stub bằng script inject.
+    Nếu port đã có stub khác chạy (worker xdist khác) thì dùng chung stub đó.
+    """
+
+    def __init__(self, port=None, latency=None):
+        self.port = port or Config.STUB_BACKEND_PORT
+        self.latency = Config.STUB_BACKEND_LATENCY if latency is None else latency
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.upstream = Config.API_BASE_URL.rstrip("/")
+        self.media_url = f"{self.url}/__stub/media/video.mp4"
+        self.state = None
+        self.owner = False
+        self._server = None
+        self._counts = {}
+        self._count_lock = threading.Lock()
+
+    def count(self, key):
+        with self._count_lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def _call(self, path, data):
+        request = Request(f"{self.url}{path}", data=json.dumps(data).encode(),
+                          headers={"Content-Type": "application/json"}, method="POST")
+        with urlopen(request, timeout=5) as response:
+            return json.load(response)
+
+    def start(self):
+        """Khởi động server; port đã bị chiếm bởi stub khác thì dùng chung"""
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), StubRequestHandler)
+        except OSError:
+            try:
+                with urlopen(f"{self.url}/__stub/health", timeout=2) as response:
+                    json.load(response)
+            except (URLError, OSError, ValueError):
+                raise RuntimeError(f"Port {self.port} đã bị chiếm và không phải stub backend")
+            print(f"🔁 Dùng chung stub backend đang chạy tại {self.url}")
+            return self
+
+        self.owner = True
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.state = StubState(self.media_url)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"🧪 Stub backend: {self.url} (latency {self.latency * 1000:.0f}ms)")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset(self, email=None):
+        """Reset dữ liệu stub (qua HTTP để cũng dùng được với stub của worker khác)"""
+        return self._call("/__stub/reset", {"email": email} if email else {})
+
+    def set_latency(self, seconds):
+        return self._call("/__stub/config", {"latency": seconds})
+
+    def redirect_script(self):
+        """Script chuyển request của app từ backend thật sang stub"""
+        return REDIRECT_API_SCRIPT % {"upstream": json.dumps(self.upstream), "stub": json.dumps(self.url)}
+
+    def summary_lines(self):
+        if not self.owner:
+            return [f"shared stub at {self.url} (started by another worker)"]
+        lines = [f"stub backend {self.url}, latency {self.latency * 1000:.0f}ms, "
+                 f"{sum(self._counts.values())} requests"]
+        for key, count in sorted(self._counts.items(), key=lambda item: -item[1]):
+            lines.append(f"{count:>6}  {key}")
+        return lines
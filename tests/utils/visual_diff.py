@@ -0,0 +1,220 @@
+# So sánh visual screenshot của lần chạy với baseline đã duyệt (tests/visual_baselines/<name>.png).
+# So pixel bằng NumPy, có thể lọc trước bằng perceptual hash, bỏ qua vùng mask (vd. khung video),
+# sinh ảnh diff khi khác và chạy song song trong process pool. Cần numpy + Pillow (pytest --visual-diff).
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from tests.config import Config
+import json
+import os
+import re
+import shutil
+
+# Vùng (pixel ảnh) của các phần tử khớp selector, để bỏ qua khi so sánh
+MASK_REGIONS_JS = """
+var ratio = window.devicePixelRatio || 1, rects = [];
+arguments[0].forEach(function (selector) {
+  document.querySelectorAll(selector).forEach(function (el) {
+    var r = el.getBoundingClientRect();
+    if (r.width > 0 && r.height > 0) {
+      rects.push([r.left, r.top, r.width, r.height].map(function (v) { return Math.round(v * ratio); }));
+    }
+  });
+});
+return rects;
+"""
+
+# Bật bởi VisualDiffPlugin: take_screenshot chỉ lấy mask khi có so sánh visual
+enabled = False
+
+
+def mask_regions(driver, selectors=None):
+    """[[x, y, w, h], ...] của Config.VISUAL_MASK_SELECTORS trên viewport hiện tại (một lệnh execute_script)"""
+    selectors = list(selectors or Config.VISUAL_MASK_SELECTORS)
+    if not selectors:
+        return []
+    try:
+        return driver.execute_script(MASK_REGIONS_JS, selectors) or []
+    except Exception:
+        return []
+
+
+def baseline_path(name):
+    safe_name = re.sub(r"[^\w.-]+", "_", name)
+    return os.path.join(Config.VISUAL_BASELINE_DIR, f"{safe_name}.png")
+
+
+def _load(path):
+    import numpy as np
+    from PIL import Image
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"), dtype=np.int16)
+
+
+def _mask(shape, regions):
+    """Mảng bool (True = bỏ qua) từ các vùng [x, y, w, h]"""
+    import numpy as np
+    mask = np.zeros(shape[:2], dtype=bool)
+    for x, y, w, h in regions or []:
+        mask[max(y, 0):max(y + h, 0), max(x, 0):max(x + w, 0)] = True
+    return mask
+
+
+def phash(pixels):
+    """Perceptual hash 64 bit: DCT 32x32 của ảnh xám, so 8x8 hệ số tần số thấp với median"""
+    import numpy as np
+    from PIL import Image
+    gray = Image.fromarray(pixels.astype(np.uint8)).convert("L").resize((32, 32), Image.LANCZOS)
+    values = np.asarray(gray, dtype=np.float64)
+    n = np.arange(32)
+    dct = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / 64)
+    low = (dct @ values @ dct.T)[:8, :8]
+    return int("".join("1" if bit else "0" for bit in (low > np.median(low)).flatten()), 2)
+
+
+def _write_diff_image(baseline, changed, mask, path):
+    """Ảnh diff: baseline xám mờ, pixel khác màu đỏ, vùng mask màu xanh"""
+    import numpy as np
+    from PIL import Image
+    gray = (baseline.mean(axis=2) * 0.3).astype(np.uint8)
+    image = np.stack([gray, gray, gray], axis=2)
+    image[mask] = (image[mask] * 0.5 + np.array([0, 0, 120])).astype(np.uint8)
+    image[changed] = (255, 0, 0)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(image).save(path, optimize=True)
+
+
+def compare_one(job):
+    """
+    So một screenshot với baseline (chạy trong process pool).
+    Trả về {name, test, status: passed|failed|new|error, ratio, phash_distance, diff, reason}
+    """
+    import numpy as np
+    result = {"name": job["name"], "test": job["test"], "current": job["current"],
+              "ratio": None, "phash_distance": None, "diff": None, "reason": None}
+    if not os.path.exists(job["baseline"]):
+        return dict(result, status="new")
+    try:
+        with open(job["current"], "rb") as f, open(job["baseline"], "rb") as g:
+            if f.read() == g.read():
+                # Baseline là bản copy của blob: cùng bytes = cùng frame
+                return dict(result, status="passed", ratio=0.0)
+        current, baseline = _load(job["current"]), _load(job["baseline"])
+    except Exception as e:
+        return dict(result, status="error", reason=str(e))
+
+    if current.shape != baseline.shape:
+        return dict(result, status="failed", reason=f"size {current.shape[1]}x{current.shape[0]} "
+                                                    f"!= baseline {baseline.shape[1]}x{baseline.shape[0]}")
+    mask = _mask(current.shape, job["masks"])
+    current[mask] = 0
+    baseline[mask] = 0
+
+    if job["phash"]:
+        distance = bin(phash(current) ^ phash(baseline)).count("1")
+        result["phash_distance"] = distance
+        if distance <= job["phash_distance"]:
+            return dict(result, status="passed")
+
+    changed = np.abs(current - baseline).max(axis=2) > job["tolerance"]
+    compared = mask.size - int(mask.sum())
+    ratio = float(changed.sum()) / compared if compared else 0.0
+    result["ratio"] = round(ratio, 6)
+    if ratio <= job["threshold"]:
+        return dict(result, status="passed")
+    _write_diff_image(baseline, changed, mask, job["diff_path"])
+    return dict(result, status="failed", diff=job["diff_path"])
+
+
+def compare_all(jobs, workers=None):
+    """So sánh nhiều screenshot song song trong process pool"""
+    if len(jobs) <= 1:
+        return [compare_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(compare_one, jobs))
+
+
+def build_jobs(entries, use_phash=False):
+    """Job so sánh từ entry screenshot_store (mỗi tên lấy lần chụp cuối)"""
+    latest = {entry["name"]: entry for entry in entries}
+    jobs = []
+    for name, entry in latest.items():
+        jobs.append({
+            "name": name,
+            "test": entry.get("test"),
+            "current": entry["path"],
+            "baseline": baseline_path(name),
+            "masks": entry.get("masks", []),
+            "diff_path": os.path.join(Config.VISUAL_DIFF_DIR, f"{os.path.basename(baseline_path(name))[:-4]}.diff.png"),
+            "tolerance": Config.VISUAL_PIXEL_TOLERANCE,
+            "threshold": Config.VISUAL_DIFF_THRESHOLD,
+            "phash": use_phash,
+            "phash_distance": Config.VISUAL_PHASH_DISTANCE,
+        })
+    return jobs
+
+
+def approve(results):
+    """Chép screenshot hiện tại làm baseline (kết quả new / failed)"""
+    approved = 0
+    for result in results:
+        if result["status"] in ("new", "failed"):
+            os.makedirs(Config.VISUAL_BASELINE_DIR, exist_ok=True)
+            shutil.copyfile(result["current"], baseline_path(result["name"]))
+            approved += 1
+    return approved
+
+
+class VisualDiffPlugin:
+    """
+    Plugin pytest (--visual-diff): đọc screenshot (kèm mask) mà conftest gửi qua report.user_properties,
+    process chính so sánh với baseline cuối session. Có screenshot khác baseline thì session fail
+    (trừ khi --visual-approve: cập nhật baseline).
+    """
+
+    def __init__(self, config):
+        global enabled
+        enabled = True
+        self.config = config
+        self.entries = []
+        self.results = []
+        self.approved = 0
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "teardown":
+            return
+        for key, value in report.user_properties:
+            if key == "screenshots":
+                self.entries.extend(dict(entry, test=report.nodeid) for entry in value)
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.entries:
+            return
+        jobs = build_jobs(self.entries, use_phash=self.config.getoption("--visual-phash"))
+        self.results = compare_all(jobs, Config.VISUAL_DIFF_WORKERS)
+        os.makedirs(Config.VISUAL_DIFF_DIR, exist_ok=True)
+        with open(os.path.join(Config.VISUAL_DIFF_DIR, "results.json"), "w", encoding="utf-8") as f:
+            json.dump({"created": datetime.now().isoformat(timespec="seconds"), "results": self.results},
+                      f, indent=2, ensure_ascii=False)
+        if self.config.getoption("--visual-approve"):
+            self.approved = approve(self.results)
+        elif any(r["status"] in ("failed", "error") for r in self.results) and session.exitstatus == 0:
+            session.exitstatus = 1
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.results:
+            return
+        terminalreporter.section("visual diff")
+        counts = {}
+        for result in self.results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        terminalreporter.write_line(", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+        for result in self.results:
+            if result["status"] == "failed":
+                detail = result["reason"] or f"{result['ratio'] * 100:.2f}% pixels changed → {result['diff']}"
+                terminalreporter.write_line(f"❌ {result['name']} ({result['test']}): {detail}", red=True)
+            elif result["status"] == "error":
+                terminalreporter.write_line(f"⚠️  {result['name']}: {result['reason']}", red=True)
+            elif result["status"] == "new" and not self.approved:
+                terminalreporter.write_line(f"🆕 {result['name']}: chưa có baseline (chạy với --visual-approve)")
+        if self.approved:
+            terminalreporter.write_line(f"✅ Approved {self.approved} baselines in {Config.VISUAL_BASELINE_DIR}")
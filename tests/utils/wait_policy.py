@@ -0,0 +1,291 @@
+# Wait policy dùng chung: tắt implicit wait, mỗi lời gọi page object có budget explicit riêng,
+# và ghi lại lệnh find nào tốn thời gian chờ (stall ẩn) kèm lời gọi page object gây ra nó.
+# - Implicit wait = Config.IMPLICIT_WAIT (0); driver.implicitly_wait(x) ở nơi khác bị đưa về giá trị này.
+# - Lời gọi page object đang chạy nằm trong context (contextvar) do budget_page_methods / call() đặt,
+#   budget = Config.WAIT_BUDGET hoặc @wait_policy.budget(seconds).
+# - find_element (kể cả find_element con) chưa thấy element → thử lại tới hết budget của lời gọi;
+#   ExplicitWait / wait của BasePage đợi tối đa phần budget còn lại (cap), bên trong chỉ thử find một lần.
+# - find_elements trả về ngay: danh sách rỗng là câu trả lời hợp lệ, không đợi.
+# - pytest --implicit-wait N bật lại implicit wait để so sánh: lệnh find nào mất >= Config.IMPLICIT_STALL_THRESHOLD
+#   được ghi lại là stall (terminal + Config.WAIT_POLICY_REPORT_PATH).
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.support.ui import WebDriverWait
+from tests.config import Config
+from tests.utils import phase_timer
+from tests.utils import wait_recorder
+import inspect
+import json
+import os
+import pytest
+import time
+
+FIND_ONE = {Command.FIND_ELEMENT, Command.FIND_CHILD_ELEMENT}
+FIND_MANY = {Command.FIND_ELEMENTS, Command.FIND_CHILD_ELEMENTS}
+POLL = 0.1
+
+# Giây implicit wait của mọi driver (conftest đặt theo --implicit-wait)
+implicit_wait = Config.IMPLICIT_WAIT
+
+# Các lời gọi page object lồng nhau đang chạy: ((tên, deadline), ...)
+_calls = ContextVar("wait_policy_calls", default=())
+# Đang ở trong ExplicitWait (find chỉ thử một lần)
+_explicit = ContextVar("wait_policy_explicit", default=False)
+_stalls = None
+
+
+def apply(driver):
+    """Đặt implicit wait của driver theo policy (driver mới / sau khi reset)"""
+    driver.implicitly_wait(implicit_wait)
+
+
+def budget(seconds):
+    """Decorator cho method page object: budget explicit riêng thay cho Config.WAIT_BUDGET"""
+    def decorate(func):
+        func._wait_budget = seconds
+        return func
+    return decorate
+
+
+@contextmanager
+def call(name, seconds=None):
+    """Budget cho một lời gọi: lệnh find bên trong dùng chung deadline, không vượt deadline của lời gọi ngoài"""
+    calls = _calls.get()
+    deadline = time.perf_counter() + (Config.WAIT_BUDGET if seconds is None else seconds)
+    if calls:
+        deadline = min(deadline, calls[-1][1])
+    token = _calls.set(calls + ((name, deadline),))
+    try:
+        yield
+    finally:
+        _calls.reset(token)
+
+
+def cap(timeout):
+    """Timeout của một explicit wait, không vượt phần budget còn lại của lời gọi page object đang chạy"""
+    calls = _calls.get()
+    if not calls:
+        return timeout
+    return max(0.0, min(timeout, calls[-1][1] - time.perf_counter()))
+
+
+def _budgeted(func, name):
+    seconds = getattr(func, "_wait_budget", None)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with call(name, seconds):
+            return func(*args, **kwargs)
+
+    wrapper._wait_budgeted = True
+    return wrapper
+
+
+def budget_page_methods(cls):
+    """Bọc các method public của page object để mỗi lời gọi có budget riêng (BasePage.__init_subclass__)"""
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(member) or getattr(member, "_wait_budgeted", False):
+            continue
+        setattr(cls, name, _budgeted(member, f"{cls.__name__}.{name}"))
+    return cls
+
+
+def _caller():
+    """Lời gọi page object đang chạy (lệnh gọi driver trực tiếp, vd. trong test, không có lời gọi nào)"""
+    calls = _calls.get()
+    return " > ".join(name for name, _ in calls) if calls else "<driver>"
+
+
+def _record(kind, params, elapsed, found):
+    if _stalls is None or elapsed < Config.IMPLICIT_STALL_THRESHOLD:
+        return
+    params = params or {}
+    _stalls.append({
+        "call": _caller(), "kind": kind, "locator": f"{params.get('using')}={params.get('value')}",
+        "seconds": round(elapsed, 3), "found": found,
+    })
+
+
+def _find_with_budget(execute, command, params):
+    """find_element không có implicit wait: thử lại tới deadline của lời gọi hiện tại"""
+    calls = _calls.get()
+    deadline = calls[-1][1] if calls else time.perf_counter() + Config.WAIT_BUDGET
+    try:
+        return execute(command, params)
+    except NoSuchElementException:
+        if time.perf_counter() + POLL >= deadline:
+            raise
+    start = time.perf_counter()
+    found = False
+    try:
+        with phase_timer.phase("explicit_wait"):
+            while True:
+                time.sleep(POLL)
+                try:
+                    response = execute(command, params)
+                    found = True
+                    return response
+                except NoSuchElementException:
+                    if time.perf_counter() + POLL >= deadline:
+                        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        wait_recorder.record("find_budget", elapsed, satisfied=found)
+        _record("budget", params, elapsed, found)
+
+
+def instrument_driver(driver):
+    """Bọc driver.execute (sau phase_timer.instrument_driver): áp implicit wait, budget của find, ghi stall"""
+    if getattr(driver, "_wait_policy_instrumented", False):
+        return driver
+    original = driver.execute
+
+    def execute(driver_command, params=None):
+        if driver_command == Command.SET_TIMEOUTS and params and "implicit" in params:
+            requested = params["implicit"] / 1000
+            if requested != implicit_wait:
+                print(f"⚠️  implicitly_wait({requested:g}) bỏ qua: wait policy dùng {implicit_wait:g}s ({_caller()})")
+                params = dict(params, implicit=int(implicit_wait * 1000))
+        if driver_command in FIND_ONE and not implicit_wait and not _explicit.get():
+            return _find_with_budget(original, driver_command, params)
+        if driver_command not in FIND_ONE | FIND_MANY or not implicit_wait:
+            return original(driver_command, params)
+        # Implicit wait đang bật: thời gian lệnh find chủ yếu là chờ trong driver
+        start = time.perf_counter()
+        found = False
+        try:
+            response = original(driver_command, params)
+            found = driver_command in FIND_ONE or bool(response.get("value"))
+            return response
+        finally:
+            _record("implicit", params, time.perf_counter() - start, found)
+
+    driver.execute = execute
+    driver._wait_policy_instrumented = True
+    return driver
+
+
+@contextmanager
+def explicit():
+    """Trong explicit wait: thời gian tính vào phase explicit_wait, find bên trong chỉ thử một lần"""
+    token = _explicit.set(True)
+    try:
+        with phase_timer.phase("explicit_wait"):
+            yield
+    finally:
+        _explicit.reset(token)
+
+
+class ExplicitWait(WebDriverWait):
+    """
+    WebDriverWait của page object / test (thay cho WebDriverWait, không patch class của Selenium);
+    timeout bị cap ở phần budget còn lại của lời gọi page object đang chạy
+    """
+
+    def _wait(self, until, method, message):
+        timeout = self._timeout
+        self._timeout = cap(timeout)
+        try:
+            with explicit():
+                return until(method, message)
+        finally:
+            self._timeout = timeout
+
+    def until(self, method, message=""):
+        return self._wait(super().until, method, message)
+
+    def until_not(self, method, message=""):
+        return self._wait(super().until_not, method, message)
+
+
+def start():
+    global _stalls
+    _stalls = []
+
+
+def finish():
+    global _stalls
+    stalls, _stalls = _stalls, None
+    return stalls or []
+
+
+def aggregate(stalls):
+    """Gộp stall theo (kind, call, locator): count, not_found, seconds; tốn nhiều thời gian nhất trước"""
+    groups = {}
+    for stall in stalls:
+        key = (stall["kind"], stall["call"], stall["locator"])
+        entry = groups.setdefault(key, {
+            "kind": stall["kind"], "call": stall["call"], "locator": stall["locator"],
+            "count": 0, "not_found": 0, "seconds": 0.0, "tests": [],
+        })
+        entry["count"] += 1
+        entry["not_found"] += 0 if stall["found"] else 1
+        entry["seconds"] = round(entry["seconds"] + stall["seconds"], 3)
+        if stall.get("test") not in entry["tests"]:
+            entry["tests"].append(stall.get("test"))
+    return sorted(groups.values(), key=lambda entry: -entry["seconds"])
+
+
+class WaitPolicyPlugin:
+    """
+    Plugin pytest: process chạy test gửi stall của từng test qua report.user_properties
+    (hoạt động cả với xdist), process chính gộp theo lời gọi và ghi Config.WAIT_POLICY_REPORT_PATH.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.stalls = []
+        self.groups = []
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        start()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_makereport(self, item, call):
+        if call.when == "teardown":
+            stalls = finish()
+            if stalls:
+                item.user_properties.append(("wait_stalls", stalls))
+        return None
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "teardown":
+            return
+        for key, value in report.user_properties:
+            if key == "wait_stalls":
+                self.stalls.extend(dict(stall, test=report.nodeid) for stall in value)
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.stalls:
+            return
+        self.groups = aggregate(self.stalls)
+        os.makedirs(os.path.dirname(Config.WAIT_POLICY_REPORT_PATH), exist_ok=True)
+        with open(Config.WAIT_POLICY_REPORT_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "implicit_wait": implicit_wait,
+                "budget": Config.WAIT_BUDGET,
+                "calls": self.groups,
+                "stalls": self.stalls,
+            }, f, indent=2, ensure_ascii=False)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.groups:
+            return
+        terminalreporter.section("wait policy stalls")
+        terminalreporter.write_line(
+            f"implicit wait {implicit_wait:g}s, budget {Config.WAIT_BUDGET:g}s per page-object call, "
+            f"threshold {Config.IMPLICIT_STALL_THRESHOLD:g}s"
+        )
+        for entry in self.groups:
+            not_found = f", {entry['not_found']} not found" if entry["not_found"] else ""
+            terminalreporter.write_line(
+                f"⏳ {entry['seconds']:7.2f}s  {entry['count']:3d}x [{entry['kind']}] {entry['call']}  "
+                f"{entry['locator']}{not_found}"
+            )
+        terminalreporter.write_line(f"report: {Config.WAIT_POLICY_REPORT_PATH}")
@@ -0,0 +1,92 @@
+# Ghi nhận thời gian thực tế của từng wait theo điều kiện (BasePage.wait_*)
+# để so sánh với các time.sleep cố định trước đây.
+# Wait của từng test được gửi về process chính qua report.user_properties (cả khi chạy xdist).
+import pytest
+
+_records = None
+
+
+def record(name, elapsed, replaces=None, satisfied=True):
+    """Ghi lại một lần wait; replaces = số giây time.sleep mà wait này thay thế"""
+    if _records is None:
+        return
+    _records.append({
+        "name": name,
+        "elapsed": elapsed,
+        "replaces": replaces,
+        "satisfied": satisfied,
+    })
+
+
+def start():
+    global _records
+    _records = []
+
+
+def finish():
+    global _records
+    records, _records = _records, None
+    return records or []
+
+
+def summary_lines(records):
+    """Tổng hợp theo tên điều kiện + thời gian tiết kiệm so với sleep cũ"""
+    if not records:
+        return []
+    by_name = {}
+    for r in records:
+        entry = by_name.setdefault(r["name"], {"count": 0, "elapsed": 0.0, "timeouts": 0})
+        entry["count"] += 1
+        entry["elapsed"] += r["elapsed"]
+        entry["timeouts"] += 0 if r["satisfied"] else 1
+
+    lines = []
+    for name, entry in sorted(by_name.items(), key=lambda item: -item[1]["elapsed"]):
+        lines.append(
+            f"{name:<22} {entry['count']:>4} waits  total {entry['elapsed']:7.2f}s  "
+            f"avg {entry['elapsed'] / entry['count']:.3f}s  timeouts {entry['timeouts']}"
+        )
+
+    replacing = [r for r in records if r["replaces"] is not None]
+    slept = sum(r["replaces"] for r in replacing)
+    waited = sum(r["elapsed"] for r in replacing)
+    lines.append(
+        f"waits replacing time.sleep: {len(replacing)} — old sleeps {slept:.2f}s, "
+        f"actual {waited:.2f}s, saved {slept - waited:.2f}s"
+    )
+    return lines
+
+
+class WaitRecorderPlugin:
+    """Plugin pytest: gửi wait của từng test qua report.user_properties, process chính in tổng hợp"""
+
+    def __init__(self, config):
+        self.config = config
+        self.records = []
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        start()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_makereport(self, item, call):
+        if call.when == "teardown":
+            records = finish()
+            if records:
+                item.user_properties.append(("waits", records))
+        return None
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "teardown":
+            return
+        for key, value in report.user_properties:
+            if key == "waits":
+                self.records.extend(dict(r, test=report.nodeid) for r in value)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        lines = summary_lines(self.records)
+        if not lines:
+            return
+        terminalreporter.section("waits")
+        for line in lines:
+            terminalreporter.write_line(line)
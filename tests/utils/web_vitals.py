@@ -0,0 +1,224 @@
+# Đo tốc độ tải trang cho mỗi lần navigation của page object: Navigation Timing, FCP, LCP, CLS, long task.
+# Script PerformanceObserver được inject vào mọi document mới; số liệu của một document được đọc lại
+# (một lệnh execute_script) ngay trước navigation tiếp theo và khi test kết thúc,
+# gộp theo route (/video/{id}...) thành bảng p50/p95 trong terminal, web_vitals.json và báo cáo HTML.
+from datetime import datetime
+from html import escape
+from tests.config import Config
+from tests.utils.driver_factory import add_new_document_script
+from tests.utils.stats import percentile
+from urllib.parse import urlparse
+import json
+import os
+import pytest
+import re
+
+# Chạy trước code của app trên mọi document mới; buffered: true lấy cả entry xảy ra trước khi observe
+OBSERVER_JS = """
+(function () {
+    if (window.__vitals) return;
+    var vitals = window.__vitals = {
+        id: Date.now().toString(36) + Math.random().toString(36).slice(2),
+        fcp: null, lcp: null, cls: 0, longTasks: 0, longTaskMs: 0
+    };
+    function observe(type, callback) {
+        try {
+            new PerformanceObserver(function (list) { list.getEntries().forEach(callback); })
+                .observe({type: type, buffered: true});
+        } catch (e) {}
+    }
+    observe('paint', function (entry) {
+        if (entry.name === 'first-contentful-paint') vitals.fcp = entry.startTime;
+    });
+    observe('largest-contentful-paint', function (entry) {
+        vitals.lcp = entry.renderTime || entry.loadTime || entry.startTime;
+    });
+    observe('layout-shift', function (entry) {
+        if (!entry.hadRecentInput) vitals.cls += entry.value;
+    });
+    observe('longtask', function (entry) {
+        vitals.longTasks++;
+        vitals.longTaskMs += entry.duration;
+    });
+})();
+"""
+
+# Số liệu của document hiện tại (ms kể từ lúc bắt đầu navigation); null nếu chưa inject / không phải trang app
+COLLECT_JS = """
+var vitals = window.__vitals, nav = performance.getEntriesByType('navigation')[0];
+if (!vitals || !nav) return null;
+return {
+    id: vitals.id, url: nav.name,
+    ttfb: nav.responseStart, dom_interactive: nav.domInteractive,
+    dom_content_loaded: nav.domContentLoadedEventEnd, load: nav.loadEventEnd || null,
+    fcp: vitals.fcp, lcp: vitals.lcp, cls: vitals.cls,
+    long_tasks: vitals.longTasks, long_task_ms: vitals.longTaskMs
+};
+"""
+
+METRICS = ("ttfb", "dom_interactive", "dom_content_loaded", "load", "fcp", "lcp", "cls", "long_tasks", "long_task_ms")
+
+# Bật bởi WebVitalsPlugin: BasePage / driver fixture chỉ inject và đọc số liệu khi plugin đang chạy
+enabled = False
+
+_samples = None
+
+
+def route(url):
+    """Route của URL để gộp số liệu: bỏ query, id số thành {id} (vd. /video/123 → /video/{id})"""
+    path = urlparse(url).path.rstrip("/") or "/"
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path)
+
+
+def install(driver):
+    """Inject observer vào mọi document mở sau đó (gỡ khi reset browser)"""
+    if not enabled:
+        return
+    identifier = getattr(driver, "_web_vitals_id", None)
+    if identifier not in getattr(driver, "_new_document_scripts", []):
+        driver._web_vitals_id = add_new_document_script(driver, OBSERVER_JS)
+
+
+def collect(driver):
+    """Đọc số liệu của document hiện tại cho test đang chạy; document đọc lại nhiều lần thì giữ lần cuối"""
+    if not enabled or _samples is None:
+        return None
+    try:
+        sample = driver.execute_script(COLLECT_JS)
+    except Exception:
+        return None
+    if not sample or not sample["url"].startswith(("http://", "https://")):
+        return None
+    sample["route"] = route(sample["url"])
+    _samples[sample.pop("id")] = sample
+    return sample
+
+
+def start():
+    global _samples
+    _samples = {}
+
+
+def finish():
+    """Kết thúc test hiện tại; trả về danh sách số liệu theo thứ tự navigation"""
+    global _samples
+    samples, _samples = _samples, None
+    return list(samples.values()) if samples else []
+
+
+def aggregate(samples):
+    """{route: {count, metrics: {metric: {p50, p95}}}} từ danh sách số liệu"""
+    by_route = {}
+    for sample in samples:
+        by_route.setdefault(sample["route"], []).append(sample)
+    routes = {}
+    for name, entries in sorted(by_route.items()):
+        metrics = {}
+        for metric in METRICS:
+            values = [entry[metric] for entry in entries if entry.get(metric) is not None]
+            if values:
+                metrics[metric] = {
+                    "p50": round(percentile(values, 0.5), 4),
+                    "p95": round(percentile(values, 0.95), 4),
+                }
+        routes[name] = {"count": len(entries), "metrics": metrics}
+    return routes
+
+
+def _format(metric, value):
+    if value is None:
+        return "-"
+    if metric == "cls":
+        return f"{value:.3f}"
+    if metric == "long_tasks":
+        return f"{value:g}"
+    return f"{value:.0f}ms"
+
+
+# Cột của bảng tóm tắt (terminal + HTML)
+TABLE_METRICS = (("ttfb", "TTFB"), ("dom_content_loaded", "DCL"), ("load", "Load"), ("fcp", "FCP"),
+                 ("lcp", "LCP"), ("cls", "CLS"), ("long_tasks", "Long tasks"), ("long_task_ms", "Long task time"))
+
+
+def table_rows(routes):
+    """[(route, count, ["p50 / p95", ...]), ...] theo thứ tự TABLE_METRICS"""
+    rows = []
+    for name, data in routes.items():
+        cells = []
+        for metric, _ in TABLE_METRICS:
+            stats = data["metrics"].get(metric)
+            cells.append(f"{_format(metric, stats['p50'])} / {_format(metric, stats['p95'])}" if stats else "-")
+        rows.append((name, data["count"], cells))
+    return rows
+
+
+class WebVitalsPlugin:
+    """
+    Plugin pytest: process chạy test gửi số liệu của từng test qua report.user_properties
+    (hoạt động cả với xdist), process chính gộp theo route và ghi Config.WEB_VITALS_REPORT_PATH.
+    """
+
+    def __init__(self, config):
+        global enabled
+        enabled = True
+        self.config = config
+        self.samples = []
+        self.routes = {}
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        start()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_makereport(self, item, call):
+        # driver fixture đã đọc số liệu của trang cuối cùng trước khi trả browser về pool
+        if call.when == "teardown":
+            samples = finish()
+            if samples:
+                item.user_properties.append(("web_vitals", samples))
+        return None
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "teardown":
+            return
+        for key, value in report.user_properties:
+            if key == "web_vitals":
+                self.samples.extend(dict(sample, test=report.nodeid) for sample in value)
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(self.config, "workerinput") or not self.samples:
+            return
+        self.routes = aggregate(self.samples)
+        os.makedirs(os.path.dirname(Config.WEB_VITALS_REPORT_PATH), exist_ok=True)
+        with open(Config.WEB_VITALS_REPORT_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "routes": self.routes,
+                "samples": self.samples,
+            }, f, indent=2, ensure_ascii=False)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_html_results_summary(self, prefix, summary, postfix, session):
+        # pytest-html dựng report sau pytest_sessionfinish của plugin này (trylast)
+        if not self.routes:
+            return
+        header = "".join(f"<th>{label}</th>" for _, label in TABLE_METRICS)
+        rows = "".join(
+            f"<tr><td>{escape(name)}</td><td>{count}</td>{''.join(f'<td>{cell}</td>' for cell in cells)}</tr>"
+            for name, count, cells in table_rows(self.routes)
+        )
+        postfix.append(
+            "<h2>Web Vitals theo route (p50 / p95)</h2>"
+            f"<table><tr><th>Route</th><th>Navigations</th>{header}</tr>{rows}</table>"
+        )
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.routes:
+            return
+        terminalreporter.section("web vitals (p50 / p95)")
+        for name, count, cells in table_rows(self.routes):
+            terminalreporter.write_line(f"{name} ({count} navigations)")
+            terminalreporter.write_line(
+                "  " + "  ".join(f"{label} {cell}" for (_, label), cell in zip(TABLE_METRICS, cells))
+            )
+        terminalreporter.write_line(f"report: {Config.WEB_VITALS_REPORT_PATH}")